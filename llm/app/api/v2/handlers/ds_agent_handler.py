@@ -7,6 +7,7 @@ import json
 from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
 
 from app.services.ds_agent_service import DSAgentService
+from app.tools.ds.dataset_cache import DatasetCache
 from app.api.deps.checkpointer_deps import get_checkpointer
 from app import logger
 
@@ -88,6 +89,8 @@ async def chat_stream(
     - {"type": "start", "thread_id": "..."}
     - {"type": "thinking", "content": "reasoning content"}
     - {"type": "tool_call", "step": "tools", "tool_calls": [{...}]}
+    - {"type": "tool_progress", "content": "live tool status or code output line"}
+    - {"type": "queue_position", "position": 2, "content": "waiting for a sandbox slot"}
     - {"type": "token", "content": "streaming text"}
     - {"type": "thinking_stats", "reasoning_tokens": 123}
     - {"type": "done", "thread_id": "..."}
@@ -119,3 +122,11 @@ async def chat_stream(
             , "X-Accel-Buffering"   : "no"
         }
     )
+
+
+@router.get("/cache/stats")
+async def cache_stats():
+    """Hit/miss metrics and memory use of the shared dataset cache"""
+    return {
+        "datasets": DatasetCache.stats()
+    }
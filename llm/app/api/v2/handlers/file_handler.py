@@ -10,6 +10,8 @@ router = APIRouter()
 ALLOWED_DIRECTORIES = {
     "plots"     : Path("output/plots"),
     "notebooks" : Path("output/notebooks"),
+    "outputs"   : Path("output/executions"),
+    "analysis"  : Path("output/analysis"),
     "uploads"   : Path("uploads/images"),
 }
 
@@ -60,6 +62,8 @@ async def get_plot(file_id: str):
             media_type = "text/html"
         elif ext == ".pdf":
             media_type = "application/pdf"
+        elif ext == ".webp":
+            media_type = "image/webp"
 
         return FileResponse(
             path        = str(file_path)
@@ -156,6 +160,7 @@ async def get_ds_file(directory: str, file_id: str):
     Supports:
     - /plots/{file_id} - Images (PNG, JPG, SVG), HTML visualizations, PDFs
     - /notebooks/{file_id} - Jupyter notebooks (.ipynb)
+    - /outputs/{file_id} - Full stdout/stderr of code executions that exceeded the inline limit
     - /uploads/{file_id} - Uploaded images
     """
     try:
@@ -2,10 +2,12 @@ import uuid
 from pathlib import Path
 from datetime import datetime
 
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks
 from fastapi.responses import JSONResponse
 
 from app import logger
+from app.tools.ds.dataset_store import DatasetStore
+from app.tools.ds.profile_index import ProfileIndex
 
 
 router = APIRouter()
@@ -103,10 +105,14 @@ async def upload_pdf(file: UploadFile = File(...)):
 
 
 @router.post("/data")
-async def upload_data(file: UploadFile = File(...)):
+async def upload_data(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
     """
     Upload data file (CSV or Excel) and save to disk.
     Returns the file path for use with data analysis tools.
+
+    A typed columnar (Arrow) copy and the profile index are written in the
+    background after the response is sent; the DS tools read them instead of
+    re-parsing the file.
     """
     try:
         allowed_extensions = {".csv", ".xlsx", ".xls"}
@@ -132,6 +138,9 @@ async def upload_data(file: UploadFile = File(...)):
 
         logger.info(f"Data file uploaded: {file_path}")
 
+        background_tasks.add_task(DatasetStore.convert, str(file_path))
+        background_tasks.add_task(ProfileIndex.build, str(file_path))
+
         return JSONResponse({
             "status"    : "success"
             , "message" : "Data file uploaded successfully"
@@ -150,7 +159,7 @@ async def upload_data(file: UploadFile = File(...)):
 
 
 @router.post("/file")
-async def upload_file(file: UploadFile = File(...)):
+async def upload_file(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
     """
     Upload any file (auto-detects image, PDF, or data file).
     Returns the file path for use with appropriate tools.
@@ -166,7 +175,7 @@ async def upload_file(file: UploadFile = File(...)):
         elif file_ext == ".pdf":
             return await upload_pdf(file)
         elif file_ext in data_extensions:
-            return await upload_data(file)
+            return await upload_data(background_tasks, file)
         else:
             raise HTTPException(
                 status_code=400
@@ -27,6 +27,71 @@ class Settings(BaseSettings):
     LANGSMITH_API_KEY       : str = config('LANGSMITH_API_KEY', cast=str)
     LANGSMITH_PROJECT       : str = config('LANGSMITH_PROJECT', cast=str)
 
+    # Process-wide cache of parsed datasets shared by the DS tools
+    DATASET_CACHE_MEMORY_MB     : int = config('DATASET_CACHE_MEMORY_MB', default=1024, cast=int)
+
+    # CSVs above this size are profiled chunk by chunk instead of loaded whole
+    DATASET_STREAMING_THRESHOLD_MB: int = config('DATASET_STREAMING_THRESHOLD_MB', default=256, cast=int)
+    DATASET_PROFILE_CHUNK_ROWS  : int = config('DATASET_PROFILE_CHUNK_ROWS', default=100000, cast=int)
+    # CSV parser used by the DS tools: auto, pandas, polars or pyarrow
+    DATAFRAME_ENGINE            : str = config('DATAFRAME_ENGINE', default='auto', cast=str)
+
+    # Blockwise correlation_analysis: columns per block and threads
+    CORRELATION_BLOCK_SIZE      : int = config('CORRELATION_BLOCK_SIZE', default=256, cast=int)
+    CORRELATION_WORKERS         : int = config('CORRELATION_WORKERS', default=4, cast=int)
+
+    # Worker processes rendering the VizTools plots off the event loop
+    VIZ_RENDER_WORKERS          : int = config('VIZ_RENDER_WORKERS', default=2, cast=int)
+    # Scatter plots above this many rows are drawn as a VIZ_DENSITY_BINS x VIZ_DENSITY_BINS density
+    VIZ_AGGREGATE_ROW_THRESHOLD : int = config('VIZ_AGGREGATE_ROW_THRESHOLD', default=100000, cast=int)
+    VIZ_DENSITY_BINS            : int = config('VIZ_DENSITY_BINS', default=400, cast=int)
+    # Size limit of the VizTools plots cached in output/plots; least recently used ones are removed beyond it
+    VIZ_PLOT_CACHE_MB           : int = config('VIZ_PLOT_CACHE_MB', default=512, cast=int)
+
+    # MLTools training jobs (forked processes behind an admission queue)
+    ML_MAX_CONCURRENT_JOBS      : int = config('ML_MAX_CONCURRENT_JOBS', default=2, cast=int)
+    ML_MAX_JOBS_PER_THREAD      : int = config('ML_MAX_JOBS_PER_THREAD', default=1, cast=int)
+    ML_CORES_PER_JOB            : int = config('ML_CORES_PER_JOB', default=2, cast=int)
+    ML_TRAINING_TIMEOUT         : int = config('ML_TRAINING_TIMEOUT', default=600, cast=int)
+    ML_QUEUE_TIMEOUT            : int = config('ML_QUEUE_TIMEOUT', default=120, cast=int)
+    # Deserialized models kept in memory for make_prediction
+    ML_MODEL_CACHE_SIZE         : int = config('ML_MODEL_CACHE_SIZE', default=16, cast=int)
+
+    # Sketch-based column statistics, used above this many rows unless a tool call chooses
+    APPROX_STATS_ROW_THRESHOLD  : int = config('APPROX_STATS_ROW_THRESHOLD', default=5000000, cast=int)
+    APPROX_HLL_PRECISION        : int = config('APPROX_HLL_PRECISION', default=14, cast=int)
+    APPROX_QUANTILE_K           : int = config('APPROX_QUANTILE_K', default=200, cast=int)
+    APPROX_TOP_K                : int = config('APPROX_TOP_K', default=64, cast=int)
+
+    # Code execution sandbox (pre-warmed worker processes)
+    SANDBOX_POOL_SIZE           : int = config('SANDBOX_POOL_SIZE', default=2, cast=int)
+    SANDBOX_MAX_TASKS_PER_WORKER: int = config('SANDBOX_MAX_TASKS_PER_WORKER', default=50, cast=int)
+    SANDBOX_WARMUP_TIMEOUT      : int = config('SANDBOX_WARMUP_TIMEOUT', default=120, cast=int)
+    SANDBOX_PRELOAD_MODULES     : str = config('SANDBOX_PRELOAD_MODULES', default='numpy,pandas,scipy.stats,seaborn', cast=str)
+    SANDBOX_MAX_SESSIONS        : int = config('SANDBOX_MAX_SESSIONS', default=8, cast=int)
+    SANDBOX_SESSION_MEMORY_MB   : int = config('SANDBOX_SESSION_MEMORY_MB', default=4096, cast=int)
+    SANDBOX_INLINE_OUTPUT_CHARS : int = config('SANDBOX_INLINE_OUTPUT_CHARS', default=8000, cast=int)
+
+    # Sandbox admission control
+    SANDBOX_MAX_CONCURRENT      : int = config('SANDBOX_MAX_CONCURRENT', default=4, cast=int)
+    SANDBOX_MAX_PER_THREAD      : int = config('SANDBOX_MAX_PER_THREAD', default=1, cast=int)
+    SANDBOX_QUEUE_TIMEOUT       : int = config('SANDBOX_QUEUE_TIMEOUT', default=120, cast=int)
+
+    # Sandbox plot export (format: webp or png)
+    SANDBOX_PLOT_FORMAT         : str = config('SANDBOX_PLOT_FORMAT', default='webp', cast=str)
+    SANDBOX_PLOT_THUMBNAIL_SIZE : int = config('SANDBOX_PLOT_THUMBNAIL_SIZE', default=320, cast=int)
+    SANDBOX_PLOT_EXPORT_TIMEOUT : int = config('SANDBOX_PLOT_EXPORT_TIMEOUT', default=60, cast=int)
+    SANDBOX_MAX_PLOTS           : int = config('SANDBOX_MAX_PLOTS', default=10, cast=int)
+
+    # Execution result cache for repeated read-only code
+    SANDBOX_RESULT_CACHE_SIZE   : int = config('SANDBOX_RESULT_CACHE_SIZE', default=128, cast=int)
+    SANDBOX_RESULT_CACHE_TTL    : int = config('SANDBOX_RESULT_CACHE_TTL', default=1800, cast=int)
+
+    # Per-execution sandbox rlimits (0 disables a limit)
+    SANDBOX_MEMORY_LIMIT_MB     : int = config('SANDBOX_MEMORY_LIMIT_MB', default=2048, cast=int)
+    SANDBOX_CPU_TIME_LIMIT      : int = config('SANDBOX_CPU_TIME_LIMIT', default=60, cast=int)
+    SANDBOX_MAX_OPEN_FILES      : int = config('SANDBOX_MAX_OPEN_FILES', default=256, cast=int)
+
     class Config:
         env_file    = ".env"
         env_file_encoding = "utf-8"
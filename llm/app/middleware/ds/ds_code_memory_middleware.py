@@ -1,15 +1,15 @@
 from typing import Dict, Any
 import time
-import re
 import hashlib
 import json
 import os
-from pathlib import Path
 
 from langchain.agents.middleware import AgentMiddleware
 from langchain_core.messages import ToolMessage
 
 from app.states.ds_agent_state import DSAgentState
+from app.tools.ds.dataset_store import DatasetStore
+from app.utils.code_analysis import analyze_code
 from app import logger
 
 
@@ -28,7 +28,7 @@ class DSCodeMemoryMiddleware(AgentMiddleware):
         try:
             tool_name = tool_call.get("name")
 
-            if tool_name in ["correlation_analysis", "hypothesis_test", "distribution_analysis"]:
+            if tool_name in ["correlation_analysis", "hypothesis_test", "batch_hypothesis_test", "distribution_analysis"]:
                 return self._check_cached_result(state, tool_call)
 
         except Exception as e:
@@ -52,7 +52,7 @@ class DSCodeMemoryMiddleware(AgentMiddleware):
             elif tool_name in ["read_csv", "read_excel"]:
                 return self._track_dataset_load(state, tool_call, result)
 
-            elif tool_name in ["correlation_analysis", "hypothesis_test", "distribution_analysis"]:
+            elif tool_name in ["correlation_analysis", "hypothesis_test", "batch_hypothesis_test", "distribution_analysis"]:
                 return self._cache_analysis_result(state, tool_call, result)
 
         except Exception as e:
@@ -91,9 +91,14 @@ class DSCodeMemoryMiddleware(AgentMiddleware):
             if len(code_history) > self.max_history_size:
                 code_history = code_history[-self.max_history_size:]
 
-            active_vars = state.get("active_variables", [])
-            new_vars    = history_entry["variables_mentioned"]
-            active_vars = list(set(active_vars + new_vars))
+            session_vars = result.get("data", {}).get("session_variables")
+
+            if session_vars is not None:
+                active_vars = session_vars
+            else:
+                active_vars = state.get("active_variables", [])
+                new_vars    = history_entry["variables_mentioned"]
+                active_vars = list(set(active_vars + new_vars))
 
             logger.info(f"Tracked code execution. History size: {len(code_history)}, Active vars: {active_vars}")
 
@@ -130,12 +135,13 @@ class DSCodeMemoryMiddleware(AgentMiddleware):
         existing_info   = loaded_datasets.get(file_path, {})
         existing_hash   = existing_info.get("file_hash", "")
 
+        computed_results = None
+
         if existing_hash and existing_hash != file_hash:
             logger.warning(f"Dataset changed: {file_path} (invalidating cache)")
-            computed_results = state.get("computed_results", {})
             computed_results = {
-                k: v for k, v in computed_results.items()
-                if file_path not in json.dumps(k)
+                k: v for k, v in state.get("computed_results", {}).items()
+                if v.get("file_path") != file_path
             }
 
         dataset_info = {
@@ -144,24 +150,29 @@ class DSCodeMemoryMiddleware(AgentMiddleware):
             , "dtypes"  : data.get("dtypes", {})
             , "loaded_at": time.time()
             , "file_hash": file_hash
+            , "arrow_path": data.get("arrow_path")
         }
 
         loaded_datasets[file_path] = dataset_info
 
         logger.info(f"Tracked dataset load: {file_path} with shape {dataset_info['shape']}")
 
-        return {
+        update = {
             "loaded_datasets"   : loaded_datasets
             , "current_dataframe": file_path
         }
 
-    def _extract_variable_names(self, code: str) -> list[str]:
-        assignments = re.findall(r'(\w+)\s*=', code)
+        # Results for the old contents are recomputed on demand; the profile
+        # index extends appended CSVs from their new rows only
+        if computed_results is not None:
+            update["computed_results"] = computed_results
 
-        common_vars = ['df', 'data', 'X', 'y', 'model', 'results', 'fig', 'ax']
-        found_vars  = [v for v in assignments if v in common_vars or v.startswith('df_')]
+        return update
 
-        return found_vars[:10]
+    def _extract_variable_names(self, code: str) -> list[str]:
+        assigned = analyze_code(code).assigned_names
+
+        return [name for name in assigned if not name.startswith('_')][:10]
 
     def _generate_cache_key(self, tool_call: Dict) -> str:
         tool_name   = tool_call.get("name", "")
@@ -185,6 +196,12 @@ class DSCodeMemoryMiddleware(AgentMiddleware):
 
         if cache_key in computed_results:
             cached = computed_results[cache_key]
+
+            file_path = cached.get("file_path")
+            if file_path and cached.get("file_hash") != self._get_file_hash(file_path):
+                logger.info(f"Stale cached result for {tool_call.get('name')}: {file_path} changed")
+                return None
+
             logger.info(f"Cache hit for {tool_call.get('name')}")
 
             return {
@@ -209,10 +226,13 @@ class DSCodeMemoryMiddleware(AgentMiddleware):
 
         cache_key           = self._generate_cache_key(tool_call)
         computed_results    = state.get("computed_results", {})
+        file_path           = tool_call.get("args", {}).get("file_path", "")
 
         computed_results[cache_key] = {
             "result"    : result
             , "timestamp": time.time()
+            , "file_path": file_path
+            , "file_hash": self._get_file_hash(file_path) if file_path else ""
         }
 
         logger.info(f"Cached result for {tool_call.get('name')}")
@@ -220,16 +240,4 @@ class DSCodeMemoryMiddleware(AgentMiddleware):
         return {"computed_results": computed_results}
 
     def _get_file_hash(self, file_path: str) -> str:
-        try:
-            path = Path(file_path)
-            if not path.exists():
-                return ""
-
-            stat_info   = path.stat()
-            hash_data   = f"{stat_info.st_size}_{stat_info.st_mtime}"
-
-            return hashlib.md5(hash_data.encode()).hexdigest()
-
-        except Exception as e:
-            logger.error(f"Error getting file hash for {file_path}: {str(e)}")
-            return ""
+        return DatasetStore.fingerprint(file_path)
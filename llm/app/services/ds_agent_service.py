@@ -59,10 +59,12 @@ class DSAgentService:
         self.tools = [
             DataTools.read_csv
             , DataTools.read_excel
+            , DataTools.list_excel_sheets
             , DataTools.get_column_info
 
             , StatsTools.correlation_analysis
             , StatsTools.hypothesis_test
+            , StatsTools.batch_hypothesis_test
             , StatsTools.distribution_analysis
 
             # , VizTools.create_histogram
@@ -73,6 +75,7 @@ class DSAgentService:
             # , MLTools.train_linear_regression
             # , MLTools.train_random_forest
             # , MLTools.make_prediction
+            # , MLTools.list_models
 
             , DSRAGTools.process_pdf_document
             , DSRAGTools.search_document_content
@@ -261,9 +264,18 @@ class DSAgentService:
             async for stream_mode, chunk in self.agent.astream(
                 state
                 , config        = config
-                , stream_mode   = ["messages", "updates"]
+                , stream_mode   = ["messages", "updates", "custom"]
             ):
-                if stream_mode == "messages":
+                if stream_mode == "custom":
+                    if isinstance(chunk, dict) and "type" in chunk:
+                        yield chunk
+                    else:
+                        yield {
+                            "type"      : "tool_progress"
+                            , "content" : chunk if isinstance(chunk, str) else str(chunk)
+                        }
+
+                elif stream_mode == "messages":
                     token_data, metadata = chunk
                     node = metadata.get("langgraph_node")
 
@@ -0,0 +1,199 @@
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import stats as sp_stats
+from statsmodels.stats.multitest import multipletests
+
+
+TEST_TYPES = ("t-test", "two-sample", "anova", "chi-square")
+CORRECTIONS = ("fdr_bh", "holm", "bonferroni", "none")
+TABLE_COLUMNS = ["column", "statistic", "p_value", "p_adjusted", "significant", "effect_size", "n"]
+
+# Effect size reported per test
+EFFECT_SIZES = {
+    "t-test"        : "cohen_d"
+    , "two-sample"  : "cohen_d"
+    , "anova"       : "eta_squared"
+    , "chi-square"  : "cramers_v"
+}
+
+
+def one_sample_t(X: pd.DataFrame, value: float) -> pd.DataFrame:
+    """One-sample t-test of every column's mean against value"""
+    n, mean, std = X.count(), X.mean(), X.std()
+    t_stat = (mean - value) / (std / np.sqrt(n))
+
+    return pd.DataFrame({
+        "statistic"     : t_stat
+        , "p_value"     : 2 * sp_stats.t.sf(np.abs(t_stat), n - 1)
+        , "effect_size" : (mean - value) / std
+        , "n"           : n
+    })
+
+
+def welch_t(X: pd.DataFrame, groups: pd.Series) -> pd.DataFrame:
+    """Welch's two-sample t-test of every column between the two groups"""
+    grouped                     = X.groupby(groups)
+    counts, means, variances    = grouped.count(), grouped.mean(), grouped.var()
+
+    (na, nb), (ma, mb), (va, vb) = counts.values, means.values, variances.values
+    se_a, se_b  = va / na, vb / nb
+    t_stat      = (ma - mb) / np.sqrt(se_a + se_b)
+    dof         = (se_a + se_b) ** 2 / (se_a ** 2 / (na - 1) + se_b ** 2 / (nb - 1))
+    pooled_std  = np.sqrt(((na - 1) * va + (nb - 1) * vb) / (na + nb - 2))
+
+    return pd.DataFrame({
+        "statistic"     : t_stat
+        , "p_value"     : 2 * sp_stats.t.sf(np.abs(t_stat), dof)
+        , "effect_size" : (ma - mb) / pooled_std
+        , "n"           : na + nb
+    }, index=X.columns)
+
+
+def one_way_anova(X: pd.DataFrame, groups: pd.Series) -> pd.DataFrame:
+    """One-way ANOVA of every column across groups, from per-group counts, means and variances"""
+    grouped                     = X.groupby(groups)
+    counts, means, variances    = grouped.count(), grouped.mean(), grouped.var().fillna(0)
+
+    total           = counts.sum()
+    grand_mean      = (counts * means).sum() / total
+    between         = (counts * (means - grand_mean) ** 2).sum()
+    within          = ((counts - 1) * variances).sum()
+    k               = (counts > 0).sum()
+    f_stat          = (between / (k - 1)) / (within / (total - k))
+
+    return pd.DataFrame({
+        "statistic"     : f_stat
+        , "p_value"     : sp_stats.f.sf(f_stat, k - 1, total - k)
+        , "effect_size" : between / (between + within)
+        , "n"           : total
+    })
+
+
+def chi_square(df: pd.DataFrame, columns: List[str], group_column: str) -> pd.DataFrame:
+    """Chi-square test of independence between each column and the group column"""
+    rows = {}
+
+    for column in columns:
+        table = pd.crosstab(df[column], df[group_column])
+
+        if min(table.shape) < 2:
+            rows[column] = (np.nan, np.nan, np.nan, int(table.values.sum()))
+            continue
+
+        chi2, p_value, _, _ = sp_stats.chi2_contingency(table)
+        n                   = int(table.values.sum())
+
+        rows[column] = (chi2, p_value, np.sqrt(chi2 / (n * (min(table.shape) - 1))), n)
+
+    return pd.DataFrame.from_dict(
+        rows, orient="index", columns=["statistic", "p_value", "effect_size", "n"]
+    )
+
+
+def adjust_p_values(p_values: np.ndarray, method: str, alpha: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Multiple-comparison correction; untestable columns (NaN p-values) stay NaN and not significant"""
+    p_values    = np.asarray(p_values, dtype=float)
+    adjusted    = np.full(len(p_values), np.nan)
+    significant = np.zeros(len(p_values), dtype=bool)
+    valid       = ~np.isnan(p_values)
+
+    if valid.any():
+        if method == "none":
+            adjusted[valid] = p_values[valid]
+        else:
+            _, adjusted[valid], _, _ = multipletests(p_values[valid], alpha=alpha, method=method)
+
+        significant[valid] = adjusted[valid] < alpha
+
+    return adjusted, significant
+
+
+def _group_labels(df: pd.DataFrame, group_column: Optional[str], test_type: str) -> pd.Series:
+    if not group_column:
+        raise ValueError(f"{test_type} needs group_column")
+
+    groups  = df[group_column]
+    levels  = groups.dropna().unique()
+
+    if test_type == "two-sample" and len(levels) != 2:
+        raise ValueError(f"two-sample needs exactly 2 groups in '{group_column}', found {len(levels)}")
+
+    if test_type == "anova" and len(levels) < 2:
+        raise ValueError(f"anova needs at least 2 groups in '{group_column}'")
+
+    return groups
+
+
+def run_batch(
+    df              : pd.DataFrame
+    , test_type     : str
+    , columns       : Optional[List[str]] = None
+    , group_column  : Optional[str] = None
+    , value         : Optional[float] = None
+    , correction    : str = "fdr_bh"
+    , alpha         : float = 0.05
+) -> Dict[str, Any]:
+    """
+    Run one test over many columns of one frame and correct for multiple
+    comparisons. Numeric tests work on whole-frame column reductions and
+    per-group aggregates, so the cost is one pass over the data regardless
+    of the number of columns.
+    """
+    if test_type not in TEST_TYPES:
+        raise ValueError(f"Unknown test_type '{test_type}'. Available: {', '.join(TEST_TYPES)}")
+
+    if correction not in CORRECTIONS:
+        raise ValueError(f"Unknown correction '{correction}'. Available: {', '.join(CORRECTIONS)}")
+
+    candidates = [c for c in (columns or df.columns) if c != group_column and c in df.columns]
+
+    if test_type == "chi-square":
+        tested  = candidates if columns else [
+            c for c in candidates if not pd.api.types.is_numeric_dtype(df[c])
+        ]
+        _group_labels(df, group_column, test_type)
+        results = chi_square(df, tested, group_column)
+    else:
+        tested  = [c for c in candidates if pd.api.types.is_numeric_dtype(df[c])]
+        X       = df[tested]
+
+        if test_type == "t-test":
+            if value is None:
+                raise ValueError("t-test needs value")
+            results = one_sample_t(X, value)
+        elif test_type == "two-sample":
+            results = welch_t(X, _group_labels(df, group_column, test_type))
+        else:
+            results = one_way_anova(X, _group_labels(df, group_column, test_type))
+
+    results["p_adjusted"], results["significant"] = adjust_p_values(
+        results["p_value"].to_numpy(), correction, alpha
+    )
+    results = results.sort_values("p_value", na_position="last")
+
+    rows = [
+        [
+            str(column)
+            , round(float(row.statistic), 4)
+            , float(f"{row.p_value:.3g}")
+            , float(f"{row.p_adjusted:.3g}")
+            , bool(row.significant)
+            , round(float(row.effect_size), 4)
+            , int(row.n)
+        ]
+        for column, row in results.iterrows()
+    ]
+
+    return {
+        "test"                  : test_type
+        , "group_column"        : group_column
+        , "correction"          : correction
+        , "alpha"               : alpha
+        , "effect_size"         : EFFECT_SIZES[test_type]
+        , "tested"              : len(rows)
+        , "significant_count"   : int(results["significant"].sum())
+        , "skipped"             : [c for c in (columns or []) if c not in set(tested)]
+        , "table"               : {"columns": TABLE_COLUMNS, "rows": rows}
+    }
@@ -1,109 +1,717 @@
 import multiprocessing as mp
-from multiprocessing import Queue
+from multiprocessing.connection import Connection
+from collections import OrderedDict
+import os
+import asyncio
+import sys
+import signal
+import resource
 import time
-from typing import Dict, Any
+import types
+import uuid
+import marshal
 import atexit
+import threading
+import traceback
+from typing import Dict, Any, List, Optional, Tuple, Callable
 
 from app import logger
+from app.core.config import settings
+from app.tools.ds import sandbox_namespace
+from app.tools.ds.plot_export import export_figures
+from app.tools.ds.sandbox_output import OutputChannel, RichOutputCollector, REPR_LIMIT
+from app.tools.ds.sandbox_admission import AdmissionController, SandboxBusyError, QueueCallback
+from app.utils.code_analysis import CodeAnalysis, analyze_code
 
+try:
+    mp.set_start_method('fork', force=False)
+except RuntimeError:
+    pass
 
-class CodeExecutionPool:
+OutputCallback = Callable[[str, str], None]
 
-    _instance = None
-    _pool = None
-    _pool_size = 2
+# Evicted sessions remembered so their next call reports a reset; threads
+# that never come back are forgotten oldest first beyond this many
+MAX_EVICTED_SESSIONS = 1024
+
+
+async def _wait_readable(conn: Connection, timeout: float) -> bool:
+    if conn.poll(0):
+        return True
+
+    loop    = asyncio.get_running_loop()
+    ready   = loop.create_future()
+    fd      = conn.fileno()
+
+    loop.add_reader(fd, lambda: ready.done() or ready.set_result(True))
+
+    try:
+        await asyncio.wait_for(ready, timeout=max(timeout, 0))
+        return True
+    except asyncio.TimeoutError:
+        return False
+    finally:
+        loop.remove_reader(fd)
+
+
+def _set_soft_limit(limit: int, value: int):
+    soft, hard = resource.getrlimit(limit)
+
+    if hard != resource.RLIM_INFINITY:
+        value = min(value, hard)
+
+    resource.setrlimit(limit, (value, hard))
+
+
+def _apply_task_limits():
+    """
+    Per-execution rlimits, applied in the worker before every task.
+
+    Workers are reused, so the CPU time and address space allowances are
+    granted on top of what the process already uses. Only soft limits are
+    changed so the next task can be given a fresh allowance.
+    """
+    try:
+        if settings.SANDBOX_CPU_TIME_LIMIT:
+            usage   = resource.getrusage(resource.RUSAGE_SELF)
+            used    = int(usage.ru_utime + usage.ru_stime) + 1
+            _set_soft_limit(resource.RLIMIT_CPU, used + settings.SANDBOX_CPU_TIME_LIMIT)
+
+        if settings.SANDBOX_MEMORY_LIMIT_MB:
+            with open("/proc/self/statm") as f:
+                address_space = int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+            _set_soft_limit(resource.RLIMIT_AS, address_space + settings.SANDBOX_MEMORY_LIMIT_MB * 1024 * 1024)
+
+        if settings.SANDBOX_MAX_OPEN_FILES:
+            _set_soft_limit(resource.RLIMIT_NOFILE, settings.SANDBOX_MAX_OPEN_FILES)
+
+    except (ValueError, OSError) as e:
+        logger.warning(f"Could not set sandbox resource limits: {e}")
+
+
+def _export_plots(namespace: Dict[str, Any]) -> Dict[str, Any]:
+    """Encode the figures left open by a task, after its result was already sent"""
+    _apply_task_limits()
+
+    try:
+        return {
+            "plots": export_figures(
+                dpi         = namespace.get('_plot_dpi', 150)
+                , figsize   = namespace.get('_plot_figsize', None)
+            )
+        }
+    except Exception as e:
+        return {"plots": [], "plot_error": str(e)[:REPR_LIMIT]}
 
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
+
+def _worker_main(conn: Connection):
+    sandbox_namespace.preload_modules()
+
+    session_namespace   = None
+
+    conn.send({"ready": True})
+
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError, KeyboardInterrupt):
+            break
+
+        if task is None:
+            break
+
+        if task.get("persistent"):
+            if session_namespace is None:
+                session_namespace = {}
+            namespace = session_namespace
+        else:
+            namespace = {}
+
+        _apply_task_limits()
+        result = CodeExecutionPool._run_task(task, namespace, conn)
+
+        if task.get("persistent"):
+            result['variables'] = CodeExecutionPool._user_variables(namespace)
+
+        try:
+            conn.send(result)
+
+            if result.get('plot_count') and task.get("export_plots"):
+                conn.send(_export_plots(namespace))
+        except (BrokenPipeError, OSError):
+            break
+        finally:
+            import matplotlib.pyplot as plt
+            plt.close('all')
+
+    conn.close()
+
+
+class SandboxWorker:
+    """A persistent sandbox process holding a pre-imported library namespace"""
 
     def __init__(self):
-        if self._pool is None:
-            self._initialize_pool()
+        self.conn, child_conn = mp.Pipe()
+
+        self.process    = mp.Process(target=_worker_main, args=(child_conn,))
+        self.process.start()
+        child_conn.close()
+
+        self.ready      = False
+        self.task_count = 0
+        self.created_at = time.time()
+        self.session_id : Optional[str] = None
+        self.state_version = 0
+        self.lock       = asyncio.Lock()
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.process.pid
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
 
-    def _initialize_pool(self):
+    def rss_bytes(self) -> int:
         try:
-            self._pool = mp.Pool(
-                processes       = self._pool_size
-                , initializer   = self._worker_init
-                , maxtasksperchild= 50
-            )
+            with open(f"/proc/{self.pid}/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            return 0
+
+    async def wait_ready(self, timeout: float) -> bool:
+        if self.ready:
+            return True
+
+        try:
+            if await _wait_readable(self.conn, timeout):
+                message     = self.conn.recv()
+                self.ready  = bool(message.get("ready"))
+        except (EOFError, OSError):
+            self.ready = False
+
+        return self.ready
 
-            atexit.register(self._cleanup_pool)
-            logger.info(f"Initialized code execution pool with {self._pool_size} workers")
+    def kill(self):
+        try:
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join(timeout=1)
+
+            if self.process.is_alive():
+                self.process.kill()
+                self.process.join(timeout=1)
 
         except Exception as e:
-            logger.error(f"Failed to initialize pool: {str(e)}")
-            self._pool = None
+            logger.error(f"Error killing sandbox worker {self.pid}: {str(e)}")
+
+        finally:
+            self.conn.close()
+
+    def shutdown(self):
+        try:
+            self.conn.send(None)
+            self.process.join(timeout=2)
+        except (BrokenPipeError, OSError):
+            pass
+
+        self.kill()
+
+
+class CodeExecutionPool:
+
+    _instance       = None
+    _instance_lock  = threading.Lock()
+
+    def __init__(
+        self
+        , pool_size             : int = None
+        , max_tasks_per_worker  : int = None
+        , warmup_timeout        : int = None
+    ):
+        self.pool_size              = pool_size or settings.SANDBOX_POOL_SIZE
+        self.max_tasks_per_worker   = max_tasks_per_worker or settings.SANDBOX_MAX_TASKS_PER_WORKER
+        self.warmup_timeout         = warmup_timeout or settings.SANDBOX_WARMUP_TIMEOUT
+        self.max_sessions           = settings.SANDBOX_MAX_SESSIONS
+        self.session_memory_bytes   = settings.SANDBOX_SESSION_MEMORY_MB * 1024 * 1024
+
+        self._idle      : List[SandboxWorker] = []
+        self._sessions  : "OrderedDict[str, SandboxWorker]" = OrderedDict()
+        self._evicted   : "OrderedDict[str, None]" = OrderedDict()
+        self._lock      = threading.Lock()
+        self._closed    = False
+
+        self.admission  = AdmissionController(
+            max_concurrent  = settings.SANDBOX_MAX_CONCURRENT
+            , max_per_thread= settings.SANDBOX_MAX_PER_THREAD
+        )
+
+        for _ in range(self.pool_size):
+            self._idle.append(SandboxWorker())
+
+        atexit.register(self.shutdown)
+        logger.info(f"Initialized code execution pool with {self.pool_size} warm workers")
+
+    @classmethod
+    def get_instance(cls) -> "CodeExecutionPool":
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+        return cls._instance
+
+    @staticmethod
+    def _user_variables(namespace: Dict[str, Any]) -> List[str]:
+        return sorted(
+            name for name, value in namespace.items()
+            if not name.startswith('_')
+            and name not in ("load_dataset", "display")
+            and not isinstance(value, types.ModuleType)
+            and not sandbox_namespace.is_sandbox_binding(name, value)
+        )
 
     @staticmethod
-    def _worker_init():
-        import sys
-        import io
+    def _run_task(
+        task        : Dict[str, Any]
+        , local_vars: Dict[str, Any]
+        , conn      : Optional[Connection] = None
+    ) -> Dict[str, Any]:
+        import matplotlib.pyplot as plt_exec
+
+        output_prefix   = task.get('output_prefix')
+        send_lock       = threading.Lock()
+        stdout_capture  = OutputChannel("stdout", f"{output_prefix}_stdout.txt" if output_prefix else None, conn, send_lock)
+        stderr_capture  = OutputChannel("stderr", f"{output_prefix}_stderr.txt" if output_prefix else None, conn, send_lock)
+        rich_outputs    = RichOutputCollector()
 
         try:
-            import matplotlib
-            matplotlib.use('Agg', force=True)
-            import matplotlib.pyplot as plt
-            plt.ioff()
+            names = task['names']
+
+            sandbox_namespace.bind_names(local_vars, names)
+            sandbox_namespace.bind_datasets(
+                local_vars
+                , names
+                , task.get('datasets') or {}
+                , task.get('current_dataset')
+            )
 
-            import numpy as np
-            import pandas as pd
-            import scipy.stats
-            import seaborn as sns
+            if 'display' in names:
+                local_vars['display'] = rich_outputs.display
 
-            logger.info(f"Worker {mp.current_process().pid} initialized with pre-loaded libraries")
+            body            = marshal.loads(task['compiled'][0])
+            last_expression = marshal.loads(task['compiled'][1]) if task['compiled'][1] else None
+
+            sys.stdout = stdout_capture
+            sys.stderr = stderr_capture
+
+            exec(body, local_vars, local_vars)
+
+            if last_expression is not None:
+                rich_outputs.add(eval(last_expression, local_vars, local_vars))
+
+            sys.stdout = sys.__stdout__
+            sys.stderr = sys.__stderr__
+
+            stdout_result = stdout_capture.finish()
+            stderr_result = stderr_capture.finish()
+
+            plot_count  = len(plt_exec.get_fignums())
+            html_path   = None
+
+            if local_vars.get('_html_output') and task.get('html_path'):
+                with open(task['html_path'], 'w', encoding='utf-8') as f:
+                    f.write(local_vars['_html_output'])
+                html_path = task['html_path']
+
+            return {
+                'success'       : True
+                , 'stdout'      : stdout_result['text']
+                , 'stdout_file' : stdout_result['spill_path']
+                , 'stderr'      : stderr_result['text']
+                , 'stderr_file' : stderr_result['spill_path']
+                , 'has_plots'   : plot_count > 0
+                , 'plot_count'  : plot_count
+                , 'html_path'   : html_path
+                , 'rich_outputs': rich_outputs.outputs
+            }
 
         except Exception as e:
-            logger.error(f"Worker initialization failed: {str(e)}")
+            error_msg = traceback.format_exc()
+            sys.stdout = sys.__stdout__
+            sys.stderr = sys.__stderr__
+
+            stdout_result = stdout_capture.finish()
+            stderr_capture.finish()
+
+            if isinstance(e, MemoryError):
+                e = MemoryError(f"Memory limit exceeded ({settings.SANDBOX_MEMORY_LIMIT_MB} MB per execution)")
 
-    def execute_with_pool(
+            return {
+                'success'       : False
+                , 'error'       : str(e)[:REPR_LIMIT]
+                , 'traceback'   : error_msg[-settings.SANDBOX_INLINE_OUTPUT_CHARS:]
+                , 'stdout'      : stdout_result['text']
+            }
+
+    def _take_idle(self) -> SandboxWorker:
+        while self._idle:
+            candidate = self._idle.pop(0)
+            if candidate.is_alive():
+                return candidate
+            candidate.kill()
+
+        logger.warning("No idle sandbox worker available, starting a cold one")
+        return SandboxWorker()
+
+    def _acquire(self) -> SandboxWorker:
+        with self._lock:
+            return self._take_idle()
+
+    def _acquire_session(self, session_id: str) -> Tuple[SandboxWorker, bool]:
+        """Return the worker pinned to a session, pinning a warm one if needed"""
+        evicted     = []
+        was_reset   = False
+
+        with self._lock:
+            worker = self._sessions.get(session_id)
+
+            if worker is not None and not worker.is_alive():
+                del self._sessions[session_id]
+                worker.kill()
+                worker      = None
+                was_reset   = True
+
+            if worker is None:
+                if session_id in self._evicted:
+                    del self._evicted[session_id]
+                    was_reset = True
+
+                worker              = self._take_idle()
+                worker.session_id   = session_id
+                self._sessions[session_id] = worker
+                self._replenish()
+
+                for sid in list(self._sessions.keys()):
+                    if len(self._sessions) <= self.max_sessions:
+                        break
+                    if sid != session_id and not self._sessions[sid].lock.locked():
+                        evicted.append(self._sessions.pop(sid))
+                        self._mark_evicted(sid)
+
+            self._sessions.move_to_end(session_id)
+
+        for stale in evicted:
+            logger.info(f"Evicting sandbox session {stale.session_id} (session limit {self.max_sessions})")
+            stale.shutdown()
+
+        return worker, was_reset
+
+    def _enforce_session_budget(self, current_session: str):
+        evicted = []
+
+        with self._lock:
+            usage = {sid: worker.rss_bytes() for sid, worker in self._sessions.items()}
+            total = sum(usage.values())
+
+            for sid in list(self._sessions.keys()):
+                if total <= self.session_memory_bytes:
+                    break
+                if sid == current_session or self._sessions[sid].lock.locked():
+                    continue
+
+                evicted.append(self._sessions.pop(sid))
+                self._mark_evicted(sid)
+                total -= usage[sid]
+
+        for stale in evicted:
+            logger.info(f"Evicting sandbox session {stale.session_id} (memory budget exceeded)")
+            stale.shutdown()
+
+    def _mark_evicted(self, session_id: str):
+        """Remember an evicted session; called with _lock held"""
+        self._evicted[session_id] = None
+        self._evicted.move_to_end(session_id)
+
+        while len(self._evicted) > MAX_EVICTED_SESSIONS:
+            self._evicted.popitem(last=False)
+
+    def _release(self, worker: SandboxWorker, preserves_state: bool = True):
+        """
+        Return a stateless worker to the pool. Stateless tasks get a fresh
+        namespace but share the worker's imported modules, so a task that may
+        have changed them (pd.read_csv = ..., np.random.seed, rcParams) is
+        never followed by another user's task on the same process.
+        """
+        worker.task_count += 1
+
+        with self._lock:
+            if self._closed:
+                worker.shutdown()
+                return
+
+            if not preserves_state:
+                logger.info(f"Recycling sandbox worker {worker.pid} after a state-changing task")
+                worker.shutdown()
+                self._replenish()
+                return
+
+            if worker.task_count >= self.max_tasks_per_worker:
+                logger.info(f"Recycling sandbox worker {worker.pid} after {worker.task_count} tasks")
+                worker.shutdown()
+                self._replenish()
+                return
+
+            if len(self._idle) >= self.pool_size:
+                worker.shutdown()
+                return
+
+            self._idle.append(worker)
+
+    def _discard(self, worker: SandboxWorker, reason: str):
+        logger.warning(f"Discarding sandbox worker {worker.pid}: {reason}")
+        worker.kill()
+
+        with self._lock:
+            if worker.session_id and self._sessions.get(worker.session_id) is worker:
+                del self._sessions[worker.session_id]
+                self._mark_evicted(worker.session_id)
+
+            if not self._closed:
+                self._replenish()
+
+    def _replenish(self):
+        while len(self._idle) < self.pool_size:
+            self._idle.append(SandboxWorker())
+
+    async def _receive_plots(self, worker: SandboxWorker) -> Tuple[List[Dict[str, Any]], bool]:
+        """Wait for the plot export stage, which has its own budget separate from the code timeout"""
+        export_timeout = settings.SANDBOX_PLOT_EXPORT_TIMEOUT
+
+        try:
+            if not await _wait_readable(worker.conn, export_timeout):
+                self._discard(worker, reason=f"plot export timed out after {export_timeout}s")
+                return [], False
+
+            export = worker.conn.recv()
+
+        except (EOFError, OSError):
+            self._discard(worker, reason="crashed during plot export")
+            return [], False
+
+        if export.get("plot_error"):
+            logger.warning(f"Plot export failed: {export['plot_error']}")
+
+        return export.get("plots", []), True
+
+    async def _run_on_worker(
+        self
+        , worker    : SandboxWorker
+        , task      : Dict[str, Any]
+        , timeout   : int
+        , on_output : Optional[OutputCallback] = None
+    ) -> Tuple[Dict[str, Any], bool]:
+        if not await worker.wait_ready(self.warmup_timeout):
+            self._discard(worker, reason="failed to initialize")
+            return {
+                'success'   : False
+                , 'error'   : "Sandbox worker failed to initialize"
+                , 'traceback': ""
+            }, False
+
+        deadline = time.monotonic() + timeout
+
+        try:
+            worker.conn.send(task)
+
+            while True:
+                if not await _wait_readable(worker.conn, deadline - time.monotonic()):
+                    self._discard(worker, reason=f"timed out after {timeout}s")
+                    return {'success': False, 'timeout': True}, False
+
+                message = worker.conn.recv()
+
+                if "stream" not in message:
+                    if message.get('plot_count') and task.get("export_plots"):
+                        message['plots'], healthy = await self._receive_plots(worker)
+                        return message, healthy
+
+                    return message, True
+
+                if on_output:
+                    try:
+                        on_output(message["stream"], message["text"])
+                    except Exception as e:
+                        logger.error(f"Error forwarding sandbox output: {str(e)}")
+
+        except asyncio.CancelledError:
+            self._discard(worker, reason="execution cancelled")
+            raise
+
+        except (EOFError, OSError) as e:
+            worker.process.join(timeout=1)
+            exit_code = worker.process.exitcode
+            self._discard(worker, reason=f"crashed (exit code {exit_code})")
+
+            if exit_code == -signal.SIGXCPU:
+                error = f"CPU time limit exceeded ({settings.SANDBOX_CPU_TIME_LIMIT}s per execution)"
+            elif exit_code == -signal.SIGKILL:
+                error = "Sandbox worker was killed, most likely because it ran out of memory"
+            else:
+                error = f"Sandbox worker exited unexpectedly (exit code {exit_code})"
+
+            return {
+                'success'   : False
+                , 'error'   : error
+                , 'traceback': str(e)
+            }, False
+
+    async def execute(
         self
-        , execute_func
         , code          : str
-        , result_queue  : Queue
-        , plot_path     : str
+        , export_plots  : bool = True
         , timeout       : int = 30
+        , session_id    : Optional[str] = None
+        , datasets      : Optional[Dict[str, str]] = None
+        , current_dataset: Optional[str] = None
+        , on_output     : Optional[OutputCallback] = None
+        , output_prefix : Optional[str] = None
+        , html_path     : Optional[str] = None
+        , on_queue      : Optional[QueueCallback] = None
+        , analysis      : Optional[CodeAnalysis] = None
     ) -> Dict[str, Any]:
-        if self._pool is None:
-            logger.warning("Pool not available, falling back to direct execution")
-            return None
+        """
+        Run code in a warm sandbox worker without blocking the event loop.
+
+        With a session_id the worker stays pinned to that session and keeps its
+        namespace between calls. stdout/stderr lines are passed to on_output as
+        they are produced. The worker is killed and replaced when the timeout
+        elapses, the call is cancelled or it dies mid-task, which also resets
+        its session.
+
+        Executions first pass the admission queue; on_queue receives the queue
+        position while waiting. The timeout only starts once admitted.
+
+        Workers receive the code objects compiled by CodeAnalysis and never
+        parse the source themselves. Open figures are exported after the
+        result is sent, under SANDBOX_PLOT_EXPORT_TIMEOUT instead of timeout.
+        """
+        analysis = analysis or analyze_code(code)
+
+        if analysis.compiled is None:
+            return {
+                'success'   : False
+                , 'error'   : analysis.error
+                , 'traceback': ""
+            }
+
+        admission_key = session_id or f"anonymous-{uuid.uuid4().hex}"
 
         try:
-            async_result = self._pool.apply_async(
-                execute_func
-                , args=(code, result_queue, plot_path)
-            )
+            async with self.admission.slot(admission_key, on_queue, settings.SANDBOX_QUEUE_TIMEOUT):
+                return await self._execute_admitted(
+                    analysis
+                    , export_plots
+                    , timeout
+                    , session_id
+                    , datasets
+                    , current_dataset
+                    , on_output
+                    , output_prefix
+                    , html_path
+                )
 
-            async_result.wait(timeout=timeout)
+        except SandboxBusyError as e:
+            logger.warning(f"Sandbox admission rejected: {str(e)}")
+            return {
+                'success'   : False
+                , 'busy'    : True
+                , 'error'   : f"Sandbox is busy, try again shortly ({str(e)})"
+                , 'traceback': ""
+            }
 
-            if async_result.ready():
-                return {"success": True}
-            else:
-                logger.warning("Pool execution timed out")
-                return {"success": False, "timeout": True}
+    async def _execute_admitted(
+        self
+        , analysis      : CodeAnalysis
+        , export_plots  : bool
+        , timeout       : int
+        , session_id    : Optional[str]
+        , datasets      : Optional[Dict[str, str]]
+        , current_dataset: Optional[str]
+        , on_output     : Optional[OutputCallback]
+        , output_prefix : Optional[str]
+        , html_path     : Optional[str]
+    ) -> Dict[str, Any]:
+        task = {
+            "compiled"          : analysis.compiled
+            , "names"           : analysis.loaded_names
+            , "export_plots"    : export_plots
+            , "persistent"      : session_id is not None
+            , "datasets"        : datasets or {}
+            , "current_dataset" : current_dataset
+            , "output_prefix"   : output_prefix
+            , "html_path"       : html_path
+        }
 
-        except mp.TimeoutError:
-            logger.error("Pool execution timeout")
-            return {"success": False, "timeout": True}
+        if session_id is None:
+            worker = self._acquire()
+            result, healthy = await self._run_on_worker(worker, task, timeout, on_output)
 
-        except Exception as e:
-            logger.error(f"Pool execution error: {str(e)}")
-            return {"success": False, "error": str(e)}
-
-    def _cleanup_pool(self):
-        if self._pool is not None:
-            try:
-                self._pool.close()
-                self._pool.join(timeout=5)
-                self._pool.terminate()
-                logger.info("Code execution pool cleaned up")
-            except Exception as e:
-                logger.error(f"Error cleaning up pool: {str(e)}")
+            if healthy:
+                self._release(worker, analysis.preserves_state)
 
-    @classmethod
-    def get_instance(cls):
-        if cls._instance is None:
-            cls._instance = cls()
-        return cls._instance
+            return result
+
+        worker, was_reset = self._acquire_session(session_id)
+
+        async with worker.lock:
+            result, healthy = await self._run_on_worker(worker, task, timeout, on_output)
+
+        if healthy:
+            worker.task_count += 1
+            if not analysis.preserves_state:
+                worker.state_version += 1
+            self._enforce_session_budget(session_id)
+        else:
+            was_reset = True
+
+        if was_reset:
+            result['session_reset'] = True
+
+        return result
+
+    def session_state(self, session_id: Optional[str]) -> Optional[str]:
+        """Token that changes whenever the session namespace may have changed"""
+        if session_id is None:
+            return "stateless"
+
+        with self._lock:
+            worker = self._sessions.get(session_id)
+
+        if worker is None or not worker.is_alive():
+            return None
+
+        return f"{session_id}:{worker.pid}:{worker.state_version}"
+
+    def restart_session(self, session_id: str) -> bool:
+        with self._lock:
+            worker = self._sessions.pop(session_id, None)
+            self._evicted.pop(session_id, None)
+
+        if worker is None:
+            return False
+
+        logger.info(f"Restarting sandbox session {session_id}")
+        worker.kill()
+        return True
+
+    def shutdown(self):
+        with self._lock:
+            if self._closed:
+                return
+
+            self._closed = True
+            workers, self._idle = self._idle + list(self._sessions.values()), []
+            self._sessions.clear()
+
+        for worker in workers:
+            worker.shutdown()
+
+        logger.info("Code execution pool cleaned up")
@@ -1,11 +1,6 @@
 from typing import Dict, Optional, Any
 from pathlib import Path
-import sys
-import io
 import traceback
-import ast
-import multiprocessing
-from multiprocessing import Process, Queue
 from pydantic import BaseModel, Field
 
 from langchain_core.tools import tool
@@ -14,14 +9,15 @@ from langchain.tools import ToolRuntime
 from app import logger
 from app.core.config import settings
 from app.states.ds_agent_state import DSAgentState
-
-try:
-    multiprocessing.set_start_method('fork', force=False)
-except RuntimeError:
-    pass
+from app.tools.ds.code_execution_pool import CodeExecutionPool
+from app.tools.ds.dataset_store import DatasetStore
+from app.tools.ds.execution_cache import ExecutionCache
+from app.utils.code_analysis import CodeAnalysis, analyze_code
+from app.tools.ds.sandbox_output import OUTPUT_DIR
 
 MAX_EXECUTION_TIME = 30
 MAX_EXECUTIONS_PER_CONVERSATION = 10
+LOG_OUTPUT_CHARS = 2000
 
 
 class CodeExecutionInput(BaseModel):
@@ -42,249 +38,66 @@ class CodeExecutionInput(BaseModel):
         description = "Whether to automatically save matplotlib plots and return their URL"
     )
 
+    restart_session: bool = Field(
+        default     = False,
+        description = "Restart the conversation's Python session, clearing all variables, before running the code"
+    )
 
-class CodeExecutionTools:
+    use_cache: bool = Field(
+        default     = True,
+        description = "Reuse the stored result when identical read-only code already ran on the same data. Set False to force re-execution"
+    )
 
-    @staticmethod
-    def _validate_code(code: str) -> tuple[bool, Optional[str]]:
-        dangerous_patterns = [
-            ('os.system', 'System command execution is not allowed'),
-            ('subprocess', 'Subprocess execution is not allowed'),
-            ('eval(', 'eval() is not allowed for security'),
-            ('exec(', 'exec() is not allowed for security'),
-            ('compile(', 'compile() is not allowed for security'),
-            ('__import__', 'Dynamic imports are restricted'),
-            ('open(', 'Direct file operations are restricted. Use pandas.read_csv/read_excel instead'),
-            ('os.remove', 'File deletion is not allowed'),
-            ('os.rmdir', 'Directory deletion is not allowed'),
-            ('shutil.rmtree', 'Directory deletion is not allowed'),
-            ('socket', 'Network operations are not allowed'),
-            ('urllib', 'Network operations are not allowed'),
-            ('requests', 'Network operations are not allowed'),
-            ('http', 'Network operations are not allowed'),
-            ('os.fork', 'Process forking is not allowed'),
-            ('os.kill', 'Process operations are not allowed'),
-            ('globals()', 'Access to globals is restricted'),
-            ('locals()', 'Access to locals is restricted'),
-            ('vars()', 'Access to vars is restricted'),
-            ('dir()', 'Access to dir is restricted'),
-        ]
-
-        code_lower = code.lower()
-
-        for pattern, error_msg in dangerous_patterns:
-            if pattern.lower() in code_lower:
-                return False, f"Security violation: {error_msg}"
 
-        try:
-            ast.parse(code)
-        except SyntaxError as e:
-            return False, f"Syntax error: {str(e)}"
-
-        return True, None
+class CodeExecutionTools:
 
     @staticmethod
-    def _execute_in_process(code: str, result_queue: Queue, plot_path: str):
-        try:
-            stdout_capture = io.StringIO()
-            stderr_capture = io.StringIO()
-
-            sys.stdout = stdout_capture
-            sys.stderr = stderr_capture
-
-            try:
-                import plotly.graph_objects as go
-                import plotly.express as px
-            except ImportError:
-                go = None
-                px = None
-
-            # Import matplotlib with Agg backend for headless plotting
-            import matplotlib
-            matplotlib.use('Agg', force=True)
-            import matplotlib.pyplot as plt_exec
-            import matplotlib.animation as mpl_animation
-            plt_exec.ioff()
-
-            import scipy.stats as scipy_stats
-
-            try:
-                import scipy.optimize as scipy_optimize
-                import scipy.integrate as scipy_integrate
-                import scipy.linalg as scipy_linalg
-                import scipy.signal as scipy_signal
-                import scipy.spatial as scipy_spatial
-                import scipy.special as scipy_special
-                import scipy.fft as scipy_fft
-            except ImportError:
-                scipy_optimize = None
-                scipy_integrate = None
-                scipy_linalg = None
-                scipy_signal = None
-                scipy_spatial = None
-                scipy_special = None
-                scipy_fft = None
-
-            try:
-                sklearn = __import__('sklearn')
-                from sklearn import metrics as sklearn_metrics
-                from sklearn import preprocessing as sklearn_preprocessing
-                from sklearn import model_selection as sklearn_model_selection
-            except (ImportError, Exception):
-                sklearn = None
-                sklearn_metrics = None
-                sklearn_preprocessing = None
-                sklearn_model_selection = None
-
-            try:
-                xgboost = __import__('xgboost')
-                xgb = xgboost
-            except (ImportError, Exception):
-                xgboost = None
-                xgb = None
-
-            try:
-                lightgbm = __import__('lightgbm')
-                lgb = lightgbm
-            except (ImportError, Exception):
-                lightgbm = None
-                lgb = None
-
-            try:
-                statsmodels = __import__('statsmodels')
-                import statsmodels.api as sm_api
-                from statsmodels import tsa as statsmodels_tsa
-            except (ImportError, Exception):
-                statsmodels = None
-                sm_api = None
-                statsmodels_tsa = None
-
-            try:
-                polars = __import__('polars')
-                pl = polars
-            except (ImportError, Exception):
-                polars = None
-                pl = None
-
-            try:
-                import networkx as nx
-            except ImportError:
-                nx = None
-
-            try:
-                import tensorflow as tf
-            except ImportError:
-                tf = None
-
-            try:
-                import torch
-            except ImportError:
-                torch = None
-
-            try:
-                import json
-            except ImportError:
-                json = None
-
-            local_vars = {
-                'np'            : __import__('numpy')
-                , 'pd'          : __import__('pandas')
-                , 'pl'          : pl
-                , 'polars'      : polars
-                , 'plt'         : plt_exec
-                , 'matplotlib'  : matplotlib
-                , 'animation'   : mpl_animation
-                , 'FuncAnimation': mpl_animation.FuncAnimation
-                , 'go'          : go
-                , 'px'          : px
-                , 'scipy'       : __import__('scipy')
-                , 'stats'       : scipy_stats
-                , 'optimize'    : scipy_optimize
-                , 'integrate'   : scipy_integrate
-                , 'linalg'      : scipy_linalg
-                , 'signal'      : scipy_signal
-                , 'spatial'     : scipy_spatial
-                , 'special'     : scipy_special
-                , 'fft'         : scipy_fft
-                , 'seaborn'     : __import__('seaborn')
-                , 'sns'         : __import__('seaborn')
-                , 'sympy'       : __import__('sympy')
-                , 'sklearn'     : sklearn
-                , 'metrics'     : sklearn_metrics
-                , 'preprocessing': sklearn_preprocessing
-                , 'model_selection': sklearn_model_selection
-                , 'xgboost'     : xgboost
-                , 'xgb'         : xgb
-                , 'lightgbm'    : lightgbm
-                , 'lgb'         : lgb
-                , 'statsmodels' : statsmodels
-                , 'sm'          : sm_api
-                , 'tsa'         : statsmodels_tsa
-                , 'nx'          : nx
-                , 'tf'          : tf
-                , 'torch'       : torch
-                , 'math'        : __import__('math')
-                , 'random'      : __import__('random')
-                , 'itertools'   : __import__('itertools')
-                , 'functools'   : __import__('functools')
-                , 'collections' : __import__('collections')
-                , 'datetime'    : __import__('datetime')
-                , 'time'        : __import__('time')
-                , 're'          : __import__('re')
-                , 'json'        : json
-            }
-
-            exec(code, local_vars, local_vars)
+    def _get_session_id(runtime: Optional[ToolRuntime]) -> Optional[str]:
+        if runtime is None:
+            return None
 
-            sys.stdout = sys.__stdout__
-            sys.stderr = sys.__stderr__
+        config = getattr(runtime, "config", None) or {}
+        thread_id = config.get("configurable", {}).get("thread_id")
 
-            stdout_text = stdout_capture.getvalue()
-            stderr_text = stderr_capture.getvalue()
+        return thread_id or runtime.state.get("thread_id")
 
-            has_plots = len(plt_exec.get_fignums()) > 0
-            html_output = None
-
-            if has_plots:
-                dpi = local_vars.get('_plot_dpi', 150)
-                figsize = local_vars.get('_plot_figsize', None)
+    @staticmethod
+    def _get_published_datasets(state: Dict[str, Any]) -> Dict[str, str]:
+        datasets = {}
 
-                if figsize:
-                    for fig_num in plt_exec.get_fignums():
-                        fig = plt_exec.figure(fig_num)
-                        fig.set_size_inches(figsize[0], figsize[1])
+        for file_path, info in state.get("loaded_datasets", {}).items():
+            # The copy recorded at load time is the sheet that was read; it is
+            # named by the file's fingerprint, so an edited file falls back
+            arrow_path  = info.get("arrow_path") if isinstance(info, dict) else None
+            fingerprint = DatasetStore.fingerprint(file_path)
 
-                plt_exec.savefig(plot_path, dpi=dpi, bbox_inches='tight')
-                plt_exec.close('all')
+            if not (
+                arrow_path and fingerprint
+                and Path(arrow_path).name.startswith(fingerprint)
+                and Path(arrow_path).exists()
+            ):
+                arrow_path = DatasetStore.lookup(file_path)
 
-            if '_html_output' in local_vars and local_vars['_html_output']:
-                html_output = local_vars['_html_output']
+            if arrow_path:
+                datasets[file_path] = arrow_path
 
-            result_queue.put({
-                'success': True,
-                'stdout': stdout_text,
-                'stderr': stderr_text,
-                'has_plots': has_plots,
-                'html_output': html_output
-            })
+        return datasets
 
-        except Exception as e:
-            error_msg = traceback.format_exc()
-            sys.stdout = sys.__stdout__
-            sys.stderr = sys.__stderr__
+    @staticmethod
+    def _validate_code(analysis: CodeAnalysis) -> tuple[bool, Optional[str]]:
+        if not analysis.is_valid:
+            return False, analysis.error
 
-            result_queue.put({
-                'success': False,
-                'error': str(e),
-                'traceback': error_msg
-            })
+        return True, None
 
     @staticmethod
     @tool("execute_python_code", args_schema=CodeExecutionInput)
-    def execute_python_code(
-        code        : str
-        , save_plot : bool = True
-        , runtime   : ToolRuntime[None, DSAgentState] = None
+    async def execute_python_code(
+        code                : str
+        , save_plot         : bool = True
+        , restart_session   : bool = False
+        , use_cache         : bool = True
+        , runtime           : ToolRuntime[None, DSAgentState] = None
     ) -> Dict[str, Any]:
         """
         Execute Python code with comprehensive data science libraries for math, statistics, ML, and visualization.
@@ -311,7 +124,9 @@ class CodeExecutionTools:
         - HTML output for interactive visualizations
 
         Output formats:
-        - Matplotlib plots: Automatically saved as PNG and returns URL
+        - stdout: Returned inline up to a size limit; longer output is saved to a file and stdout_file_url is returned
+        - Last expression / display(obj): DataFrames, Series and arrays are returned as structured rich_outputs summaries
+        - Matplotlib plots: Every open figure is saved (WebP by default) with a thumbnail; file_url is the first one, plots lists all
         - HTML output: Set _html_output variable to HTML string (for plotly, interactive tables, etc.)
         - Example: _html_output = fig.to_html() for plotly figures
 
@@ -320,7 +135,22 @@ class CodeExecutionTools:
         - Control resolution: Set _plot_dpi = value. Example: _plot_dpi = 300 for high-res
         - Default: Auto size with 150 DPI
 
-        Max execution: 30s, 10 calls per conversation.
+        Loaded datasets:
+        - df: the dataset most recently loaded with read_csv/read_excel, ready without re-reading the file
+        - load_dataset(file_path): any dataset loaded in this conversation
+
+        Session state:
+        - Variables, loaded DataFrames and trained models persist between calls in the same conversation
+        - Reuse existing variables (e.g. df) instead of reloading data
+        - Set restart_session=True to start from a clean namespace
+
+        Result cache:
+        - Re-running identical code (ignoring whitespace/comments) that defines no variables and uses no
+          randomness returns the stored result instantly while the data and session are unchanged
+        - Set use_cache=False to force a fresh run
+
+        Max execution: 30s, 10 calls per conversation. Each call also has a memory and CPU time
+        cap; sample or aggregate large data instead of materializing huge intermediate objects.
 
         Security: No system commands, file ops, network access, or dangerous functions.
         """
@@ -348,7 +178,9 @@ class CodeExecutionTools:
                     }
                 }
 
-            is_safe, error_msg = CodeExecutionTools._validate_code(code)
+            analysis = analyze_code(code)
+
+            is_safe, error_msg = CodeExecutionTools._validate_code(analysis)
             if not is_safe:
                 if runtime and runtime.stream_writer:
                     runtime.stream_writer(f"❌ Security check failed: {error_msg}")
@@ -371,22 +203,86 @@ class CodeExecutionTools:
 
             import time
             timestamp       = int(time.time() * 1000)
-            plot_filename   = f"code_execution_{timestamp}.png"
-            plot_path       = str(output_dir / plot_filename)
+            html_filename   = f"code_execution_{timestamp}.html"
+            html_path       = str(output_dir / html_filename)
+            output_prefix   = str(OUTPUT_DIR / f"code_execution_{timestamp}")
+
+            pool            = CodeExecutionPool.get_instance()
+            session_id      = CodeExecutionTools._get_session_id(runtime)
+
+            if restart_session and session_id:
+                pool.restart_session(session_id)
+
+                if runtime and runtime.stream_writer:
+                    runtime.stream_writer("♻️ Python session restarted")
+
+            def forward_output(stream: str, text: str):
+                if runtime and runtime.stream_writer:
+                    prefix = "📤" if stream == "stdout" else "⚠️"
+                    for line in text.splitlines():
+                        runtime.stream_writer(f"{prefix} {line}")
+
+            def report_queue_position(position: int):
+                if runtime and runtime.stream_writer:
+                    runtime.stream_writer({
+                        "type"          : "queue_position"
+                        , "position"    : position
+                        , "content"     : f"⏳ Waiting for a free sandbox slot (position {position} in queue)"
+                    })
+
+            datasets        = CodeExecutionTools._get_published_datasets(state)
+            current_dataset = state.get("current_dataframe")
+            cacheable       = use_cache and analysis.cacheable
+
+            if cacheable:
+                session_state = pool.session_state(session_id)
+                cache_key     = session_state and ExecutionCache.make_key(
+                    analysis, session_state, datasets, current_dataset, save_plot
+                )
+                cached_data   = ExecutionCache.get(cache_key) if cache_key else None
+
+                if cached_data is not None:
+                    if runtime and runtime.stream_writer:
+                        runtime.stream_writer("⚡ Identical code already ran on the same data, reusing its result")
+
+                    logger.info(f"Execution cache hit {cache_key[:12]}")
+
+                    cached_data["execution_count"]  = execution_count + 1
+                    cached_data["execution_time"]   = 0
+                    cached_data["cached"]           = True
+
+                    if runtime:
+                        runtime.state["code_execution_count"] = execution_count + 1
+
+                    return {
+                        "status"    : 200
+                        , "message" : "Code executed successfully (cached result)"
+                        , "data"    : cached_data
+                    }
 
             start_time      = time.time()
 
-            result_queue    = Queue()
-            process         = Process(target=CodeExecutionTools._execute_in_process, args=(code, result_queue, plot_path))
-            process.start()
-            process.join(timeout=MAX_EXECUTION_TIME)
+            result          = await pool.execute(
+                code
+                , export_plots      = save_plot
+                , timeout           = MAX_EXECUTION_TIME
+                , session_id        = session_id
+                , datasets          = datasets
+                , current_dataset   = current_dataset
+                , on_output         = forward_output
+                , output_prefix     = output_prefix
+                , html_path         = html_path
+                , on_queue          = report_queue_position
+                , analysis          = analysis
+            )
+
+            if result.get('session_reset') and not restart_session:
+                if runtime and runtime.stream_writer:
+                    runtime.stream_writer("⚠️ Python session was reset, previous variables are gone")
 
             execution_time  = time.time() - start_time
 
-            if process.is_alive():
-                process.terminate()
-                process.join()
-
+            if result.get('timeout'):
                 if runtime and runtime.stream_writer:
                     runtime.stream_writer(f"⏱️ Execution timed out after {MAX_EXECUTION_TIME} seconds")
 
@@ -399,9 +295,19 @@ class CodeExecutionTools:
                     }
                 }
 
-            if not result_queue.empty():
-                result = result_queue.get()
+            if result.get('busy'):
+                if runtime and runtime.stream_writer:
+                    runtime.stream_writer(f"🚦 {result['error']}")
+
+                return {
+                    "status"    : 503
+                    , "message" : "Code execution sandbox is busy"
+                    , "data"    : {
+                        "error"     : result['error']
+                    }
+                }
 
+            if result:
                 if not result['success']:
                     if runtime and runtime.stream_writer:
                         runtime.stream_writer(f"❌ Execution failed: {result['error']}")
@@ -419,7 +325,9 @@ class CodeExecutionTools:
                         , "data"    : {
                             "error"             : result['error']
                             , "traceback"       : result['traceback']
+                            , "stdout"          : result.get('stdout') or None
                             , "execution_count" : execution_count + 1
+                            , "session_reset"   : bool(result.get('session_reset'))
                         }
                     }
 
@@ -432,9 +340,9 @@ class CodeExecutionTools:
                 logger.info(f"Execution time: {execution_time:.2f} seconds")
                 logger.info(f"Executed code:\n{code}")
                 if result['stdout']:
-                    logger.info(f"Output:\n{result['stdout']}")
+                    logger.info(f"Output ({len(result['stdout'])} chars inline):\n{result['stdout'][:LOG_OUTPUT_CHARS]}")
                 if result['has_plots']:
-                    logger.info(f"Plot generated: {plot_filename}")
+                    logger.info(f"Plots generated: {result.get('plot_count', 0)}")
                 logger.info("=" * 80)
 
                 response = {
@@ -449,24 +357,46 @@ class CodeExecutionTools:
                     }
                 }
 
-                if save_plot and result['has_plots']:
-                    file_url = f"{settings.FRONT_API_BASE_URL}/api/v2/files/plots/{plot_filename}"
+                if result.get('rich_outputs'):
+                    response["data"]["rich_outputs"] = result['rich_outputs']
+
+                for stream in ("stdout", "stderr"):
+                    spill_path = result.get(f"{stream}_file")
+                    if spill_path:
+                        response["data"][f"{stream}_file_url"] = (
+                            f"{settings.FRONT_API_BASE_URL}/api/v2/files/outputs/{Path(spill_path).name}"
+                        )
+
+                if result.get('variables') is not None:
+                    response["data"]["session_variables"] = result['variables']
+
+                if result.get('session_reset'):
+                    response["data"]["session_reset"] = True
+
+                if save_plot and result.get('plots'):
+                    plots = [
+                        {
+                            "file_url"          : f"{settings.FRONT_API_BASE_URL}/api/v2/files/plots/{Path(plot['path']).name}"
+                            , "thumbnail_url"   : f"{settings.FRONT_API_BASE_URL}/api/v2/files/plots/{Path(plot['thumbnail_path']).name}"
+                            , "format"          : plot['format']
+                            , "width"           : plot['width']
+                            , "height"          : plot['height']
+                            , "bytes"           : plot['bytes']
+                        }
+                        for plot in result['plots']
+                    ]
 
-                    response["data"]["plot_path"] = plot_path
-                    response["data"]["file_url"] = file_url
+                    response["data"]["plot_path"]   = result['plots'][0]['path']
+                    response["data"]["file_url"]    = plots[0]["file_url"]
+                    response["data"]["plots"]       = plots
 
                     if runtime and runtime.stream_writer:
-                        runtime.stream_writer(f"✅ Plot saved: {file_url}")
-
-                    logger.info(f"Plot saved from code execution: {plot_path}")
-
-                if result.get('html_output'):
-                    html_filename = f"code_execution_{timestamp}.html"
-                    html_path = str(output_dir / html_filename)
+                        for plot in plots:
+                            runtime.stream_writer(f"✅ Plot saved: {plot['file_url']}")
 
-                    with open(html_path, 'w', encoding='utf-8') as f:
-                        f.write(result['html_output'])
+                    logger.info(f"Plots saved from code execution: {[plot['path'] for plot in result['plots']]}")
 
+                if result.get('html_path'):
                     html_url = f"{settings.FRONT_API_BASE_URL}/api/v2/files/plots/{html_filename}"
                     response["data"]["html_path"]   = html_path
                     response["data"]["html_url"]    = html_url
@@ -476,6 +406,18 @@ class CodeExecutionTools:
 
                     logger.info(f"HTML saved from code execution: {html_path}")
 
+                session_state = pool.session_state(session_id) if cacheable else None
+
+                if session_state:
+                    cache_key = ExecutionCache.make_key(
+                        analysis, session_state, datasets, current_dataset, save_plot
+                    )
+
+                    if cache_key:
+                        cached_data = dict(response["data"])
+                        cached_data.pop("session_reset", None)
+                        ExecutionCache.put(cache_key, cached_data)
+
                 if runtime:
                     runtime.state["code_execution_count"] = execution_count + 1
 
@@ -0,0 +1,178 @@
+from typing import Dict, Any, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import heapq
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+
+
+METHODS = ("pearson", "spearman")
+
+
+def _prepare(df: pd.DataFrame, method: str) -> np.ndarray:
+    """
+    Column-centered float matrix with NaN for missing values. Spearman ranks
+    every column once up front, instead of re-ranking for each pair.
+    """
+    if method == "spearman":
+        df = df.rank()
+
+    values = df.to_numpy(dtype=np.float64, copy=True)
+    values -= np.nanmean(values, axis=0)
+
+    return values
+
+
+def _block_complete(Xa: np.ndarray, Xb: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Correlations and observation counts of two column blocks without missing values"""
+    n       = len(Xa)
+    Za      = Xa / np.linalg.norm(Xa, axis=0)
+    Zb      = Xb / np.linalg.norm(Xb, axis=0)
+
+    return Za.T @ Zb, np.full((Xa.shape[1], Xb.shape[1]), n)
+
+
+def _block_pairwise(Xa: np.ndarray, Xb: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Correlations over pairwise-complete observations (as pandas does), from
+    sums restricted by the two blocks' presence masks.
+    """
+    Ma, Mb      = (~np.isnan(Xa)).astype(np.float64), (~np.isnan(Xb)).astype(np.float64)
+    Xa, Xb      = np.nan_to_num(Xa), np.nan_to_num(Xb)
+
+    n           = Ma.T @ Mb
+    sum_a       = Xa.T @ Mb
+    sum_b       = Ma.T @ Xb
+    cov         = Xa.T @ Xb - sum_a * sum_b / n
+    var_a       = (Xa * Xa).T @ Mb - sum_a ** 2 / n
+    var_b       = Ma.T @ (Xb * Xb) - sum_b ** 2 / n
+
+    return cov / np.sqrt(var_a * var_b), n
+
+
+def _block_pairs(p: int, block_size: int) -> List[Tuple[int, int]]:
+    starts = range(0, p, block_size)
+    return [(i, j) for i in starts for j in starts if j >= i]
+
+
+def _strongest(
+    r               : np.ndarray
+    , n             : np.ndarray
+    , i             : int
+    , j             : int
+    , top_k         : int
+    , threshold     : Optional[float]
+) -> List[Tuple[float, int, int, float, int]]:
+    """
+    The top_k strongest finite correlations of a block whose first row and
+    column are columns i and j, above the diagonal, as (|r|, a, b, r, n).
+    """
+    rows, cols      = np.nonzero(np.isfinite(r))
+    rows, cols      = rows + i, cols + j
+    keep            = rows < cols
+
+    rows, cols      = rows[keep], cols[keep]
+    values          = r[rows - i, cols - j]
+    counts          = n[rows - i, cols - j]
+
+    if threshold is not None:
+        strong                  = np.abs(values) >= threshold
+        rows, cols, values      = rows[strong], cols[strong], values[strong]
+        counts                  = counts[strong]
+
+    if len(values) > top_k:
+        best                    = np.argpartition(-np.abs(values), top_k)[:top_k]
+        rows, cols, values      = rows[best], cols[best], values[best]
+        counts                  = counts[best]
+
+    return [
+        (abs(v), a, b, v, c) for a, b, v, c in zip(rows.tolist(), cols.tolist(), values.tolist(), counts.tolist())
+    ]
+
+
+def _result(
+    method          : str
+    , columns       : List[str]
+    , strongest     : List[Tuple[float, int, int, float, int]]
+    , top_k         : int
+    , threshold     : Optional[float]
+    , matrix_path   : Optional[str]
+) -> Dict[str, Any]:
+    return {
+        "method"            : method
+        , "columns_analyzed": len(columns)
+        , "pairs"           : [
+            {"a": columns[a], "b": columns[b], "r": round(r, 4), "n": int(n)}
+            for _, a, b, r, n in strongest
+        ]
+        , "top_k"           : top_k
+        , "threshold"       : threshold
+        , "matrix_path"     : matrix_path
+    }
+
+
+def correlate(
+    df              : pd.DataFrame
+    , method        : str = "pearson"
+    , top_k         : int = 20
+    , threshold     : Optional[float] = None
+    , matrix_path   : Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Strongest column pairs of the correlation matrix, computed block by block.
+
+    Blocks of CORRELATION_BLOCK_SIZE columns are correlated on a thread pool
+    (the matrix products release the GIL), and each block only contributes
+    its strongest pairs, so the full p x p matrix is never held unless
+    matrix_path asks for it to be written as CSV.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method '{method}'. Available: {', '.join(METHODS)}")
+
+    columns     = df.columns.tolist()
+    p           = len(columns)
+    X           = _prepare(df, method)
+    block       = _block_pairwise if np.isnan(X).any() else _block_complete
+    block_size  = settings.CORRELATION_BLOCK_SIZE
+    matrix      = np.eye(p) if matrix_path else None
+
+    def run(bounds: Tuple[int, int]) -> List[Tuple[float, int, int, float, int]]:
+        i, j = bounds
+
+        # Constant columns have zero variance; their NaN correlations are dropped in _strongest
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r, n = block(X[:, i:i + block_size], X[:, j:j + block_size])
+
+        if matrix is not None:
+            matrix[i:i + r.shape[0], j:j + r.shape[1]] = r
+            matrix[j:j + r.shape[1], i:i + r.shape[0]] = r.T
+
+        return _strongest(r, n, i, j, top_k, threshold)
+
+    with ThreadPoolExecutor(max_workers=settings.CORRELATION_WORKERS) as executor:
+        candidates = [pair for pairs in executor.map(run, _block_pairs(p, block_size)) for pair in pairs]
+
+    if matrix is not None:
+        pd.DataFrame(matrix, index=columns, columns=columns).to_csv(matrix_path)
+
+    return _result(method, columns, heapq.nlargest(top_k, candidates), top_k, threshold, matrix_path)
+
+
+def from_matrix(
+    r               : np.ndarray
+    , n             : np.ndarray
+    , columns       : List[str]
+    , method        : str = "pearson"
+    , top_k         : int = 20
+    , threshold     : Optional[float] = None
+    , matrix_path   : Optional[str] = None
+) -> Dict[str, Any]:
+    """Strongest pairs of an already computed correlation matrix (e.g. from running sums)"""
+    if matrix_path:
+        pd.DataFrame(r, index=columns, columns=columns).to_csv(matrix_path)
+
+    strongest = heapq.nlargest(top_k, _strongest(r, n, 0, 0, top_k, threshold))
+
+    return _result(method, columns, strongest, top_k, threshold, matrix_path)
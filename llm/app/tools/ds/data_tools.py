@@ -1,13 +1,20 @@
 from typing import Dict, List, Optional
 from pathlib import Path
 import pandas as pd
-import json
+import asyncio
 
 from langchain_core.tools import tool
 from langchain.tools import ToolRuntime
 
 from app import logger
 from app.states.ds_agent_state import DSAgentState
+from app.tools.ds.dataset_store import DatasetStore
+from app.tools.ds.dataset_cache import DatasetCache
+from app.tools.ds import dataset_profiler
+from app.tools.ds import excel_reader
+from app.tools.ds.sketches import ColumnSketch, use_sketches
+from app.tools.ds.profile_index import ProfileIndex
+from app.tools.ds.running_stats import RunningStats
 
 class DataTools:
 
@@ -30,7 +37,19 @@ class DataTools:
             if runtime and runtime.stream_writer:
                 runtime.stream_writer(f"📂 Loading {file_path}...")
 
-            df = pd.read_csv(file_path)
+            profile = ProfileIndex.lookup(file_path)
+            if profile is not None:
+                return DataTools._summary_from_index(file_path, profile, runtime)
+
+            if dataset_profiler.should_stream(file_path):
+                profile = await asyncio.to_thread(ProfileIndex.extend, file_path)
+                if profile is not None:
+                    return DataTools._summary_from_index(file_path, profile, runtime, "incremental")
+
+                return await DataTools._profile_large_csv(file_path, runtime)
+
+            df          = await asyncio.to_thread(DatasetCache.load, file_path)
+            arrow_path  = await asyncio.to_thread(DatasetStore.publish, file_path, df)
 
             summary = {
                 "rows"          : len(df)
@@ -39,8 +58,11 @@ class DataTools:
                 , "dtypes"      : df.dtypes.astype(str).to_dict()
                 , "missing"     : df.isnull().sum().to_dict()
                 , "preview"     : df.head(5).to_dict(orient='records')
+                , "arrow_path"  : arrow_path
             }
 
+            ProfileIndex.schedule(file_path)
+
             if runtime and runtime.stream_writer:
                 runtime.stream_writer(f"✅ Loaded {len(df)} rows × {len(df.columns)} columns")
 
@@ -62,6 +84,76 @@ class DataTools:
                 , "data"    : None
             }
 
+    @staticmethod
+    async def _profile_large_csv(
+        file_path   : str
+        , runtime   : ToolRuntime[None, DSAgentState] = None
+    ) -> Dict:
+        """
+        read_csv for files above DATASET_STREAMING_THRESHOLD_MB: the summary and
+        a sketch-based profile index are built chunk by chunk in constant memory
+        and the file is not cached. The running statistics are kept so a later
+        export with appended rows is profiled incrementally.
+        """
+        if runtime and runtime.stream_writer:
+            runtime.stream_writer("📏 Large file, profiling in streaming mode...")
+
+        def report_progress(percent: int, rows: int):
+            if runtime and runtime.stream_writer:
+                runtime.stream_writer(f"⏳ Profiled {percent}% ({rows:,} rows)")
+
+        profiler    = await dataset_profiler.profile_csv(file_path, report_progress, RunningStats())
+        summary     = profiler.summary()
+
+        await asyncio.to_thread(ProfileIndex.save, file_path, ProfileIndex.from_streaming(profiler))
+        await asyncio.to_thread(profiler.save, file_path)
+
+        arrow_path = DatasetStore.lookup(file_path)
+        if arrow_path is None:
+            asyncio.get_running_loop().run_in_executor(None, DatasetStore.convert, file_path)
+
+        summary["arrow_path"]   = arrow_path
+        summary["profile_mode"] = "streaming"
+
+        if runtime and runtime.stream_writer:
+            runtime.stream_writer(f"✅ Loaded {summary['rows']} rows × {summary['columns']} columns")
+
+        logger.info(f"Profiled large CSV: {file_path} - {summary['rows']} rows, {summary['columns']} columns")
+
+        return {
+            "status"    : 200
+            , "message" : "CSV loaded successfully"
+            , "data"    : summary
+        }
+
+    @staticmethod
+    def _summary_from_index(
+        file_path       : str
+        , profile       : Dict
+        , runtime       : ToolRuntime[None, DSAgentState] = None
+        , profile_mode  : str = "index"
+    ) -> Dict:
+        summary = {
+            key: profile[key]
+            for key in ("rows", "columns", "column_names", "dtypes", "missing", "preview")
+        }
+
+        arrow_path = DatasetStore.lookup(file_path)
+        if arrow_path is None:
+            asyncio.get_running_loop().run_in_executor(None, DatasetStore.convert, file_path)
+
+        summary["arrow_path"]   = arrow_path
+        summary["profile_mode"] = profile_mode
+
+        if runtime and runtime.stream_writer:
+            runtime.stream_writer(f"✅ Loaded {summary['rows']} rows × {summary['columns']} columns (profile index)")
+
+        return {
+            "status"    : 200
+            , "message" : "CSV loaded successfully"
+            , "data"    : summary
+        }
+
     @staticmethod
     @tool("read_excel")
     async def read_excel(
@@ -83,7 +175,8 @@ class DataTools:
             if runtime and runtime.stream_writer:
                 runtime.stream_writer(f"📂 Loading {file_path}...")
 
-            df = pd.read_excel(file_path, sheet_name=sheet_name or 0)
+            df          = await asyncio.to_thread(DatasetCache.load, file_path, sheet_name)
+            arrow_path  = await asyncio.to_thread(DatasetStore.publish, file_path, df, sheet_name)
 
             summary = {
                 "rows"          : len(df)
@@ -92,6 +185,8 @@ class DataTools:
                 , "dtypes"      : df.dtypes.astype(str).to_dict()
                 , "missing"     : df.isnull().sum().to_dict()
                 , "preview"     : df.head(5).to_dict(orient='records')
+                , "sheet_names" : excel_reader.sheet_names(file_path)
+                , "arrow_path"  : arrow_path
             }
 
             if runtime and runtime.stream_writer:
@@ -116,11 +211,55 @@ class DataTools:
             }
 
     @staticmethod
-    @tool("get_column_info")
-    async def get_column_info(
+    @tool("list_excel_sheets")
+    async def list_excel_sheets(
         file_path   : str
-        , column    : str
         , runtime   : ToolRuntime[None, DSAgentState] = None
+    ) -> Dict:
+        """
+        List the sheets of an Excel workbook without loading any data
+
+        Args:
+            file_path: Path to Excel file
+
+        Returns:
+            Dict with sheet names in workbook order
+        """
+        try:
+            names = await asyncio.to_thread(excel_reader.sheet_names, file_path)
+
+            if runtime and runtime.stream_writer:
+                runtime.stream_writer(f"📑 Found {len(names)} sheets")
+
+            return {
+                "status"    : 200
+                , "message" : "Sheets listed"
+                , "data"    : {
+                    "sheet_names"   : names
+                    , "cached"      : [
+                        name for index, name in enumerate(names)
+                        if DatasetStore.lookup(file_path, name) or (index == 0 and DatasetStore.lookup(file_path))
+                    ]
+                }
+            }
+
+        except Exception as e:
+            logger.error(f"Error listing sheets: {str(e)}")
+            if runtime and runtime.stream_writer:
+                runtime.stream_writer(f"❌ Failed: {str(e)}")
+            return {
+                "status"    : 500
+                , "message" : f"Failed to list sheets: {str(e)}"
+                , "data"    : None
+            }
+
+    @staticmethod
+    @tool("get_column_info")
+    async def get_column_info(
+        file_path       : str
+        , column        : str
+        , approximate   : Optional[bool] = None
+        , runtime       : ToolRuntime[None, DSAgentState] = None
     ) -> Dict:
         """
         Get detailed statistics for a specific column
@@ -128,6 +267,8 @@ class DataTools:
         Args:
             file_path   : Path to data file
             column      : Column name
+            approximate : Use sketches (bounded error) instead of exact statistics.
+                          Defaults to sketches only for very large columns
 
         Returns:
             Dict with column statistics
@@ -136,10 +277,20 @@ class DataTools:
             if runtime and runtime.stream_writer:
                 runtime.stream_writer(f"📊 Analyzing column '{column}'...")
 
-            if file_path.endswith('.csv'):
-                df = pd.read_csv(file_path)
-            else:
-                df = pd.read_excel(file_path)
+            profile = ProfileIndex.column(file_path, column, approximate)
+
+            if profile is not None:
+                if runtime and runtime.stream_writer:
+                    runtime.stream_writer(f"⚡ Column statistics from profile index")
+
+                return {
+                    "status"    : 200
+                    , "message" : "Column info retrieved"
+                    , "data"    : DataTools._column_info(column, profile)
+                }
+
+            df = DatasetCache.load(file_path, columns=[column])
+            ProfileIndex.schedule(file_path)
 
             if column not in df.columns:
                 if runtime and runtime.stream_writer:
@@ -152,12 +303,29 @@ class DataTools:
 
             col_data = df[column]
 
+            if use_sketches(len(col_data), approximate):
+                if runtime and runtime.stream_writer:
+                    runtime.stream_writer(f"📐 Sketching {len(col_data):,} rows (approximate statistics)...")
+
+                sketch  = await asyncio.to_thread(ColumnSketch.from_series, col_data)
+                stats   = DataTools._column_info(column, sketch.profile())
+
+                if runtime and runtime.stream_writer:
+                    runtime.stream_writer(f"✅ Column analysis complete")
+
+                return {
+                    "status"    : 200
+                    , "message" : "Column info retrieved (approximate)"
+                    , "data"    : stats
+                }
+
             stats = {
                 "column"        : column
                 , "dtype"       : str(col_data.dtype)
                 , "count"       : int(col_data.count())
                 , "missing"     : int(col_data.isnull().sum())
                 , "unique"      : int(col_data.nunique())
+                , "approximate" : False
             }
 
             if pd.api.types.is_numeric_dtype(col_data):
@@ -192,3 +360,19 @@ class DataTools:
                 , "message" : f"Failed to get column info: {str(e)}"
                 , "data"    : None
             }
+
+    @staticmethod
+    def _column_info(column: str, profile: Dict) -> Dict:
+        """get_column_info output from a profile index entry or sketch profile"""
+        stats = {"column": column}
+        stats.update({key: profile[key] for key in ("dtype", "count", "missing", "unique", "approximate")})
+
+        if "top_values" in profile:
+            stats["top_values"] = dict(list(profile["top_values"].items())[:5])
+        else:
+            stats.update({key: profile[key] for key in ("mean", "std", "min", "max", "q25", "q50", "q75")})
+
+        if "error_bounds" in profile:
+            stats["error_bounds"] = profile["error_bounds"]
+
+        return stats
@@ -0,0 +1,180 @@
+from typing import Dict, List, Optional, Type
+import importlib.util
+
+import pandas as pd
+
+from app import logger
+from app.core.config import settings
+from app.tools.ds import excel_reader
+from app.tools.ds.excel_reader import SheetName
+
+
+# pandas' default na_values and boolean spellings. The other engines are
+# given the same lists, so they read the same cells as missing or boolean.
+PANDAS_NA_VALUES = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN'
+    , '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+]
+PANDAS_TRUE_VALUES  = ['True', 'TRUE', 'true']
+PANDAS_FALSE_VALUES = ['False', 'FALSE', 'false']
+
+
+def arrow_convert_options(
+    file_path       : str
+    , columns       : Optional[List[str]] = None
+    , read_options  = None
+):
+    """
+    pyarrow CSV ConvertOptions with pandas' semantics: its missing-value
+    tokens (also in string columns) and booleans, and dates and times kept
+    as text. The first block is read to find the columns pyarrow would infer
+    as temporal. columns restricts the read to those present in the file.
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+
+    options = {
+        "null_values"           : PANDAS_NA_VALUES
+        , "strings_can_be_null" : True
+        , "true_values"         : PANDAS_TRUE_VALUES
+        , "false_values"        : PANDAS_FALSE_VALUES
+    }
+
+    reader = pa_csv.open_csv(
+        file_path
+        , read_options      = read_options
+        , convert_options   = pa_csv.ConvertOptions(**options)
+    )
+    schema = reader.schema
+    reader.close()
+
+    options["column_types"] = {
+        field.name: pa.string() for field in schema if pa.types.is_temporal(field.type)
+    }
+
+    if columns is not None:
+        options["include_columns"] = [c for c in dict.fromkeys(columns) if c in schema.names]
+
+    return pa_csv.ConvertOptions(**options)
+
+
+class PandasEngine:
+    """
+    Reference engine: pandas' own parsers.
+
+    Every engine returns pandas DataFrames, so tools format their results the
+    same way whichever engine parsed the file. Engines only override the CSV
+    paths; workbooks go through excel_reader for all of them.
+    """
+
+    name = "pandas"
+
+    @staticmethod
+    def read_csv(file_path: str) -> pd.DataFrame:
+        return pd.read_csv(file_path)
+
+    @staticmethod
+    def read_csv_columns(file_path: str, columns: List[str]) -> pd.DataFrame:
+        wanted = set(columns)
+        return pd.read_csv(file_path, usecols=lambda c: c in wanted)
+
+    @classmethod
+    def read(cls, file_path: str, sheet_name: SheetName = None) -> pd.DataFrame:
+        if not file_path.endswith('.csv'):
+            return excel_reader.read_sheet(file_path, sheet_name)
+
+        return cls._with_fallback(cls.read_csv, PandasEngine.read_csv, file_path)
+
+    @classmethod
+    def read_columns(
+        cls
+        , file_path     : str
+        , columns       : List[str]
+        , sheet_name    : SheetName = None
+    ) -> pd.DataFrame:
+        if not file_path.endswith('.csv'):
+            return excel_reader.read_sheet(file_path, sheet_name, columns)
+
+        return cls._with_fallback(cls.read_csv_columns, PandasEngine.read_csv_columns, file_path, columns)
+
+    @classmethod
+    def _with_fallback(cls, reader, fallback, *args) -> pd.DataFrame:
+        """Files the engine's stricter parser rejects are read by pandas instead"""
+        if reader is fallback:
+            return reader(*args)
+
+        try:
+            return reader(*args)
+        except Exception as e:
+            logger.warning(f"{cls.name} engine could not parse {args[0]} ({str(e)}), using pandas")
+            return fallback(*args)
+
+
+class PolarsEngine(PandasEngine):
+    """
+    Multi-threaded polars CSV reader. Projected reads are lazy scans, so only
+    the requested columns are parsed.
+    """
+
+    name = "polars"
+
+    @staticmethod
+    def read_csv(file_path: str) -> pd.DataFrame:
+        import polars as pl
+        return pl.read_csv(file_path, infer_schema_length=10000, null_values=PANDAS_NA_VALUES).to_pandas()
+
+    @staticmethod
+    def read_csv_columns(file_path: str, columns: List[str]) -> pd.DataFrame:
+        import polars as pl
+
+        scan        = pl.scan_csv(file_path, infer_schema_length=10000, null_values=PANDAS_NA_VALUES)
+        available   = set(scan.collect_schema().names())
+
+        return scan.select([c for c in dict.fromkeys(columns) if c in available]).collect().to_pandas()
+
+
+class ArrowEngine(PandasEngine):
+    """Multi-threaded pyarrow CSV reader; projected reads convert only the requested columns"""
+
+    name = "pyarrow"
+
+    @staticmethod
+    def read_csv(file_path: str) -> pd.DataFrame:
+        import pyarrow.csv as pa_csv
+        return pa_csv.read_csv(
+            file_path, convert_options=arrow_convert_options(file_path)
+        ).to_pandas(split_blocks=True)
+
+    @staticmethod
+    def read_csv_columns(file_path: str, columns: List[str]) -> pd.DataFrame:
+        import pyarrow.csv as pa_csv
+
+        return pa_csv.read_csv(
+            file_path, convert_options=arrow_convert_options(file_path, columns)
+        ).to_pandas(split_blocks=True)
+
+
+ENGINES: Dict[str, Type[PandasEngine]] = {
+    "pandas"    : PandasEngine
+    , "polars"  : PolarsEngine
+    , "pyarrow" : ArrowEngine
+}
+
+
+def get_engine(name: Optional[str] = None) -> Type[PandasEngine]:
+    """
+    The engine named in DATAFRAME_ENGINE. "auto" prefers polars, then pyarrow,
+    then pandas, depending on what is installed.
+    """
+    name = (name or settings.DATAFRAME_ENGINE).lower()
+
+    if name == "auto":
+        for candidate in ("polars", "pyarrow"):
+            if importlib.util.find_spec(candidate) is not None:
+                return ENGINES[candidate]
+        return PandasEngine
+
+    if name not in ENGINES:
+        raise ValueError(f"Unknown dataframe engine '{name}'. Available: {', '.join(ENGINES)}")
+
+    return ENGINES[name]
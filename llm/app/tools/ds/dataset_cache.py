@@ -0,0 +1,167 @@
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+import threading
+
+import pandas as pd
+
+from app import logger
+from app.core.config import settings
+from app.tools.ds.dataset_store import DatasetStore
+from app.tools.ds.dataframe_engine import get_engine
+from app.tools.ds.excel_reader import SheetName
+
+
+class DatasetCache:
+    """
+    Process-wide cache of parsed datasets shared by all DS tools.
+
+    Entries are keyed on path and sheet and validated against the file's
+    size and mtime, so an overwritten upload is re-read. Total memory is
+    bounded by DATASET_CACHE_MEMORY_MB with LRU eviction. Cached frames are
+    shared between tools: callers must treat them as read-only and copy
+    before mutating.
+
+    Callers that need only some columns pass columns; those reads come from
+    the cached frame, the columnar copy (touching only those columns) or a
+    projected scan, and are not cached themselves. Files without a columnar
+    copy are parsed by the DATAFRAME_ENGINE reader; every Excel sheet parsed
+    here is published as a columnar copy, so later reads of it skip the
+    workbook even after eviction.
+    """
+
+    _entries: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+    _lock           = threading.Lock()
+    _total_bytes    = 0
+
+    hits            = 0
+    misses          = 0
+    evictions       = 0
+    projected_reads = 0
+
+    @staticmethod
+    def _key(file_path: str, sheet_name: SheetName) -> Tuple[str, str]:
+        return str(Path(file_path).resolve()), str(sheet_name or 0)
+
+    @staticmethod
+    def _file_version(file_path: str) -> Tuple[int, int]:
+        stat_info = Path(file_path).stat()
+        return stat_info.st_size, stat_info.st_mtime_ns
+
+    @staticmethod
+    def _parse(file_path: str, sheet_name: SheetName) -> pd.DataFrame:
+        arrow_path = DatasetStore.lookup(file_path, sheet_name)
+        if arrow_path:
+            return DatasetStore.attach(arrow_path)
+
+        df = get_engine().read(file_path, sheet_name)
+
+        if not file_path.endswith('.csv'):
+            # Workbooks are slow to parse, keep a columnar copy of every sheet read
+            DatasetStore.publish(file_path, df, sheet_name)
+
+        return df
+
+    @staticmethod
+    def _remove(key: Tuple[str, str]):
+        entry = DatasetCache._entries.pop(key, None)
+        if entry is not None:
+            DatasetCache._total_bytes -= entry["bytes"]
+
+    @staticmethod
+    def _lookup(key: Tuple[str, str], version: Tuple[int, int]) -> Optional[pd.DataFrame]:
+        with DatasetCache._lock:
+            entry = DatasetCache._entries.get(key)
+
+            if entry is not None and entry["version"] == version:
+                DatasetCache._entries.move_to_end(key)
+                DatasetCache.hits += 1
+                return entry["df"]
+
+            DatasetCache._remove(key)
+            DatasetCache.misses += 1
+
+        return None
+
+    @staticmethod
+    def _parse_columns(file_path: str, sheet_name: SheetName, columns: List[str]) -> pd.DataFrame:
+        arrow_path = DatasetStore.lookup(file_path, sheet_name)
+        if arrow_path:
+            return DatasetStore.attach(arrow_path, columns)
+
+        if not file_path.endswith('.csv'):
+            df = DatasetCache._parse(file_path, sheet_name)
+            return df[[c for c in dict.fromkeys(columns) if c in df.columns]]
+
+        return get_engine().read_columns(file_path, columns, sheet_name)
+
+    @staticmethod
+    def load(
+        file_path   : str
+        , sheet_name: SheetName = None
+        , columns   : Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        key     = DatasetCache._key(file_path, sheet_name)
+        version = DatasetCache._file_version(file_path)
+        df      = DatasetCache._lookup(key, version)
+
+        if df is not None:
+            if columns is not None:
+                return df[[c for c in dict.fromkeys(columns) if c in df.columns]]
+            return df
+
+        if columns is not None:
+            with DatasetCache._lock:
+                DatasetCache.projected_reads += 1
+            return DatasetCache._parse_columns(file_path, sheet_name, columns)
+
+        df      = DatasetCache._parse(file_path, sheet_name)
+        size    = int(df.memory_usage(deep=True).sum())
+        budget  = settings.DATASET_CACHE_MEMORY_MB * 1024 * 1024
+
+        if size > budget:
+            logger.info(f"Dataset {file_path} ({size / 1024 / 1024:.1f} MB) exceeds the cache budget, not cached")
+            return df
+
+        with DatasetCache._lock:
+            DatasetCache._remove(key)
+
+            while DatasetCache._entries and DatasetCache._total_bytes + size > budget:
+                evicted_key, evicted = DatasetCache._entries.popitem(last=False)
+                DatasetCache._total_bytes -= evicted["bytes"]
+                DatasetCache.evictions += 1
+                logger.info(f"Evicted dataset {evicted_key[0]} from cache ({evicted['bytes'] / 1024 / 1024:.1f} MB)")
+
+            DatasetCache._entries[key] = {
+                "df"        : df
+                , "version" : version
+                , "bytes"   : size
+            }
+            DatasetCache._total_bytes += size
+
+        return df
+
+    @staticmethod
+    def invalidate(file_path: str):
+        resolved = str(Path(file_path).resolve())
+
+        with DatasetCache._lock:
+            for key in [k for k in DatasetCache._entries if k[0] == resolved]:
+                DatasetCache._remove(key)
+
+    @staticmethod
+    def stats() -> Dict[str, Any]:
+        with DatasetCache._lock:
+            lookups = DatasetCache.hits + DatasetCache.misses
+
+            return {
+                "entries"       : len(DatasetCache._entries)
+                , "memory_mb"   : round(DatasetCache._total_bytes / 1024 / 1024, 2)
+                , "budget_mb"   : settings.DATASET_CACHE_MEMORY_MB
+                , "hits"        : DatasetCache.hits
+                , "misses"      : DatasetCache.misses
+                , "evictions"   : DatasetCache.evictions
+                , "projected_reads": DatasetCache.projected_reads
+                , "engine"      : get_engine().name
+                , "hit_rate"    : round(DatasetCache.hits / lookups, 3) if lookups else 0.0
+            }
@@ -0,0 +1,126 @@
+from typing import Dict, Any, Callable, Optional
+import os
+import asyncio
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+from app.tools.ds.sketches import ColumnSketch
+
+
+PREVIEW_ROWS = 5
+PROGRESS_STEP = 10
+
+ProgressCallback = Callable[[int, int], None]
+
+
+def _merge_dtype(current: np.dtype, new: np.dtype) -> np.dtype:
+    """The dtype pandas would give a column whose chunks had these two dtypes"""
+    if current == new:
+        return current
+
+    numeric = (
+        pd.api.types.is_numeric_dtype(current) and pd.api.types.is_numeric_dtype(new)
+        and not pd.api.types.is_bool_dtype(current) and not pd.api.types.is_bool_dtype(new)
+    )
+
+    if numeric:
+        return np.result_type(current, new)
+
+    return np.dtype(object)
+
+
+class StreamingProfiler:
+    """
+    Builds the read_csv summary one chunk at a time.
+
+    Only per-column counters, dtypes, sketches and the preview rows are kept,
+    so memory does not grow with the file. A column whose chunks switch
+    between numeric and non-numeric loses its sketch.
+    """
+
+    def __init__(self):
+        self.rows       = 0
+        self.dtypes     : Dict[str, np.dtype] = {}
+        self.missing    : Dict[str, int] = {}
+        self.sketches   : Dict[str, Optional[ColumnSketch]] = {}
+        self.preview    = None
+
+    def update(self, chunk: pd.DataFrame):
+        if self.preview is None:
+            self.preview = chunk.head(PREVIEW_ROWS).to_dict(orient='records')
+
+        self.rows += len(chunk)
+
+        for column, dtype in chunk.dtypes.items():
+            current                 = self.dtypes.get(column)
+            self.dtypes[column]     = dtype if current is None else _merge_dtype(current, dtype)
+
+        for column, count in chunk.isnull().sum().items():
+            self.missing[column] = self.missing.get(column, 0) + int(count)
+
+        for column in chunk.columns:
+            numeric = pd.api.types.is_numeric_dtype(chunk[column])
+
+            if column not in self.sketches:
+                self.sketches[column] = ColumnSketch(numeric)
+
+            sketch = self.sketches[column]
+
+            if sketch is not None and sketch.numeric != numeric:
+                self.sketches[column] = None
+            elif sketch is not None:
+                sketch.update(chunk[column])
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "rows"          : self.rows
+            , "columns"     : len(self.dtypes)
+            , "column_names": list(self.dtypes.keys())
+            , "dtypes"      : {column: str(dtype) for column, dtype in self.dtypes.items()}
+            , "missing"     : self.missing
+            , "preview"     : self.preview or []
+        }
+
+
+def should_stream(file_path: str) -> bool:
+    return os.path.getsize(file_path) > settings.DATASET_STREAMING_THRESHOLD_MB * 1024 * 1024
+
+
+async def profile_csv(
+    file_path       : str
+    , on_progress   : Optional[ProgressCallback] = None
+    , profiler      : Optional[StreamingProfiler] = None
+) -> StreamingProfiler:
+    """
+    Profile a CSV in constant memory.
+
+    Chunks are parsed and profiled in a worker thread so the event loop stays free;
+    on_progress receives (percent, rows) every PROGRESS_STEP percent of the
+    file's bytes. profiler may be a subclass that keeps extra statistics.
+    """
+    total_bytes     = os.path.getsize(file_path) or 1
+    profiler        = profiler or StreamingProfiler()
+    last_reported   = 0
+
+    with open(file_path, "rb") as handle:
+        reader = pd.read_csv(handle, chunksize=settings.DATASET_PROFILE_CHUNK_ROWS)
+
+        try:
+            while True:
+                chunk = await asyncio.to_thread(next, reader, None)
+                if chunk is None:
+                    break
+
+                await asyncio.to_thread(profiler.update, chunk)
+
+                percent = min(int(handle.tell() * 100 / total_bytes), 100)
+                if on_progress and percent >= last_reported + PROGRESS_STEP:
+                    last_reported = percent - percent % PROGRESS_STEP
+                    on_progress(percent, profiler.rows)
+
+        finally:
+            reader.close()
+
+    return profiler
@@ -0,0 +1,211 @@
+from typing import Dict, List, Optional
+from pathlib import Path
+import os
+import hashlib
+import threading
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+from app import logger
+from app.tools.ds import excel_reader
+from app.tools.ds.excel_reader import SheetName
+from app.tools.ds.dataframe_engine import arrow_convert_options
+
+
+ARROW_DIR = Path("output/datasets")
+MAX_ATTACHED_TABLES = 8
+CSV_BLOCK_SIZE = 16 * 1024 * 1024
+
+
+class DatasetStore:
+    """
+    Columnar copies of loaded datasets, stored as Arrow IPC files.
+
+    Files are keyed by the source file fingerprint (size + mtime) so a changed
+    upload never attaches a stale copy. Readers memory-map them, so sandbox
+    workers share the same page-cache pages instead of re-parsing the source.
+    Excel sheets other than the first get their own copy, keyed by sheet.
+    """
+
+    _tables     : Dict[str, pa.Table] = {}
+    _converting : set = set()
+    _lock       = threading.Lock()
+
+    @staticmethod
+    def fingerprint(file_path: str) -> str:
+        try:
+            path = Path(file_path)
+            if not path.exists():
+                return ""
+
+            stat_info   = path.stat()
+            hash_data   = f"{stat_info.st_size}_{stat_info.st_mtime}"
+
+            return hashlib.md5(hash_data.encode()).hexdigest()
+
+        except Exception as e:
+            logger.error(f"Error getting file hash for {file_path}: {str(e)}")
+            return ""
+
+    @staticmethod
+    def arrow_path(file_path: str, sheet_name: SheetName = None) -> Optional[Path]:
+        file_hash = DatasetStore.fingerprint(file_path)
+        if not file_hash:
+            return None
+
+        if not sheet_name:
+            return ARROW_DIR / f"{file_hash}.arrow"
+
+        sheet_hash = hashlib.md5(repr(sheet_name).encode()).hexdigest()[:12]
+        return ARROW_DIR / f"{file_hash}.sheet-{sheet_hash}.arrow"
+
+    @staticmethod
+    def lookup(file_path: str, sheet_name: SheetName = None) -> Optional[str]:
+        path = DatasetStore.arrow_path(file_path, sheet_name)
+
+        if path is not None and path.exists():
+            return str(path)
+
+        return None
+
+    @staticmethod
+    def _write(path: Path, schema: pa.Schema, batches) -> str:
+        ARROW_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+
+        try:
+            with pa.OSFile(str(tmp_path), "wb") as sink:
+                with pa.ipc.new_file(sink, schema) as writer:
+                    for batch in batches:
+                        writer.write_batch(batch)
+
+            os.replace(tmp_path, path)
+
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+        return str(path)
+
+    @staticmethod
+    def publish(file_path: str, df: pd.DataFrame, sheet_name: SheetName = None) -> Optional[str]:
+        path = DatasetStore.arrow_path(file_path, sheet_name)
+        if path is None:
+            return None
+
+        if path.exists():
+            return str(path)
+
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            DatasetStore._write(path, table.schema, table.to_batches())
+            logger.info(f"Published dataset {file_path} ({sheet_name or 'first sheet'}) as Arrow: {path}")
+
+            return str(path)
+
+        except Exception as e:
+            logger.error(f"Failed to publish dataset {file_path}: {str(e)}")
+            return None
+
+    @staticmethod
+    def convert(file_path: str) -> Optional[str]:
+        """
+        Write the typed columnar copy of an uploaded file.
+
+        CSVs are streamed block by block through the Arrow CSV reader, which
+        infers the schema from the first block, so memory stays bounded. Cells
+        are converted with pandas' semantics (see arrow_convert_options), so
+        the copy has the dtypes and missing values pd.read_csv would give. If a
+        later block contradicts the inferred types, the file is parsed with
+        pandas instead. Workbooks are parsed once and every sheet is
+        published; the first sheet is also the default copy.
+        """
+        path = DatasetStore.arrow_path(file_path)
+        if path is None:
+            return None
+
+        if path.exists():
+            return str(path)
+
+        with DatasetStore._lock:
+            if path in DatasetStore._converting:
+                return None
+            DatasetStore._converting.add(path)
+
+        try:
+            if file_path.endswith('.csv'):
+                try:
+                    read_options    = pa_csv.ReadOptions(block_size=CSV_BLOCK_SIZE)
+                    reader          = pa_csv.open_csv(
+                        file_path
+                        , read_options      = read_options
+                        , convert_options   = arrow_convert_options(file_path, read_options=read_options)
+                    )
+                    DatasetStore._write(path, reader.schema, reader)
+                    logger.info(f"Converted {file_path} to Arrow: {path}")
+                    return str(path)
+
+                except pa.ArrowInvalid as e:
+                    logger.warning(f"Streaming conversion of {file_path} failed ({str(e)}), using pandas")
+                    return DatasetStore.publish(file_path, pd.read_csv(file_path))
+
+            return DatasetStore._convert_workbook(file_path)
+
+        except Exception as e:
+            logger.error(f"Failed to convert dataset {file_path}: {str(e)}")
+            return None
+
+        finally:
+            with DatasetStore._lock:
+                DatasetStore._converting.discard(path)
+
+    @staticmethod
+    def _convert_workbook(file_path: str) -> Optional[str]:
+        sheets = excel_reader.read_all_sheets(file_path)
+
+        for sheet_name, df in sheets.items():
+            DatasetStore.publish(file_path, df, sheet_name)
+
+        if not sheets:
+            return None
+
+        first_sheet = next(iter(sheets))
+        path        = DatasetStore.arrow_path(file_path)
+        sheet_path  = DatasetStore.lookup(file_path, first_sheet)
+
+        if sheet_path and not path.exists():
+            try:
+                os.link(sheet_path, path)
+                return str(path)
+            except OSError:
+                pass
+
+        return DatasetStore.publish(file_path, sheets[first_sheet])
+
+    @staticmethod
+    def attach(arrow_path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Open a published dataset as a DataFrame.
+
+        The Arrow table is memory-mapped and cached per process; split_blocks
+        keeps each column in its own block so primitive columns without nulls
+        convert without an extra copy. With columns, only those columns are
+        converted (and paged in); names missing from the file are skipped.
+        """
+        table = DatasetStore._tables.get(arrow_path)
+
+        if table is None:
+            source  = pa.memory_map(arrow_path, "r")
+            table   = pa.ipc.open_file(source).read_all()
+
+            if len(DatasetStore._tables) >= MAX_ATTACHED_TABLES:
+                DatasetStore._tables.pop(next(iter(DatasetStore._tables)))
+
+            DatasetStore._tables[arrow_path] = table
+
+        if columns is not None:
+            available   = set(table.column_names)
+            table       = table.select([c for c in dict.fromkeys(columns) if c in available])
+
+        return table.to_pandas(split_blocks=True)
@@ -0,0 +1,59 @@
+from typing import Dict, List, Optional, Union
+import importlib.util
+
+import pandas as pd
+
+
+SheetName = Optional[Union[str, int]]
+
+
+def excel_engine() -> Optional[str]:
+    """calamine (Rust, no per-cell Python objects) when installed, else pandas' default"""
+    if importlib.util.find_spec("python_calamine") is not None:
+        return "calamine"
+    return None
+
+
+def sheet_names(file_path: str) -> List[str]:
+    """
+    Sheet names in workbook order, read from the workbook index without
+    parsing any cell data.
+    """
+    if excel_engine() == "calamine":
+        from python_calamine import CalamineWorkbook
+        return list(CalamineWorkbook.from_path(file_path).sheet_names)
+
+    if file_path.endswith('.xls'):
+        import xlrd
+
+        book = xlrd.open_workbook(file_path, on_demand=True)
+        try:
+            return book.sheet_names()
+        finally:
+            book.release_resources()
+
+    from openpyxl import load_workbook
+
+    book = load_workbook(file_path, read_only=True)
+    try:
+        return list(book.sheetnames)
+    finally:
+        book.close()
+
+
+def read_sheet(
+    file_path       : str
+    , sheet_name    : SheetName = None
+    , columns       : Optional[List[str]] = None
+) -> pd.DataFrame:
+    usecols = None
+    if columns is not None:
+        wanted  = set(columns)
+        usecols = lambda c: c in wanted
+
+    return pd.read_excel(file_path, sheet_name=sheet_name or 0, usecols=usecols, engine=excel_engine())
+
+
+def read_all_sheets(file_path: str) -> Dict[str, pd.DataFrame]:
+    """Every sheet from a single pass over the workbook"""
+    return pd.read_excel(file_path, sheet_name=None, engine=excel_engine())
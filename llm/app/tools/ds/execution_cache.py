@@ -0,0 +1,127 @@
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional
+import copy
+import time
+import hashlib
+import threading
+
+from app import logger
+from app.core.config import settings
+from app.tools.ds.dataset_store import DatasetStore
+from app.tools.ds.plot_export import PLOT_DIR
+from app.utils.code_analysis import CodeAnalysis
+
+
+class ExecutionCache:
+    """
+    Content-addressed cache of successful execute_python_code results.
+
+    Keys combine the normalized AST of the code (so whitespace and comments
+    do not matter), the fingerprints of the datasets it can read and the
+    state of the conversation's Python session. Only code that leaves the
+    session untouched and does not draw random numbers is cached, so a hit
+    is indistinguishable from running the code again.
+    """
+
+    _entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+    _lock   = threading.Lock()
+    hits    = 0
+    misses  = 0
+
+    @staticmethod
+    def _dataset_fingerprints(
+        analysis            : CodeAnalysis
+        , datasets          : Dict[str, str]
+        , current_dataset   : Optional[str]
+    ) -> str:
+        referenced = set()
+
+        if "df" in analysis.loaded_names and current_dataset:
+            referenced.add(current_dataset)
+
+        if "load_dataset" in analysis.loaded_names:
+            referenced.update(datasets.keys())
+
+        for value in analysis.string_constants:
+            if len(value) < 512 and Path(value).is_file():
+                referenced.add(value)
+
+        return "|".join(
+            f"{path}:{DatasetStore.fingerprint(path)}" for path in sorted(referenced)
+        )
+
+    @staticmethod
+    def make_key(
+        analysis            : CodeAnalysis
+        , session_state     : str
+        , datasets          : Dict[str, str]
+        , current_dataset   : Optional[str]
+        , save_plot         : bool
+    ) -> Optional[str]:
+        if analysis.fingerprint is None:
+            return None
+
+        key_data = "\n".join([
+            analysis.fingerprint
+            , session_state
+            , ExecutionCache._dataset_fingerprints(analysis, datasets, current_dataset)
+            , str(save_plot)
+        ])
+
+        return hashlib.sha256(key_data.encode()).hexdigest()
+
+    @staticmethod
+    def _files_exist(data: Dict[str, Any]) -> bool:
+        """Whether every file the result links to is still there; plot files can be evicted"""
+        paths = [Path(data[field]) for field in ("plot_path", "html_path") if data.get(field)]
+
+        for plot in data.get("plots") or []:
+            paths.extend(
+                PLOT_DIR / Path(plot[field]).name
+                for field in ("file_url", "thumbnail_url")
+                if plot.get(field)
+            )
+
+        return all(path.exists() for path in paths)
+
+    @staticmethod
+    def get(key: str) -> Optional[Dict[str, Any]]:
+        with ExecutionCache._lock:
+            entry = ExecutionCache._entries.get(key)
+
+            if entry is not None:
+                expired = time.time() - entry["created_at"] > settings.SANDBOX_RESULT_CACHE_TTL
+
+                if expired or not ExecutionCache._files_exist(entry["data"]):
+                    del ExecutionCache._entries[key]
+                    entry = None
+
+            if entry is None:
+                ExecutionCache.misses += 1
+                return None
+
+            ExecutionCache._entries.move_to_end(key)
+            ExecutionCache.hits += 1
+
+            return copy.deepcopy(entry["data"])
+
+    @staticmethod
+    def put(key: str, data: Dict[str, Any]):
+        if settings.SANDBOX_RESULT_CACHE_SIZE <= 0:
+            return
+
+        with ExecutionCache._lock:
+            ExecutionCache._entries[key] = {
+                "data"          : copy.deepcopy(data)
+                , "created_at"  : time.time()
+            }
+            ExecutionCache._entries.move_to_end(key)
+
+            while len(ExecutionCache._entries) > settings.SANDBOX_RESULT_CACHE_SIZE:
+                ExecutionCache._entries.popitem(last=False)
+
+        logger.info(
+            f"Cached execution result {key[:12]} "
+            f"({len(ExecutionCache._entries)} entries, {ExecutionCache.hits} hits, {ExecutionCache.misses} misses)"
+        )
@@ -1,21 +1,97 @@
-from typing import Dict, List, Optional, Annotated
-from pathlib import Path
+from typing import Dict, Any, List, Optional
+import os
+import asyncio
 import pandas as pd
-import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LinearRegression, LogisticRegression
-from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier
-from sklearn.metrics import mean_squared_error, r2_score, accuracy_score, classification_report
-import joblib
 
 from langchain_core.tools import tool
-from langgraph.prebuilt import InjectedState
+from langchain.tools import ToolRuntime
 
 from app import logger
+from app.states.ds_agent_state import DSAgentState
+from app.tools.ds.dataset_cache import DatasetCache
+from app.tools.ds.sandbox_admission import SandboxBusyError
+from app.tools.ds.training_engine import TrainingEngine
+from app.tools.ds.model_registry import ModelRegistry
+from app.tools.ds.dataset_store import DatasetStore
 
 class MLTools:
     """Tools for machine learning model training and evaluation"""
 
+    @staticmethod
+    async def _train(
+        trainer             : str
+        , file_path         : str
+        , target_column     : str
+        , feature_columns   : List[str]
+        , test_size         : float
+        , params            : Dict[str, Any]
+        , model_type        : str
+        , runtime           : Optional[ToolRuntime] = None
+    ) -> Dict[str, Any]:
+        """
+        Fit on the training engine, streaming its progress and queue position,
+        and register the model. Returns the trainer's result and the registry
+        entry.
+        """
+        def report(message: str):
+            if runtime and runtime.stream_writer:
+                runtime.stream_writer(message)
+
+        def report_queue_position(position: int):
+            report(f"⏳ Waiting for a training slot (position {position})")
+
+        report(f"📂 Loading {file_path}...")
+        df = await asyncio.to_thread(DatasetCache.load, file_path, columns=feature_columns + [target_column])
+
+        config  = getattr(runtime, "config", None) or {}
+        key     = config.get("configurable", {}).get("thread_id")
+
+        staged_path = ModelRegistry.staging_path()
+
+        try:
+            result = await TrainingEngine.run(
+                trainer, df, feature_columns, target_column, test_size, params, staged_path
+                , key           = key
+                , on_progress   = report
+                , on_queue      = report_queue_position
+            )
+
+            entry = await asyncio.to_thread(ModelRegistry.register, staged_path, {
+                "model_type"    : model_type
+                , "trainer"     : trainer
+                , "features"    : feature_columns
+                , "target"      : target_column
+                , "params"      : {**params, "test_size": test_size}
+                , "metrics"     : result.get("metrics", result)
+                , "dataset"     : {"file_path": file_path, "fingerprint": DatasetStore.fingerprint(file_path)}
+            })
+
+        finally:
+            if os.path.exists(staged_path):
+                os.unlink(staged_path)
+
+        report(f"✅ Training finished, model id {entry['model_id']}")
+        return {"result": result, "model": entry}
+
+    @staticmethod
+    def _busy(error: Exception) -> Dict:
+        logger.warning(f"Training rejected: {str(error)}")
+        return {
+            "status"    : 429
+            , "message" : f"Training is busy, try again shortly ({str(error)})"
+            , "data"    : None
+        }
+
+    @staticmethod
+    def _timed_out(error: Exception, runtime: Optional[ToolRuntime] = None) -> Dict:
+        if runtime and runtime.stream_writer:
+            runtime.stream_writer(f"⏱️ {str(error)}")
+        return {
+            "status"    : 408
+            , "message" : f"Training timed out: {str(error)}"
+            , "data"    : None
+        }
+
     @staticmethod
     @tool("train_linear_regression")
     async def train_linear_regression(
@@ -23,7 +99,7 @@ class MLTools:
         , target_column : str
         , feature_columns: List[str]
         , test_size     : float = 0.2
-        , state         : Annotated[Dict, InjectedState] = None
+        , runtime       : ToolRuntime[None, DSAgentState] = None
     ) -> Dict:
         """
         Train linear regression model
@@ -38,46 +114,35 @@ class MLTools:
             Dict with model metrics and save path
         """
         try:
-            if file_path.endswith('.csv'):
-                df = pd.read_csv(file_path)
-            else:
-                df = pd.read_excel(file_path)
-
-            X = df[feature_columns]
-            y = df[target_column]
-
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=test_size, random_state=42
+            trained = await MLTools._train(
+                "linear_regression", file_path, target_column, feature_columns, test_size, {}
+                , "Linear Regression", runtime
             )
+            metrics = trained["result"]
 
-            model = LinearRegression()
-            model.fit(X_train, y_train)
-
-            y_pred = model.predict(X_test)
-            mse = mean_squared_error(y_test, y_pred)
-            r2 = r2_score(y_test, y_pred)
-
-            model_dir = Path("output/models")
-            model_dir.mkdir(parents=True, exist_ok=True)
-            model_path = str(model_dir / "linear_regression.pkl")
-            joblib.dump(model, model_path)
-
-            logger.info(f"Linear regression trained - R2: {r2:.4f}")
+            logger.info(f"Linear regression trained - R2: {metrics['r2_score']:.4f}")
 
             return {
                 "status"    : 200
                 , "message" : "Model trained successfully"
                 , "data"    : {
                     "model_type"    : "Linear Regression"
-                    , "mse"         : float(mse)
-                    , "rmse"        : float(np.sqrt(mse))
-                    , "r2_score"    : float(r2)
-                    , "model_path"  : model_path
+                    , "mse"         : metrics["mse"]
+                    , "rmse"        : metrics["rmse"]
+                    , "r2_score"    : metrics["r2_score"]
+                    , "model_id"    : trained["model"]["model_id"]
+                    , "model_path"  : trained["model"]["path"]
                     , "features"    : feature_columns
                     , "target"      : target_column
                 }
             }
 
+        except SandboxBusyError as e:
+            return MLTools._busy(e)
+
+        except TimeoutError as e:
+            return MLTools._timed_out(e, runtime)
+
         except Exception as e:
             logger.error(f"Error training linear regression: {str(e)}")
             return {
@@ -95,7 +160,7 @@ class MLTools:
         , task_type     : str = "regression"
         , n_estimators  : int = 100
         , test_size     : float = 0.2
-        , state         : Annotated[Dict, InjectedState] = None
+        , runtime       : ToolRuntime[None, DSAgentState] = None
     ) -> Dict:
         """
         Train random forest model
@@ -112,43 +177,13 @@ class MLTools:
             Dict with model metrics
         """
         try:
-            if file_path.endswith('.csv'):
-                df = pd.read_csv(file_path)
-            else:
-                df = pd.read_excel(file_path)
-
-            X = df[feature_columns]
-            y = df[target_column]
-
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=test_size, random_state=42
+            trained = await MLTools._train(
+                "random_forest", file_path, target_column, feature_columns, test_size
+                , {"task_type": task_type, "n_estimators": n_estimators}
+                , f"Random Forest {task_type.title()}", runtime
             )
-
-            if task_type == "regression":
-                model = RandomForestRegressor(n_estimators=n_estimators, random_state=42)
-                model.fit(X_train, y_train)
-                y_pred = model.predict(X_test)
-
-                metrics = {
-                    "mse"       : float(mean_squared_error(y_test, y_pred))
-                    , "rmse"    : float(np.sqrt(mean_squared_error(y_test, y_pred)))
-                    , "r2_score": float(r2_score(y_test, y_pred))
-                }
-            else:
-                model = RandomForestClassifier(n_estimators=n_estimators, random_state=42)
-                model.fit(X_train, y_train)
-                y_pred = model.predict(X_test)
-
-                metrics = {
-                    "accuracy"  : float(accuracy_score(y_test, y_pred))
-                }
-
-            feature_importance = dict(zip(feature_columns, model.feature_importances_.tolist()))
-
-            model_dir = Path("output/models")
-            model_dir.mkdir(parents=True, exist_ok=True)
-            model_path = str(model_dir / f"random_forest_{task_type}.pkl")
-            joblib.dump(model, model_path)
+            metrics             = trained["result"]["metrics"]
+            feature_importance  = trained["result"]["feature_importance"]
 
             logger.info(f"Random Forest {task_type} trained")
 
@@ -160,10 +195,17 @@ class MLTools:
                     , "n_estimators"        : n_estimators
                     , "metrics"             : metrics
                     , "feature_importance"  : feature_importance
-                    , "model_path"          : model_path
+                    , "model_id"            : trained["model"]["model_id"]
+                    , "model_path"          : trained["model"]["path"]
                 }
             }
 
+        except SandboxBusyError as e:
+            return MLTools._busy(e)
+
+        except TimeoutError as e:
+            return MLTools._timed_out(e, runtime)
+
         except Exception as e:
             logger.error(f"Error training random forest: {str(e)}")
             return {
@@ -177,33 +219,53 @@ class MLTools:
     async def make_prediction(
         model_path  : str
         , input_data: Dict[str, float]
-        , state     : Annotated[Dict, InjectedState] = None
+        , runtime   : ToolRuntime[None, DSAgentState] = None
     ) -> Dict:
         """
         Make prediction using trained model
 
         Args:
-            model_path  : Path to saved model
+            model_path  : Model id returned by a training tool, or path to a saved model
             input_data  : Dict of feature values
 
         Returns:
             Dict with prediction
         """
         try:
-            model = joblib.load(model_path)
+            model, metadata = await asyncio.to_thread(ModelRegistry.load, model_path)
 
             features = pd.DataFrame([input_data])
+
+            if metadata is not None:
+                missing = [name for name in metadata["features"] if name not in input_data]
+                if missing:
+                    return {
+                        "status"    : 400
+                        , "message" : f"Missing features: {missing}"
+                        , "data"    : {"features": metadata["features"]}
+                    }
+
+                features = features[metadata["features"]]
+
             prediction = model.predict(features)
 
             return {
                 "status"    : 200
                 , "message" : "Prediction made"
                 , "data"    : {
-                    "prediction": float(prediction[0])
+                    "prediction": prediction[0].item() if hasattr(prediction[0], "item") else prediction[0]
                     , "input"   : input_data
+                    , "model_id": metadata["model_id"] if metadata else None
                 }
             }
 
+        except FileNotFoundError as e:
+            return {
+                "status"    : 400
+                , "message" : str(e)
+                , "data"    : None
+            }
+
         except Exception as e:
             logger.error(f"Error making prediction: {str(e)}")
             return {
@@ -211,3 +273,29 @@ class MLTools:
                 , "message" : f"Failed to predict: {str(e)}"
                 , "data"    : None
             }
+
+    @staticmethod
+    @tool("list_models")
+    async def list_models() -> Dict:
+        """
+        List registered models
+
+        Returns:
+            Dict with id, type, features, target, metrics and training dataset of each model, newest first
+        """
+        try:
+            models = await asyncio.to_thread(ModelRegistry.list_models)
+
+            return {
+                "status"    : 200
+                , "message" : f"{len(models)} models registered"
+                , "data"    : {"models": models}
+            }
+
+        except Exception as e:
+            logger.error(f"Error listing models: {str(e)}")
+            return {
+                "status"    : 500
+                , "message" : f"Failed to list models: {str(e)}"
+                , "data"    : None
+            }
@@ -0,0 +1,148 @@
+from typing import Dict, Any, List, Optional, Tuple
+from collections import OrderedDict
+from pathlib import Path
+import os
+import json
+import time
+import uuid
+import hashlib
+import threading
+
+import joblib
+
+from app import logger
+from app.core.config import settings
+
+
+MODEL_DIR = Path("output/models")
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+class ModelRegistry:
+    """
+    Content-addressed store of trained models.
+
+    A model artifact is named by the hash of its serialized bytes, so models
+    from different users never overwrite each other and retraining the same
+    model on the same data yields the same id. Each artifact has a JSON
+    sidecar with its type, features, target, metrics, parameters and the
+    fingerprint of the training data.
+
+    Deserialized models are kept in a process-wide LRU of ML_MODEL_CACHE_SIZE
+    entries, so repeated predictions do not touch the disk. Artifacts are
+    immutable, so a cached model can never be stale.
+    """
+
+    _models : "OrderedDict[str, Any]" = OrderedDict()
+    _lock   = threading.Lock()
+
+    @staticmethod
+    def staging_path() -> str:
+        """Where a training job writes its model before register() moves it into place"""
+        MODEL_DIR.mkdir(parents=True, exist_ok=True)
+        return str(MODEL_DIR / f".staging-{uuid.uuid4().hex[:12]}.joblib")
+
+    @staticmethod
+    def _digest(path: str) -> str:
+        digest = hashlib.sha256()
+
+        with open(path, "rb") as handle:
+            for block in iter(lambda: handle.read(HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+
+        return digest.hexdigest()
+
+    @staticmethod
+    def artifact_path(model_id: str) -> Path:
+        return MODEL_DIR / f"{model_id}.joblib"
+
+    @staticmethod
+    def register(staged_path: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Move a staged artifact to its content address and write its metadata"""
+        model_id    = ModelRegistry._digest(staged_path)[:16]
+        path        = ModelRegistry.artifact_path(model_id)
+
+        if path.exists():
+            os.unlink(staged_path)
+        else:
+            os.replace(staged_path, path)
+
+        entry = {
+            **metadata
+            , "model_id"    : model_id
+            , "path"        : str(path)
+            , "bytes"       : path.stat().st_size
+            , "created_at"  : time.time()
+        }
+
+        sidecar     = path.with_suffix(".json")
+        tmp_sidecar = sidecar.with_name(f".{sidecar.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_sidecar.write_text(json.dumps(entry, default=str))
+        os.replace(tmp_sidecar, sidecar)
+
+        logger.info(f"Registered model {model_id} ({metadata.get('model_type')}): {path}")
+
+        return entry
+
+    @staticmethod
+    def get(model_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(ModelRegistry.artifact_path(model_id).with_suffix(".json").read_text())
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def list_models() -> List[Dict[str, Any]]:
+        """Metadata of every registered model, newest first"""
+        if not MODEL_DIR.exists():
+            return []
+
+        entries = []
+        for sidecar in MODEL_DIR.glob("*.json"):
+            try:
+                entries.append(json.loads(sidecar.read_text()))
+            except (OSError, ValueError):
+                continue
+
+        return sorted(entries, key=lambda entry: entry.get("created_at", 0), reverse=True)
+
+    @staticmethod
+    def resolve(model_ref: str) -> Tuple[str, str, Optional[Dict[str, Any]]]:
+        """
+        Cache key, artifact path and metadata of a model id, or of a plain
+        model file path (metadata None). Plain files are keyed by mtime too,
+        since they can be overwritten.
+        """
+        metadata = ModelRegistry.get(model_ref) if "/" not in model_ref else None
+
+        if metadata is not None:
+            return model_ref, metadata["path"], metadata
+
+        path = Path(model_ref)
+        if not path.is_file():
+            raise FileNotFoundError(f"Unknown model '{model_ref}'")
+
+        return f"{path.resolve()}:{path.stat().st_mtime_ns}", str(path), None
+
+    @staticmethod
+    def load(model_ref: str) -> Tuple[Any, Optional[Dict[str, Any]]]:
+        """The deserialized model and its metadata, from the warm cache when possible"""
+        key, path, metadata = ModelRegistry.resolve(model_ref)
+
+        with ModelRegistry._lock:
+            model = ModelRegistry._models.get(key)
+            if model is not None:
+                ModelRegistry._models.move_to_end(key)
+                return model, metadata
+
+        model = joblib.load(path)
+
+        with ModelRegistry._lock:
+            ModelRegistry._models[key] = model
+
+            while len(ModelRegistry._models) > settings.ML_MODEL_CACHE_SIZE:
+                ModelRegistry._models.popitem(last=False)
+
+        logger.info(f"Loaded model {model_ref} into the model cache")
+
+        return model, metadata
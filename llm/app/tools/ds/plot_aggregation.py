@@ -0,0 +1,67 @@
+from typing import Dict, Any, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# Box plots draw at most this many outliers, evenly spaced over the sorted
+# outliers so both extremes are kept
+MAX_FLIERS = 1000
+
+
+def is_aggregatable(series: pd.Series) -> bool:
+    """Only numeric columns are binned; others (categories, strings, dates) are drawn from their values"""
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+
+def histogram_counts(values: np.ndarray, bins: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Bin counts and edges, as matplotlib's hist would compute them"""
+    return np.histogram(values, bins=bins)
+
+
+def density_grid(x: np.ndarray, y: np.ndarray, bins: int) -> Dict[str, Any]:
+    """
+    Point counts on a bins x bins grid over the rows where both x and y are
+    present; a scatter of millions of points is drawn as this image.
+    """
+    x       = np.asarray(x, dtype=np.float64)
+    y       = np.asarray(y, dtype=np.float64)
+    present = ~(np.isnan(x) | np.isnan(y))
+
+    counts, x_edges, y_edges = np.histogram2d(x[present], y[present], bins=bins)
+
+    return {
+        "counts"    : counts
+        , "x_edges" : x_edges
+        , "y_edges" : y_edges
+        , "points"  : int(present.sum())
+    }
+
+
+def box_summary(values: np.ndarray, label: str) -> Dict[str, Any]:
+    """
+    Box plot statistics in the form Axes.bxp takes (1.5 IQR whiskers, as
+    Axes.boxplot uses), with at most MAX_FLIERS outliers, plus the full
+    outlier count.
+    """
+    values          = np.asarray(values, dtype=np.float64)
+    q1, med, q3     = np.percentile(values, [25, 50, 75])
+    iqr             = q3 - q1
+    low, high       = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+
+    inside          = values[(values >= low) & (values <= high)]
+    fliers          = np.sort(values[(values < low) | (values > high)])
+
+    if len(fliers) > MAX_FLIERS:
+        fliers = fliers[np.linspace(0, len(fliers) - 1, MAX_FLIERS).astype(int)]
+
+    return {
+        "label"             : label
+        , "q1"              : q1
+        , "med"             : med
+        , "q3"              : q3
+        , "whislo"          : inside.min() if len(inside) else q1
+        , "whishi"          : inside.max() if len(inside) else q3
+        , "fliers"          : fliers
+        , "outlier_count"   : int(len(values) - len(inside))
+    }
@@ -0,0 +1,108 @@
+from typing import Dict, Any, Optional, Tuple
+from pathlib import Path
+import os
+import re
+import json
+import hashlib
+import threading
+
+from app import logger
+from app.core.config import settings
+from app.tools.ds.dataset_store import DatasetStore
+from app.tools.ds.plot_export import PLOT_DIR
+from app.tools.ds.render_pool import STYLE_VERSION
+
+
+# Names of the files resolve() creates; the plots directory also holds
+# sandbox exports and HTML, which are not this cache's to evict
+CACHED_PLOT_NAME = re.compile(r"^[a-z_]+_[0-9a-f]{24}\.(png|json)$")
+
+
+class PlotCache:
+    """
+    Content-addressed VizTools plots.
+
+    A plot is named by a hash of the source fingerprint, the tool, its
+    parameters and the renderers' STYLE_VERSION, so identical requests share
+    one file and a changed dataset never serves an old plot. Values the tool
+    returns next to the plot (outlier counts, ...) are kept in a JSON
+    sidecar. Cached plots are kept under VIZ_PLOT_CACHE_MB in total by removing
+    the least recently used ones; hits refresh a plot's mtime.
+    """
+
+    _lock = threading.Lock()
+
+    @staticmethod
+    def resolve(
+        file_path   : str
+        , tool      : str
+        , params    : Dict[str, Any]
+    ) -> Tuple[Optional[Path], Optional[Dict[str, Any]]]:
+        """
+        Cache path of a plot and, on a hit, the values stored with it.
+        The path is None when the dataset cannot be fingerprinted.
+        """
+        fingerprint = DatasetStore.fingerprint(file_path)
+        if not fingerprint:
+            return None, None
+
+        key_data    = json.dumps(
+            {"dataset": fingerprint, "tool": tool, "params": params, "style": STYLE_VERSION}
+            , sort_keys=True, default=str
+        )
+        key         = hashlib.sha256(key_data.encode()).hexdigest()[:24]
+        path        = PLOT_DIR / f"{tool}_{key}.png"
+        sidecar     = path.with_suffix(".json")
+
+        try:
+            extras = json.loads(sidecar.read_text())
+            os.utime(path)
+            os.utime(sidecar)
+            return path, extras
+        except (OSError, ValueError):
+            return path, None
+
+    @staticmethod
+    def temp_path(path: Path) -> Path:
+        """Where to render a plot before store() moves it into place"""
+        PLOT_DIR.mkdir(parents=True, exist_ok=True)
+        return path.with_name(f".{path.stem}.{os.getpid()}.{threading.get_ident()}.png")
+
+    @staticmethod
+    def store(rendered: Path, path: Path, extras: Optional[Dict[str, Any]] = None):
+        """Move a rendered plot into the cache, then evict if the directory is over its limit"""
+        os.replace(rendered, path)
+
+        sidecar     = path.with_suffix(".json")
+        tmp_sidecar = sidecar.with_name(f".{sidecar.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_sidecar.write_text(json.dumps(extras or {}, default=str))
+        os.replace(tmp_sidecar, sidecar)
+
+        PlotCache.evict()
+
+    @staticmethod
+    def evict(max_bytes: Optional[int] = None):
+        """Remove the least recently used cached plots until they fit in max_bytes"""
+        max_bytes = max_bytes if max_bytes is not None else settings.VIZ_PLOT_CACHE_MB * 1024 * 1024
+
+        with PlotCache._lock:
+            files = []
+            for entry in os.scandir(PLOT_DIR):
+                if entry.is_file() and CACHED_PLOT_NAME.match(entry.name):
+                    stat_info = entry.stat()
+                    files.append((stat_info.st_mtime, stat_info.st_size, Path(entry.path)))
+
+            total = sum(size for _, size, _ in files)
+            if total <= max_bytes:
+                return
+
+            removed = 0
+            for _, size, path in sorted(files):
+                if total <= max_bytes:
+                    break
+
+                path.unlink(missing_ok=True)
+                total   -= size
+                removed += 1
+
+            logger.info(f"Evicted {removed} cached plot files, cache now {total / 1024 / 1024:.1f} MB")
@@ -0,0 +1,90 @@
+from typing import Dict, Any, List, Optional, Tuple
+from pathlib import Path
+import io
+import os
+import hashlib
+
+from app.core.config import settings
+
+
+PLOT_DIR = Path("output/plots")
+
+
+def _encode(image, plot_format: str) -> Tuple[bytes, str]:
+    buffer = io.BytesIO()
+
+    if plot_format == "webp":
+        try:
+            image.save(buffer, format="WEBP", quality=90, method=4)
+            return buffer.getvalue(), "webp"
+        except (KeyError, OSError):
+            buffer = io.BytesIO()
+
+    image.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue(), "png"
+
+
+def _store(data: bytes, extension: str, suffix: str = "") -> str:
+    """Write data under its content hash; identical plots are stored once"""
+    digest  = hashlib.sha256(data).hexdigest()[:24]
+    path    = PLOT_DIR / f"{digest}{suffix}.{extension}"
+
+    if not path.exists():
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+    return str(path)
+
+
+def export_figures(
+    dpi         : int = 150
+    , figsize   : Optional[Tuple[float, float]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Save every open matplotlib figure with a thumbnail.
+
+    Each figure is rendered once; the full-size image is re-encoded as WebP
+    (or optimized PNG) and downscaled for the thumbnail by Pillow. Files are
+    named by content hash so re-running the same plot reuses the same file.
+    """
+    import matplotlib.pyplot as plt
+    from PIL import Image
+
+    PLOT_DIR.mkdir(parents=True, exist_ok=True)
+
+    plot_format     = settings.SANDBOX_PLOT_FORMAT.lower()
+    thumbnail_size  = settings.SANDBOX_PLOT_THUMBNAIL_SIZE
+    exported        = []
+
+    for fig_num in plt.get_fignums()[:settings.SANDBOX_MAX_PLOTS]:
+        fig = plt.figure(fig_num)
+
+        if figsize:
+            fig.set_size_inches(figsize[0], figsize[1])
+
+        rendered = io.BytesIO()
+        fig.savefig(rendered, format="png", dpi=dpi, bbox_inches="tight")
+        rendered.seek(0)
+
+        with Image.open(rendered) as image:
+            image.load()
+            width, height = image.size
+
+            data, extension = _encode(image, plot_format)
+            plot_path       = _store(data, extension)
+
+            thumbnail = image.copy()
+            thumbnail.thumbnail((thumbnail_size, thumbnail_size))
+            thumb_data, thumb_extension = _encode(thumbnail, plot_format)
+
+        exported.append({
+            "path"              : plot_path
+            , "thumbnail_path"  : _store(thumb_data, thumb_extension, suffix="_thumb")
+            , "format"          : extension
+            , "width"           : width
+            , "height"          : height
+            , "bytes"           : len(data)
+        })
+
+    return exported
@@ -0,0 +1,295 @@
+from typing import Dict, Any, Optional
+from pathlib import Path
+import os
+import json
+import asyncio
+import threading
+
+import numpy as np
+import pandas as pd
+
+from app import logger
+from app.tools.ds.dataset_store import DatasetStore
+from app.tools.ds.dataset_cache import DatasetCache
+from app.tools.ds.sketches import Moments, use_sketches
+from app.tools.ds.running_stats import RunningStats
+from app.tools.ds import dataset_profiler
+
+
+PROFILE_DIR = Path("output/profiles")
+MAX_LOADED_PROFILES = 64
+TOP_VALUES = 10
+HISTOGRAM_BINS = 20
+
+
+def _exact_column(series: pd.Series) -> Dict[str, Any]:
+    present = series.dropna()
+
+    profile = {
+        "dtype"         : str(series.dtype)
+        , "count"       : int(len(present))
+        , "missing"     : int(len(series) - len(present))
+        , "unique"      : int(present.nunique())
+        , "approximate" : False
+    }
+
+    if pd.api.types.is_numeric_dtype(series):
+        values  = present.to_numpy(dtype=np.float64)
+        moments = Moments.of(values)
+
+        if len(values):
+            q25, q50, q75   = np.quantile(values, [0.25, 0.50, 0.75])
+            counts, edges   = np.histogram(values, bins=HISTOGRAM_BINS)
+        else:
+            q25 = q50 = q75 = float("nan")
+
+        profile.update({
+            "mean"          : moments.mean if moments.n else float("nan")
+            , "std"         : float(np.sqrt(moments.variance))
+            , "variance"    : moments.variance
+            , "min"         : moments.min if moments.n else float("nan")
+            , "max"         : moments.max if moments.n else float("nan")
+            , "q25"         : float(q25)
+            , "q50"         : float(q50)
+            , "q75"         : float(q75)
+            , "skewness"    : moments.skewness
+            , "kurtosis"    : moments.kurtosis
+            , "histogram"   : {"edges": edges.tolist(), "counts": counts.tolist()} if len(values) else None
+        })
+    else:
+        top = present.value_counts().head(TOP_VALUES)
+        profile["top_values"] = {str(value): int(count) for value, count in top.items()}
+
+    return profile
+
+
+class ProfileIndex:
+    """
+    Per-dataset profile sidecars: the read_csv summary plus, for every
+    column, dtype, counts, distinct values, moments, quantiles, top values
+    and a histogram.
+
+    Sidecars are JSON files named by the source fingerprint that
+    DatasetStore and DSCodeMemoryMiddleware use, so an overwritten upload
+    never serves a stale profile. Profiles of files loaded whole are exact;
+    files above DATASET_STREAMING_THRESHOLD_MB are profiled from sketches
+    and their columns carry approximate=True with error bounds.
+
+    CSVs also keep their mergeable RunningStats, so a later export with
+    rows appended is profiled from the new rows only.
+    """
+
+    _profiles   : Dict[str, Dict[str, Any]] = {}
+    _building   : set = set()
+    _scheduled  : Dict[Path, asyncio.Future] = {}
+    _lock       = threading.Lock()
+
+    @staticmethod
+    def sidecar_path(file_path: str) -> Optional[Path]:
+        file_hash = DatasetStore.fingerprint(file_path)
+        if not file_hash:
+            return None
+
+        return PROFILE_DIR / f"{file_hash}.json"
+
+    @staticmethod
+    def lookup(file_path: str) -> Optional[Dict[str, Any]]:
+        path = ProfileIndex.sidecar_path(file_path)
+        if path is None:
+            return None
+
+        profile = ProfileIndex._profiles.get(path.stem)
+        if profile is not None:
+            return profile
+
+        if not path.exists():
+            return None
+
+        try:
+            profile = json.loads(path.read_text())
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unreadable profile sidecar {path}: {str(e)}")
+            return None
+
+        ProfileIndex._remember(path.stem, profile)
+        return profile
+
+    @staticmethod
+    def column(
+        file_path       : str
+        , column        : str
+        , approximate   : Optional[bool] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Indexed statistics of a column. Sketched statistics are only served
+        where use_sketches() would have sketched the column itself: an
+        explicit approximate choice, else above APPROX_STATS_ROW_THRESHOLD rows.
+        """
+        profile = ProfileIndex.lookup(file_path)
+        if profile is None:
+            return None
+
+        stats = profile["column_stats"].get(column)
+
+        if stats is not None and stats["approximate"]:
+            if not use_sketches(stats["count"] + stats["missing"], approximate):
+                return None
+
+        return stats
+
+    @staticmethod
+    def _remember(file_hash: str, profile: Dict[str, Any]):
+        with ProfileIndex._lock:
+            if len(ProfileIndex._profiles) >= MAX_LOADED_PROFILES:
+                ProfileIndex._profiles.pop(next(iter(ProfileIndex._profiles)))
+
+            ProfileIndex._profiles[file_hash] = profile
+
+    @staticmethod
+    def save(file_path: str, profile: Dict[str, Any]) -> Optional[str]:
+        path = ProfileIndex.sidecar_path(file_path)
+        if path is None:
+            return None
+
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+
+        try:
+            tmp_path.write_text(json.dumps(profile, default=str))
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+        ProfileIndex._remember(path.stem, profile)
+        logger.info(f"Wrote profile index for {file_path}: {path}")
+
+        return str(path)
+
+    @staticmethod
+    def from_frame(df: pd.DataFrame) -> Dict[str, Any]:
+        return {
+            "rows"          : len(df)
+            , "columns"     : len(df.columns)
+            , "column_names": df.columns.tolist()
+            , "dtypes"      : df.dtypes.astype(str).to_dict()
+            , "missing"     : {column: int(count) for column, count in df.isnull().sum().items()}
+            , "preview"     : df.head(dataset_profiler.PREVIEW_ROWS).to_dict(orient='records')
+            , "column_stats": {column: _exact_column(df[column]) for column in df.columns}
+        }
+
+    @staticmethod
+    def from_streaming(profiler: "dataset_profiler.StreamingProfiler") -> Dict[str, Any]:
+        profile         = profiler.summary()
+        column_stats    = {}
+
+        for column, dtype in profile["dtypes"].items():
+            sketch = profiler.sketches.get(column)
+
+            if sketch is None:
+                continue
+
+            sketch.dtype            = dtype
+            column_stats[column]    = sketch.profile(top_values=TOP_VALUES, bins=HISTOGRAM_BINS)
+
+        profile["column_stats"] = column_stats
+        return profile
+
+    @staticmethod
+    def schedule(file_path: str) -> Optional[asyncio.Future]:
+        """
+        Build the profile in the default executor, from a tool call that missed
+        the index. A build already scheduled for the file is reused, so
+        repeated misses do not queue more full-file profiling runs.
+        """
+        path = ProfileIndex.sidecar_path(file_path)
+        if path is None:
+            return None
+
+        future = ProfileIndex._scheduled.get(path)
+        if future is not None and not future.done():
+            return future
+
+        future = asyncio.get_running_loop().run_in_executor(None, ProfileIndex.build, file_path)
+        ProfileIndex._scheduled[path] = future
+
+        def finished(done: asyncio.Future):
+            if ProfileIndex._scheduled.get(path) is done:
+                del ProfileIndex._scheduled[path]
+
+            if not done.cancelled() and done.exception() is not None:
+                logger.error(f"Profile index build for {file_path} failed: {str(done.exception())}")
+
+        future.add_done_callback(finished)
+        return future
+
+    @staticmethod
+    def build(file_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Profile a dataset and write its sidecar; runs at upload time and after
+        the first read. Concurrent builds of the same file are skipped.
+        """
+        path = ProfileIndex.sidecar_path(file_path)
+        if path is None:
+            return None
+
+        profile = ProfileIndex.lookup(file_path)
+        if profile is not None:
+            return profile
+
+        with ProfileIndex._lock:
+            if path in ProfileIndex._building:
+                return None
+            ProfileIndex._building.add(path)
+
+        try:
+            if file_path.endswith('.csv'):
+                profile = ProfileIndex._build_csv(file_path)
+            else:
+                profile = ProfileIndex.from_frame(DatasetCache.load(file_path))
+
+            ProfileIndex.save(file_path, profile)
+            return profile
+
+        except Exception as e:
+            logger.error(f"Failed to build profile index for {file_path}: {str(e)}")
+            return None
+
+        finally:
+            with ProfileIndex._lock:
+                ProfileIndex._building.discard(path)
+
+    @staticmethod
+    def _build_csv(file_path: str) -> Dict[str, Any]:
+        stats = RunningStats.extend(file_path)
+        large = dataset_profiler.should_stream(file_path)
+
+        if stats is None and large:
+            stats = RunningStats.scan(file_path)
+
+        if large:
+            profile = ProfileIndex.from_streaming(stats)
+        else:
+            df      = DatasetCache.load(file_path)
+            profile = ProfileIndex.from_frame(df)
+            stats   = stats or RunningStats.of_frame(df)
+
+        stats.save(file_path)
+        return profile
+
+    @staticmethod
+    def extend(file_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Sketch-based profile of a CSV that extends a previously profiled
+        one, built from the appended rows only; None when there is no such
+        earlier file.
+        """
+        stats = RunningStats.extend(file_path)
+        if stats is None:
+            return None
+
+        profile = ProfileIndex.from_streaming(stats)
+
+        ProfileIndex.save(file_path, profile)
+        stats.save(file_path)
+
+        return profile
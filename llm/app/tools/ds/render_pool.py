@@ -0,0 +1,182 @@
+from typing import Dict, Any, Callable, Optional
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import io
+import atexit
+import asyncio
+import threading
+
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.figure import Figure
+from matplotlib.colors import LogNorm
+import seaborn as sns
+
+from app import logger
+from app.core.config import settings
+
+
+# Renderers run in the pool's worker processes. Each builds its own Figure
+# through the object-oriented API, so no pyplot global state is shared
+# between plots, and only plain arrays or small frames cross the process
+# boundary.
+
+# Part of every plot cache key; bump it when a renderer's output changes
+STYLE_VERSION = 1
+
+def render_histogram(counts: np.ndarray, edges: np.ndarray, column: str, output_path: str):
+    """Histogram from precomputed bin counts; drawing cost does not depend on the row count"""
+    fig = Figure(figsize=(10, 6))
+    ax  = fig.subplots()
+
+    ax.hist(edges[:-1], bins=edges, weights=counts, edgecolor='black')
+    ax.set_xlabel(column)
+    ax.set_ylabel('Frequency')
+    ax.set_title(f'Histogram of {column}')
+    ax.grid(True, alpha=0.3)
+
+    fig.savefig(output_path, dpi=150, bbox_inches='tight')
+
+
+def render_histogram_values(values: np.ndarray, bins: int, column: str, output_path: str):
+    """Histogram of raw values, for columns histogram_counts cannot bin (categories, strings)"""
+    fig = Figure(figsize=(10, 6))
+    ax  = fig.subplots()
+
+    ax.hist(values, bins=bins, edgecolor='black')
+    ax.set_xlabel(column)
+    ax.set_ylabel('Frequency')
+    ax.set_title(f'Histogram of {column}')
+    ax.grid(True, alpha=0.3)
+
+    fig.savefig(output_path, dpi=150, bbox_inches='tight')
+
+
+def render_scatter(x: np.ndarray, y: np.ndarray, x_column: str, y_column: str, output_path: str):
+    fig = Figure(figsize=(10, 6))
+    ax  = fig.subplots()
+
+    ax.scatter(x, y, alpha=0.6)
+    ax.set_xlabel(x_column)
+    ax.set_ylabel(y_column)
+    ax.set_title(f'{y_column} vs {x_column}')
+    ax.grid(True, alpha=0.3)
+
+    fig.savefig(output_path, dpi=150, bbox_inches='tight')
+
+
+def render_density(density: Dict[str, Any], x_column: str, y_column: str, output_path: str):
+    """Scatter of many points as a log-scaled 2D density image (see plot_aggregation.density_grid)"""
+    fig     = Figure(figsize=(10, 6))
+    ax      = fig.subplots()
+    counts  = np.ma.masked_equal(density["counts"].T, 0)
+
+    mesh = ax.pcolormesh(
+        density["x_edges"], density["y_edges"], counts
+        , norm = LogNorm(vmin=1, vmax=max(counts.max(), 1)) if counts.count() else None
+        , cmap = 'viridis'
+    )
+    fig.colorbar(mesh, ax=ax, label='Points per bin')
+
+    ax.set_xlabel(x_column)
+    ax.set_ylabel(y_column)
+    ax.set_title(f'{y_column} vs {x_column} ({density["points"]:,} points)')
+    ax.grid(True, alpha=0.3)
+
+    fig.savefig(output_path, dpi=150, bbox_inches='tight')
+
+
+def render_heatmap(corr: pd.DataFrame, output_path: str):
+    fig = Figure(figsize=(12, 10))
+    ax  = fig.subplots()
+
+    sns.heatmap(corr, annot=True, fmt='.2f', cmap='coolwarm', center=0, ax=ax)
+    ax.set_title('Correlation Heatmap')
+
+    fig.tight_layout()
+    fig.savefig(output_path, dpi=150, bbox_inches='tight')
+
+
+def render_box_plot(summary: Dict[str, Any], column: str, output_path: str):
+    """Box plot from precomputed statistics (see plot_aggregation.box_summary)"""
+    fig = Figure(figsize=(10, 6))
+    ax  = fig.subplots()
+
+    ax.bxp([{k: v for k, v in summary.items() if k != "outlier_count"}], vert=False)
+    ax.set_xlabel(column)
+    ax.set_title(f'Box Plot of {column}')
+    ax.grid(True, alpha=0.3)
+
+    fig.savefig(output_path, dpi=150, bbox_inches='tight')
+
+
+def _warm_worker():
+    """Load fonts and the Agg canvas once, so the first real plot does not pay for it"""
+    fig = Figure(figsize=(1, 1))
+    fig.subplots().plot([0, 1])
+    fig.savefig(io.BytesIO(), format='png')
+
+
+class RenderPool:
+    """
+    Worker processes that render the VizTools plots.
+
+    Rendering is CPU-bound and holds the GIL, so running it on the event
+    loop (or in a thread) stalls every SSE stream in the process. Workers
+    are started on first use with matplotlib and seaborn already imported
+    and warmed up; a pool broken by a crashed worker is replaced.
+    """
+
+    _executor   : Optional[ProcessPoolExecutor] = None
+    _lock       = threading.Lock()
+
+    @staticmethod
+    def _get_executor() -> ProcessPoolExecutor:
+        with RenderPool._lock:
+            if RenderPool._executor is None:
+                RenderPool._executor = ProcessPoolExecutor(
+                    max_workers = settings.VIZ_RENDER_WORKERS
+                    , initializer = _warm_worker
+                )
+                logger.info(f"Started render pool with {settings.VIZ_RENDER_WORKERS} workers")
+
+            return RenderPool._executor
+
+    @staticmethod
+    def _discard(executor: ProcessPoolExecutor):
+        with RenderPool._lock:
+            if RenderPool._executor is executor:
+                RenderPool._executor = None
+
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    async def render(renderer: Callable[..., Any], *args) -> Any:
+        """Run renderer(*args) in a worker process and await its result"""
+        loop = asyncio.get_running_loop()
+
+        for attempt in range(2):
+            executor = RenderPool._get_executor()
+
+            try:
+                return await loop.run_in_executor(executor, renderer, *args)
+            except BrokenProcessPool:
+                logger.warning("Render pool broke (worker died), restarting it")
+                RenderPool._discard(executor)
+
+                if attempt:
+                    raise
+
+    @staticmethod
+    def shutdown():
+        with RenderPool._lock:
+            executor, RenderPool._executor = RenderPool._executor, None
+
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+            logger.info("Render pool shut down")
+
+
+atexit.register(RenderPool.shutdown)
@@ -0,0 +1,346 @@
+from typing import Dict, Any, List, Optional, Set, Tuple
+from pathlib import Path
+import os
+import json
+import pickle
+import hashlib
+import threading
+
+import numpy as np
+import pandas as pd
+
+from app import logger
+from app.core.config import settings
+from app.tools.ds.dataset_store import DatasetStore
+from app.tools.ds.dataset_profiler import StreamingProfiler
+
+
+STATE_DIR = Path("output/profiles/state")
+LINEAGE_DIR = Path("output/profiles/lineage")
+MAX_LINEAGE_STATES = 8
+MAX_LOADED_STATES = 8
+MAX_CORRELATION_COLUMNS = 256
+HASH_BLOCK_SIZE = 16 * 1024 * 1024
+
+# Saved states of another version are ignored; bump it when the sketches
+# hash or fold values differently, so old and new registers are never merged
+STATE_VERSION = 2
+
+
+class CorrelationStats:
+    """
+    Sufficient statistics for pairwise-complete Pearson correlations.
+
+    For every pair of columns: the number of rows where both are present and
+    the sums of x, x^2 and x*y over those rows. Plain sums merge by addition,
+    so appended rows are folded in without revisiting old ones. Values are
+    shifted by the first chunk's means to keep the sums well conditioned.
+    """
+
+    def __init__(self, columns: List[str]):
+        p               = len(columns)
+        self.columns    = columns
+        self.shift      : Optional[np.ndarray] = None
+        self.count      = np.zeros((p, p))
+        self.sums       = np.zeros((p, p))
+        self.squares    = np.zeros((p, p))
+        self.products   = np.zeros((p, p))
+
+    def update(self, chunk: pd.DataFrame):
+        X       = chunk[self.columns].to_numpy(dtype=np.float64)
+        present = ~np.isnan(X)
+
+        if self.shift is None:
+            counts      = present.sum(axis=0)
+            self.shift  = np.where(counts > 0, np.nansum(X, axis=0) / np.maximum(counts, 1), 0.0)
+
+        M = present.astype(np.float64)
+        Z = np.where(present, X - self.shift, 0.0)
+
+        self.count      += M.T @ M
+        self.sums       += Z.T @ M
+        self.squares    += (Z * Z).T @ M
+        self.products   += Z.T @ Z
+
+    def covers(self, columns: Optional[List[str]]) -> bool:
+        return not columns or set(columns) <= set(self.columns)
+
+    def pearson(self, columns: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Correlation matrix and pairwise observation counts of columns"""
+        position    = {column: i for i, column in enumerate(self.columns)}
+        index       = np.ix_([position[c] for c in columns], [position[c] for c in columns])
+
+        n, s, q     = self.count[index], self.sums[index], self.squares[index]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov     = self.products[index] - s * s.T / n
+            var     = q - s ** 2 / n
+            r       = cov / np.sqrt(var * var.T)
+
+        return r, n
+
+
+class RunningStats(StreamingProfiler):
+    """
+    Mergeable statistics of one CSV: the streaming profile (exact moments,
+    distinct count, quantile and top-value sketches per column) plus the
+    correlation sums, with the size and digest of the bytes they cover.
+
+    States are pickled per fingerprint and indexed by the file's header
+    line. When a new file starts with exactly the bytes of a file profiled
+    earlier (a re-export with rows appended), extend() parses only the new
+    rows and folds them into that state. The prefix is checked by hashing
+    only the earlier file's bytes, which is much cheaper than parsing them
+    again; the new digest continues that hash over the appended bytes.
+    """
+
+    _loaded : Dict[str, "RunningStats"] = {}
+    _lock   = threading.Lock()
+
+    def __init__(self):
+        super().__init__()
+        self.correlation    : Optional[CorrelationStats] = None
+        self.size           = 0
+        self.digest         = ""
+        self.version        = STATE_VERSION
+
+    def update(self, chunk: pd.DataFrame):
+        first = self.preview is None
+        super().update(chunk)
+
+        if first:
+            numeric = [
+                column for column in chunk.columns
+                if pd.api.types.is_numeric_dtype(chunk[column]) and not pd.api.types.is_bool_dtype(chunk[column])
+            ]
+            if 2 <= len(numeric) <= MAX_CORRELATION_COLUMNS:
+                self.correlation = CorrelationStats(numeric)
+
+        if self.correlation is not None:
+            try:
+                self.correlation.update(chunk)
+            except (ValueError, TypeError):
+                # A column stopped being numeric
+                self.correlation = None
+
+    @staticmethod
+    def of_frame(df: pd.DataFrame) -> "RunningStats":
+        stats       = RunningStats()
+        chunk_rows  = settings.DATASET_PROFILE_CHUNK_ROWS
+
+        for start in range(0, max(len(df), 1), chunk_rows):
+            stats.update(df.iloc[start:start + chunk_rows])
+
+        return stats
+
+    @staticmethod
+    def scan(file_path: str) -> "RunningStats":
+        stats = RunningStats()
+
+        with pd.read_csv(file_path, chunksize=settings.DATASET_PROFILE_CHUNK_ROWS) as reader:
+            for chunk in reader:
+                stats.update(chunk)
+
+        return stats
+
+    @staticmethod
+    def _hash(file_path: str, offsets: Set[int]) -> Dict[int, "hashlib._Hash"]:
+        """
+        md5 of the file's first offset bytes for each offset, in one pass that
+        stops at the largest offset. The hashes can be continued with update().
+        """
+        digest      = hashlib.md5()
+        prefixes    = {}
+        pending     = sorted(offsets)
+        position    = 0
+
+        with open(file_path, "rb") as handle:
+            while pending:
+                while pending and pending[0] == position:
+                    prefixes[pending.pop(0)] = digest.copy()
+
+                if not pending:
+                    break
+
+                block = handle.read(min(HASH_BLOCK_SIZE, pending[0] - position))
+                if not block:
+                    break
+
+                digest.update(block)
+                position += len(block)
+
+        return prefixes
+
+    @staticmethod
+    def _header_key(file_path: str) -> str:
+        with open(file_path, "rb") as handle:
+            return hashlib.md5(handle.readline()).hexdigest()
+
+    @staticmethod
+    def _lineage_path(file_path: str) -> Path:
+        return LINEAGE_DIR / f"{RunningStats._header_key(file_path)}.json"
+
+    @staticmethod
+    def _lineage(path: Path) -> List[Dict[str, Any]]:
+        try:
+            return json.loads(path.read_text()) if path.exists() else []
+        except (OSError, ValueError):
+            return []
+
+    @staticmethod
+    def _read(fingerprint: str) -> Optional["RunningStats"]:
+        path = STATE_DIR / f"{fingerprint}.pkl"
+
+        try:
+            with open(path, "rb") as handle:
+                state = pickle.load(handle)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Unreadable statistics state {path}: {str(e)}")
+            return None
+
+        return state if getattr(state, "version", 1) == STATE_VERSION else None
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+
+        try:
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    @staticmethod
+    def lookup(file_path: str) -> Optional["RunningStats"]:
+        """State of the file as it is now (by fingerprint), if one was saved"""
+        fingerprint = DatasetStore.fingerprint(file_path)
+        if not fingerprint:
+            return None
+
+        stats = RunningStats._loaded.get(fingerprint)
+        if stats is not None:
+            return stats
+
+        stats = RunningStats._read(fingerprint)
+        if stats is not None:
+            RunningStats._remember(fingerprint, stats)
+
+        return stats
+
+    @staticmethod
+    def _remember(fingerprint: str, stats: "RunningStats"):
+        with RunningStats._lock:
+            if len(RunningStats._loaded) >= MAX_LOADED_STATES:
+                RunningStats._loaded.pop(next(iter(RunningStats._loaded)))
+
+            RunningStats._loaded[fingerprint] = stats
+
+    def save(self, file_path: str) -> Optional[str]:
+        """
+        Pickle the state under the file's fingerprint and record it in the
+        lineage of its header, so later exports of the same file can extend
+        it. Only the newest MAX_LINEAGE_STATES states per header are kept.
+        """
+        fingerprint = DatasetStore.fingerprint(file_path)
+        if not fingerprint:
+            return None
+
+        try:
+            if not self.digest:
+                self.size       = os.path.getsize(file_path)
+                self.digest     = RunningStats._hash(file_path, {self.size})[self.size].hexdigest()
+
+            path = STATE_DIR / f"{fingerprint}.pkl"
+            RunningStats._write_atomic(path, pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL))
+            RunningStats._remember(fingerprint, self)
+
+            lineage_path = RunningStats._lineage_path(file_path)
+
+            with RunningStats._lock:
+                entries = [
+                    entry for entry in RunningStats._lineage(lineage_path)
+                    if entry["fingerprint"] != fingerprint
+                ]
+                entries.append({"fingerprint": fingerprint, "size": self.size, "digest": self.digest})
+
+                for entry in entries[:-MAX_LINEAGE_STATES]:
+                    (STATE_DIR / f"{entry['fingerprint']}.pkl").unlink(missing_ok=True)
+
+                RunningStats._write_atomic(
+                    lineage_path, json.dumps(entries[-MAX_LINEAGE_STATES:]).encode()
+                )
+
+            return str(path)
+
+        except Exception as e:
+            logger.error(f"Failed to save statistics state for {file_path}: {str(e)}")
+            return None
+
+    @staticmethod
+    def extend(file_path: str) -> Optional["RunningStats"]:
+        """
+        The state of a file that extends a previously profiled one: the
+        longest matching earlier state with the rows after it folded in.
+        None when no earlier file is a byte prefix of this one.
+        """
+        size        = os.path.getsize(file_path)
+        candidates  = [
+            entry for entry in RunningStats._lineage(RunningStats._lineage_path(file_path))
+            if 0 < entry["size"] <= size
+        ]
+
+        if not candidates:
+            return None
+
+        # Only the earlier files' bytes are hashed, not the appended rows
+        prefixes = RunningStats._hash(file_path, {entry["size"] for entry in candidates})
+
+        base = None
+        for entry in sorted(candidates, key=lambda e: e["size"], reverse=True):
+            prefix = prefixes.get(entry["size"])
+            if prefix is None or prefix.hexdigest() != entry["digest"]:
+                continue
+
+            base = RunningStats._read(entry["fingerprint"])
+            if base is not None:
+                digest = prefix
+                break
+
+        if base is None:
+            return None
+
+        if base.size < size:
+            with open(file_path, "rb") as handle:
+                handle.seek(base.size - 1)
+
+                # The earlier file must end on a record boundary
+                if handle.read(1) != b"\n":
+                    return None
+
+                # Continue the prefix hash over the appended bytes for the new state
+                for block in iter(lambda: handle.read(HASH_BLOCK_SIZE), b""):
+                    digest.update(block)
+
+                handle.seek(base.size)
+
+                try:
+                    reader = pd.read_csv(
+                        handle
+                        , header    = None
+                        , names     = list(base.dtypes.keys())
+                        , chunksize = settings.DATASET_PROFILE_CHUNK_ROWS
+                    )
+                    with reader:
+                        for chunk in reader:
+                            base.update(chunk)
+
+                except pd.errors.EmptyDataError:
+                    pass
+
+        logger.info(f"Extended statistics of {file_path} from {base.size} to {size} bytes")
+
+        base.size, base.digest = size, digest.hexdigest()
+        return base
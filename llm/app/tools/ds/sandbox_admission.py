@@ -0,0 +1,167 @@
+import asyncio
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Dict, Deque, Callable, Optional
+
+from app import logger
+
+
+QueueCallback = Callable[[int], None]
+
+
+class SandboxBusyError(Exception):
+    pass
+
+
+class _Waiter:
+
+    def __init__(self, future: asyncio.Future, on_queue: Optional[QueueCallback]):
+        self.future     = future
+        self.on_queue   = on_queue
+        self.granted    = False
+        self.position   = 0
+
+
+class AdmissionController:
+    """
+    Admission queue in front of the sandbox.
+
+    At most max_concurrent executions run at once and at most max_per_thread
+    per conversation thread. Waiting threads are served round-robin, so one
+    conversation submitting many cells cannot starve the others.
+    """
+
+    def __init__(self, max_concurrent: int, max_per_thread: int):
+        self.max_concurrent = max_concurrent
+        self.max_per_thread = max_per_thread
+
+        self.running        : Dict[str, int] = {}
+        self.total_running  = 0
+        self.queues         : "OrderedDict[str, Deque[_Waiter]]" = OrderedDict()
+
+    @property
+    def queued(self) -> int:
+        return sum(len(queue) for queue in self.queues.values())
+
+    def _can_run(self, key: str) -> bool:
+        return (
+            self.total_running < self.max_concurrent
+            and self.running.get(key, 0) < self.max_per_thread
+        )
+
+    def _grant(self, key: str, waiter: _Waiter):
+        waiter.granted      = True
+        self.running[key]   = self.running.get(key, 0) + 1
+        self.total_running  += 1
+
+        if not waiter.future.done():
+            waiter.future.set_result(True)
+
+    def _release(self, key: str):
+        self.running[key]   -= 1
+        self.total_running  -= 1
+
+        if self.running[key] <= 0:
+            del self.running[key]
+
+        self._dispatch()
+
+    def _dispatch(self):
+        granted = True
+
+        while granted and self.total_running < self.max_concurrent:
+            granted = False
+
+            for key in list(self.queues.keys()):
+                if self.running.get(key, 0) >= self.max_per_thread:
+                    continue
+
+                queue   = self.queues[key]
+                waiter  = queue.popleft()
+
+                if queue:
+                    self.queues.move_to_end(key)
+                else:
+                    del self.queues[key]
+
+                self._grant(key, waiter)
+                granted = True
+                break
+
+        self._notify_positions()
+
+    def _notify_positions(self):
+        """Tell every waiter its place in the round-robin service order"""
+        queues      = [list(queue) for queue in self.queues.values()]
+        position    = 0
+
+        for depth in range(max((len(q) for q in queues), default=0)):
+            for queue in queues:
+                if depth >= len(queue):
+                    continue
+
+                position    += 1
+                waiter      = queue[depth]
+
+                if waiter.position != position:
+                    waiter.position = position
+
+                    if waiter.on_queue:
+                        try:
+                            waiter.on_queue(position)
+                        except Exception as e:
+                            logger.error(f"Error reporting sandbox queue position: {str(e)}")
+
+    def _remove(self, key: str, waiter: _Waiter):
+        queue = self.queues.get(key)
+
+        if queue and waiter in queue:
+            queue.remove(waiter)
+            if not queue:
+                del self.queues[key]
+
+        self._notify_positions()
+
+    @asynccontextmanager
+    async def slot(
+        self
+        , key       : str
+        , on_queue  : Optional[QueueCallback] = None
+        , timeout   : Optional[float] = None
+    ):
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), on_queue)
+
+        if not self.queues and self._can_run(key):
+            self._grant(key, waiter)
+        else:
+            self.queues.setdefault(key, deque()).append(waiter)
+            self._dispatch()
+
+            logger.info(
+                f"Sandbox admission queued for {key}: "
+                f"{self.total_running} running, {self.queued} waiting"
+            )
+
+            try:
+                await asyncio.wait_for(waiter.future, timeout=timeout)
+
+            except asyncio.TimeoutError:
+                if waiter.granted:
+                    self._release(key)
+                else:
+                    self._remove(key, waiter)
+
+                raise SandboxBusyError(f"No sandbox slot became free within {timeout}s")
+
+            except asyncio.CancelledError:
+                if waiter.granted:
+                    self._release(key)
+                else:
+                    self._remove(key, waiter)
+
+                raise
+
+        try:
+            yield
+        finally:
+            self._release(key)
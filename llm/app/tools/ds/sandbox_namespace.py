@@ -0,0 +1,160 @@
+import sys
+import importlib
+from typing import Dict, Any, Optional, Set, Tuple
+
+from app.core.config import settings
+
+
+# Sandbox name -> (module to import, attribute to bind or None for the module itself)
+SANDBOX_BINDINGS: Dict[str, Tuple[str, Optional[str]]] = {
+    'np'                : ('numpy', None)
+    , 'pd'              : ('pandas', None)
+    , 'pl'              : ('polars', None)
+    , 'polars'          : ('polars', None)
+    , 'plt'             : ('matplotlib.pyplot', None)
+    , 'matplotlib'      : ('matplotlib', None)
+    , 'animation'       : ('matplotlib.animation', None)
+    , 'FuncAnimation'   : ('matplotlib.animation', 'FuncAnimation')
+    , 'go'              : ('plotly.graph_objects', None)
+    , 'px'              : ('plotly.express', None)
+    , 'scipy'           : ('scipy', None)
+    , 'stats'           : ('scipy.stats', None)
+    , 'optimize'        : ('scipy.optimize', None)
+    , 'integrate'       : ('scipy.integrate', None)
+    , 'linalg'          : ('scipy.linalg', None)
+    , 'signal'          : ('scipy.signal', None)
+    , 'spatial'         : ('scipy.spatial', None)
+    , 'special'         : ('scipy.special', None)
+    , 'fft'             : ('scipy.fft', None)
+    , 'seaborn'         : ('seaborn', None)
+    , 'sns'             : ('seaborn', None)
+    , 'sympy'           : ('sympy', None)
+    , 'sklearn'         : ('sklearn', None)
+    , 'metrics'         : ('sklearn.metrics', None)
+    , 'preprocessing'   : ('sklearn.preprocessing', None)
+    , 'model_selection' : ('sklearn.model_selection', None)
+    , 'xgboost'         : ('xgboost', None)
+    , 'xgb'             : ('xgboost', None)
+    , 'lightgbm'        : ('lightgbm', None)
+    , 'lgb'             : ('lightgbm', None)
+    , 'statsmodels'     : ('statsmodels', None)
+    , 'sm'              : ('statsmodels.api', None)
+    , 'tsa'             : ('statsmodels.tsa', None)
+    , 'nx'              : ('networkx', None)
+    , 'tf'              : ('tensorflow', None)
+    , 'torch'           : ('torch', None)
+    , 'math'            : ('math', None)
+    , 'random'          : ('random', None)
+    , 'itertools'       : ('itertools', None)
+    , 'functools'       : ('functools', None)
+    , 'collections'     : ('collections', None)
+    , 'datetime'        : ('datetime', None)
+    , 'time'            : ('time', None)
+    , 're'              : ('re', None)
+    , 'json'            : ('json', None)
+}
+
+
+# Namespace key of the names bind_datasets bound: name -> (source, object)
+BOUND_KEY = '_sandbox_bound'
+
+
+def preload_modules():
+    """Import the commonly used libraries once so binding them later is free"""
+    # Import matplotlib with Agg backend for headless plotting
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+    import matplotlib.pyplot as plt
+    plt.ioff()
+
+    for module_name in settings.SANDBOX_PRELOAD_MODULES.split(","):
+        module_name = module_name.strip()
+        if not module_name:
+            continue
+
+        try:
+            importlib.import_module(module_name)
+        except Exception:
+            pass
+
+
+def resolve_binding(name: str) -> Any:
+    module_name, attribute = SANDBOX_BINDINGS[name]
+
+    try:
+        module = importlib.import_module(module_name)
+    except Exception:
+        return None
+
+    return getattr(module, attribute, None) if attribute else module
+
+
+def bind_names(namespace: Dict[str, Any], names: Set[str]) -> Dict[str, Any]:
+    """Bind the sandbox libraries among names that the namespace does not define yet"""
+    for name in names:
+        if name in SANDBOX_BINDINGS and name not in namespace:
+            namespace[name] = resolve_binding(name)
+
+    return namespace
+
+
+def bind_datasets(
+    namespace           : Dict[str, Any]
+    , names             : Set[str]
+    , datasets          : Dict[str, str]
+    , current_dataset   : Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Expose datasets published by DatasetStore to sandbox code.
+
+    df is bound to the current dataset and load_dataset(path) returns any loaded
+    dataset, both attached from memory-mapped Arrow files instead of re-parsing.
+
+    Persistent sessions keep the namespace between tasks, so what was bound
+    here is recorded under BOUND_KEY: df is rebound when the current dataset
+    changes and load_dataset on every task, unless user code reassigned them.
+    """
+    bound = namespace.setdefault(BOUND_KEY, {})
+
+    def ours(name: str) -> bool:
+        return name not in namespace or (name in bound and namespace[name] is bound[name][1])
+
+    if 'df' in names and current_dataset in datasets and ours('df'):
+        arrow_path = datasets[current_dataset]
+
+        if 'df' not in namespace or bound['df'][0] != arrow_path:
+            from app.tools.ds.dataset_store import DatasetStore
+            namespace['df'] = DatasetStore.attach(arrow_path)
+            bound['df']     = (arrow_path, namespace['df'])
+
+    if 'load_dataset' in names and ours('load_dataset'):
+        def load_dataset(file_path: str):
+            if file_path in datasets:
+                from app.tools.ds.dataset_store import DatasetStore
+                return DatasetStore.attach(datasets[file_path])
+
+            import pandas as pd
+            if file_path.endswith('.csv'):
+                return pd.read_csv(file_path)
+            return pd.read_excel(file_path)
+
+        namespace['load_dataset']   = load_dataset
+        bound['load_dataset']       = (None, load_dataset)
+
+    return namespace
+
+
+def is_sandbox_binding(name: str, value: Any) -> bool:
+    if name not in SANDBOX_BINDINGS:
+        return False
+
+    if value is None:
+        return True
+
+    module_name, attribute = SANDBOX_BINDINGS[name]
+    module = sys.modules.get(module_name)
+
+    if module is None:
+        return False
+
+    return value is (getattr(module, attribute, None) if attribute else module)
@@ -0,0 +1,183 @@
+import io
+import json
+import threading
+from pathlib import Path
+from multiprocessing.connection import Connection
+from typing import Dict, Any, List, Optional
+
+from app.core.config import settings
+
+
+OUTPUT_DIR = Path("output/executions")
+
+STREAM_OUTPUT_LIMIT = 64 * 1024
+MAX_RICH_OUTPUTS    = 10
+PREVIEW_ROWS        = 10
+PREVIEW_COLUMNS     = 50
+REPR_LIMIT          = 1000
+
+
+class OutputChannel(io.TextIOBase):
+    """
+    Bounded capture for one sandbox output stream.
+
+    Keeps the first inline_limit characters in memory, spills the complete
+    stream to spill_path once that is exceeded, and forwards completed lines
+    to the parent process for live streaming.
+    """
+
+    def __init__(
+        self
+        , stream        : str
+        , spill_path    : Optional[str] = None
+        , conn          : Optional[Connection] = None
+        , send_lock     : Optional[threading.Lock] = None
+        , inline_limit  : int = None
+    ):
+        super().__init__()
+        self.stream         = stream
+        self.spill_path     = spill_path
+        self.conn           = conn
+        self.send_lock      = send_lock or threading.Lock()
+        self.inline_limit   = inline_limit or settings.SANDBOX_INLINE_OUTPUT_CHARS
+
+        self.inline         = io.StringIO()
+        self.inline_size    = 0
+        self.total_size     = 0
+        self.spill_file     = None
+        self.pending        = ""
+        self.streamed       = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        self.total_size += len(text)
+
+        room = self.inline_limit - self.inline_size
+        if room > 0:
+            self.inline.write(text[:room])
+            self.inline_size += min(room, len(text))
+
+        if self.total_size > self.inline_limit and self.spill_path:
+            if self.spill_file is None:
+                Path(self.spill_path).parent.mkdir(parents=True, exist_ok=True)
+                self.spill_file = open(self.spill_path, "w", encoding="utf-8")
+                self.spill_file.write(self.inline.getvalue())
+                self.spill_file.write(text[max(room, 0):])
+            else:
+                self.spill_file.write(text)
+
+        if self.conn is not None and self.streamed < STREAM_OUTPUT_LIMIT:
+            self.pending += text
+
+            if "\n" in self.pending:
+                lines, _, self.pending = self.pending.rpartition("\n")
+                self._send(lines + "\n")
+
+        return len(text)
+
+    def _send(self, text: str):
+        text            = text[:STREAM_OUTPUT_LIMIT - self.streamed]
+        self.streamed   += len(text)
+
+        try:
+            with self.send_lock:
+                self.conn.send({"stream": self.stream, "text": text})
+        except (BrokenPipeError, OSError):
+            self.conn = None
+
+    def finish(self) -> Dict[str, Any]:
+        if self.conn is not None and self.pending:
+            self._send(self.pending)
+        self.pending = ""
+
+        spilled = self.spill_file is not None
+        if spilled:
+            self.spill_file.close()
+
+        text = self.inline.getvalue()
+        if spilled:
+            text += f"\n... [output truncated: showing {self.inline_size} of {self.total_size} characters]"
+
+        return {
+            "text"          : text
+            , "chars"       : self.total_size
+            , "spill_path"  : self.spill_path if spilled else None
+        }
+
+
+def _is_plot_object(value: Any) -> bool:
+    if isinstance(value, (list, tuple)) and value:
+        value = value[0]
+
+    return type(value).__module__.split(".")[0] == "matplotlib"
+
+
+def summarize_value(value: Any) -> Optional[Dict[str, Any]]:
+    """Structured, size-bounded description of a value for the LLM"""
+    if value is None or _is_plot_object(value):
+        return None
+
+    try:
+        import pandas as pd
+        import numpy as np
+
+        if isinstance(value, pd.DataFrame):
+            preview = value.iloc[:PREVIEW_ROWS, :PREVIEW_COLUMNS]
+            return {
+                "type"          : "dataframe"
+                , "shape"       : list(value.shape)
+                , "columns"     : [str(c) for c in value.columns[:PREVIEW_COLUMNS]]
+                , "dtypes"      : preview.dtypes.astype(str).to_dict()
+                , "head"        : json.loads(preview.to_json(orient="records", date_format="iso", default_handler=str))
+                , "truncated"   : value.shape[0] > PREVIEW_ROWS or value.shape[1] > PREVIEW_COLUMNS
+            }
+
+        if isinstance(value, pd.Series):
+            preview = value.iloc[:PREVIEW_ROWS]
+            return {
+                "type"          : "series"
+                , "name"        : str(value.name)
+                , "length"      : int(len(value))
+                , "dtype"       : str(value.dtype)
+                , "head"        : {str(k): repr(v) for k, v in preview.items()}
+                , "truncated"   : len(value) > PREVIEW_ROWS
+            }
+
+        if isinstance(value, np.ndarray):
+            return {
+                "type"      : "ndarray"
+                , "shape"   : list(value.shape)
+                , "dtype"   : str(value.dtype)
+                , "preview" : np.array2string(value, threshold=PREVIEW_ROWS * 5)[:REPR_LIMIT]
+            }
+
+    except ImportError:
+        pass
+
+    text = repr(value)
+    return {
+        "type"          : "text"
+        , "repr"        : text[:REPR_LIMIT]
+        , "truncated"   : len(text) > REPR_LIMIT
+    }
+
+
+class RichOutputCollector:
+    """Collects structured outputs from display() calls and the final expression"""
+
+    def __init__(self):
+        self.outputs: List[Dict[str, Any]] = []
+
+    def add(self, value: Any):
+        if len(self.outputs) >= MAX_RICH_OUTPUTS:
+            return
+
+        summary = summarize_value(value)
+        if summary is not None:
+            self.outputs.append(summary)
+
+    def display(self, *values: Any):
+        for value in values:
+            self.add(value)
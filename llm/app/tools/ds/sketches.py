@@ -0,0 +1,386 @@
+from typing import Dict, Any, List, Optional, Tuple
+import math
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+
+
+def use_sketches(rows: int, approximate: Optional[bool]) -> bool:
+    """Explicit choice wins; otherwise columns above the row threshold are sketched"""
+    if approximate is not None:
+        return approximate
+    return rows > settings.APPROX_STATS_ROW_THRESHOLD
+
+
+class HyperLogLog:
+    """
+    Distinct count estimate from 2^precision one-byte registers.
+
+    Relative standard error is 1.04 / sqrt(2^precision), about 0.8% at the
+    default precision of 14 (16 KB of registers).
+    """
+
+    def __init__(self, precision: int = 14):
+        self.precision  = precision
+        self.registers  = np.zeros(1 << precision, dtype=np.uint8)
+
+    @property
+    def standard_error(self) -> float:
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def update(self, values: pd.Series):
+        if values.empty:
+            return
+
+        # The same number hashes differently as int64 and float64, and chunks of
+        # one column can switch between them (a chunk with NaN), so numbers are
+        # hashed as float64
+        if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            values = values.astype(np.float64)
+
+        hashes  = pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+        bits    = 64 - self.precision
+        index   = (hashes >> np.uint64(bits)).astype(np.int64)
+        rest    = hashes & np.uint64((1 << bits) - 1)
+
+        # Position of the leftmost set bit in the remaining bits (bits + 1 when all are zero)
+        _, bit_length   = np.frexp(rest.astype(np.float64))
+        rank            = (bits - bit_length + 1).astype(np.uint8)
+
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "HyperLogLog"):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        m       = len(self.registers)
+        alpha   = 0.7213 / (1 + 1.079 / m)
+        raw     = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros   = int(np.count_nonzero(self.registers == 0))
+
+        if raw <= 2.5 * m and zeros:
+            return int(round(m * math.log(m / zeros)))
+
+        return int(round(raw))
+
+
+class QuantileSketch:
+    """
+    KLL quantile sketch.
+
+    Items live in levels of compactors; an item at level h stands for 2^h
+    inputs. A full level is sorted and every other item (random offset) is
+    promoted, so memory stays O(k log(n / k)). Until the first compaction
+    the sketch holds every value and is exact.
+    """
+
+    def __init__(self, k: int = 200, seed: int = 0):
+        self.k          = k
+        self.n          = 0
+        self.levels     : List[np.ndarray] = [np.empty(0)]
+        self._rng       = np.random.default_rng(seed)
+
+    @property
+    def rank_error(self) -> float:
+        """Normalized rank error at 99% confidence (KLL constants, 0 while exact)"""
+        if len(self.levels) == 1:
+            return 0.0
+        return 2.446 / self.k ** 0.9433
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(int(math.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def _compress(self):
+        level = 0
+
+        while level < len(self.levels):
+            items = self.levels[level]
+
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+
+                items       = np.sort(items)
+                odd         = len(items) % 2
+                promoted    = items[:len(items) - odd][self._rng.integers(2)::2]
+
+                self.levels[level]      = items[len(items) - odd:]
+                self.levels[level + 1]  = np.concatenate([self.levels[level + 1], promoted])
+
+            level += 1
+
+    def update(self, values: np.ndarray):
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+
+        self.n          += len(values)
+        self.levels[0]  = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other: "QuantileSketch"):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+
+        self.n += other.n
+        self._compress()
+
+    def _cumulative(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Retained items in order with the number of inputs each one covers, summed"""
+        items   = np.concatenate(self.levels)
+        weights = np.concatenate([
+            np.full(len(items_at_level), 2.0 ** level)
+            for level, items_at_level in enumerate(self.levels)
+        ])
+
+        order = np.argsort(items, kind="stable")
+        return items[order], np.cumsum(weights[order])
+
+    def ranks(self, points: np.ndarray) -> np.ndarray:
+        """Estimated number of inputs <= each point"""
+        if not self.n:
+            return np.zeros(len(points))
+
+        items, cumulative   = self._cumulative()
+        positions           = np.searchsorted(items, points, side="right")
+
+        return np.concatenate([[0.0], cumulative])[positions]
+
+    def quantiles(self, qs: List[float]) -> List[float]:
+        if not self.n:
+            return [float("nan")] * len(qs)
+
+        items, cumulative   = self._cumulative()
+        targets             = np.asarray(qs) * cumulative[-1]
+
+        positions = np.minimum(np.searchsorted(cumulative, targets), len(items) - 1)
+        return [float(items[p]) for p in positions]
+
+
+class HeavyHitters:
+    """
+    Misra-Gries summary of the most frequent values.
+
+    At most `capacity` counters are kept; when more are needed every count
+    is reduced by the next-largest one. Reported counts are lower bounds and
+    the true count exceeds them by at most `count_error` (<= n / (capacity + 1)).
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.capacity       = capacity
+        self.counts         = pd.Series(dtype=np.int64)
+        self.count_error    = 0
+
+    def _add_counts(self, counts: pd.Series):
+        merged = self.counts.add(counts, fill_value=0)
+
+        if len(merged) > self.capacity:
+            cut                 = merged.nlargest(self.capacity + 1).iloc[-1]
+            merged              = merged[merged > cut] - cut
+            self.count_error    += int(cut)
+
+        self.counts = merged.astype(np.int64)
+
+    def update(self, values: pd.Series):
+        if not values.empty:
+            self._add_counts(values.value_counts())
+
+    def merge(self, other: "HeavyHitters"):
+        self.count_error += other.count_error
+        self._add_counts(other.counts)
+
+    def top(self, n: int = 5) -> Dict[Any, int]:
+        return {value: int(count) for value, count in self.counts.nlargest(n).items()}
+
+
+class Moments:
+    """
+    Exact count, mean, min, max and central moments up to the fourth.
+
+    Chunks are combined with the pairwise update formulas, so partial
+    results from separate chunks (or files) merge without revisiting data.
+    """
+
+    def __init__(self):
+        self.n      = 0
+        self.mean   = 0.0
+        self.m2     = 0.0
+        self.m3     = 0.0
+        self.m4     = 0.0
+        self.min    = math.inf
+        self.max    = -math.inf
+
+    @staticmethod
+    def of(values: np.ndarray) -> "Moments":
+        moments = Moments()
+        values  = values[~np.isnan(values)]
+
+        if len(values):
+            deviations      = values - values.mean()
+            squared         = deviations * deviations
+            moments.n       = len(values)
+            moments.mean    = float(values.mean())
+            moments.m2      = float(squared.sum())
+            moments.m3      = float((squared * deviations).sum())
+            moments.m4      = float((squared * squared).sum())
+            moments.min     = float(values.min())
+            moments.max     = float(values.max())
+
+        return moments
+
+    def merge(self, other: "Moments"):
+        if not other.n:
+            return
+        if not self.n:
+            self.__dict__.update(other.__dict__)
+            return
+
+        na, nb  = self.n, other.n
+        n       = na + nb
+        delta   = other.mean - self.mean
+
+        m2 = self.m2 + other.m2 + delta ** 2 * na * nb / n
+        m3 = (
+            self.m3 + other.m3
+            + delta ** 3 * na * nb * (na - nb) / n ** 2
+            + 3 * delta * (na * other.m2 - nb * self.m2) / n
+        )
+        m4 = (
+            self.m4 + other.m4
+            + delta ** 4 * na * nb * (na * na - na * nb + nb * nb) / n ** 3
+            + 6 * delta ** 2 * (na * na * other.m2 + nb * nb * self.m2) / n ** 2
+            + 4 * delta * (na * other.m3 - nb * self.m3) / n
+        )
+
+        self.mean   += delta * nb / n
+        self.n      = n
+        self.m2, self.m3, self.m4 = m2, m3, m4
+        self.min    = min(self.min, other.min)
+        self.max    = max(self.max, other.max)
+
+    def update(self, values: np.ndarray):
+        self.merge(Moments.of(values))
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.n - 1) if self.n > 1 else float("nan")
+
+    @property
+    def skewness(self) -> float:
+        # Biased estimator, matching scipy.stats.skew defaults
+        return math.sqrt(self.n) * self.m3 / self.m2 ** 1.5 if self.m2 else float("nan")
+
+    @property
+    def kurtosis(self) -> float:
+        # Fisher (excess) kurtosis, matching scipy.stats.kurtosis defaults
+        return self.n * self.m4 / self.m2 ** 2 - 3 if self.m2 else float("nan")
+
+
+class ColumnSketch:
+    """
+    Bounded-memory summary of one column, fed chunk by chunk.
+
+    Distinct counts come from HyperLogLog, quantiles from a KLL sketch and
+    top values from a Misra-Gries summary; count, mean, variance, skewness,
+    kurtosis, min and max are exact. error_bounds() reports how far each
+    approximate figure can be off.
+    """
+
+    def __init__(self, numeric: bool, dtype: str = ""):
+        self.numeric    = numeric
+        self.dtype      = dtype
+        self.rows       = 0
+        self.missing    = 0
+        self.distinct   = HyperLogLog(settings.APPROX_HLL_PRECISION)
+        self.quantile   = QuantileSketch(settings.APPROX_QUANTILE_K) if numeric else None
+        self.moments    = Moments() if numeric else None
+        self.top        = None if numeric else HeavyHitters(settings.APPROX_TOP_K)
+
+    @staticmethod
+    def from_series(series: pd.Series) -> "ColumnSketch":
+        sketch      = ColumnSketch(pd.api.types.is_numeric_dtype(series), str(series.dtype))
+        chunk_rows  = settings.DATASET_PROFILE_CHUNK_ROWS
+
+        for start in range(0, len(series), chunk_rows):
+            sketch.update(series.iloc[start:start + chunk_rows])
+
+        return sketch
+
+    def update(self, chunk: pd.Series):
+        present         = chunk.dropna()
+        self.rows       += len(chunk)
+        self.missing    += len(chunk) - len(present)
+
+        self.distinct.update(present)
+
+        if self.numeric:
+            values = present.to_numpy(dtype=np.float64)
+            self.quantile.update(values)
+            self.moments.update(values)
+        else:
+            self.top.update(present)
+
+    def error_bounds(self) -> Dict[str, Any]:
+        bounds = {
+            # Two standard errors, about 95% confidence
+            "unique_relative_error"     : round(2 * self.distinct.standard_error, 4)
+        }
+
+        if self.numeric:
+            bounds["quantile_rank_error"] = round(self.quantile.rank_error, 4)
+        else:
+            bounds["top_values_count_error"] = self.top.count_error
+
+        return bounds
+
+    def histogram(self, bins: int) -> Optional[Dict[str, List[float]]]:
+        """Equal-width histogram over [min, max] read off the quantile sketch"""
+        if not self.numeric or not self.moments.n:
+            return None
+
+        edges   = np.linspace(self.moments.min, self.moments.max, bins + 1)
+        ranks   = self.quantile.ranks(edges)
+        ranks[0] = 0.0
+
+        return {
+            "edges"     : edges.tolist()
+            , "counts"  : np.diff(ranks).round().astype(int).tolist()
+        }
+
+    def profile(self, top_values: int = 10, bins: int = 20) -> Dict[str, Any]:
+        """Column statistics in the shape the profile index stores"""
+        profile = {
+            "dtype"         : self.dtype
+            , "count"       : self.rows - self.missing
+            , "missing"     : self.missing
+            , "unique"      : self.distinct.estimate()
+            , "approximate" : True
+        }
+
+        if self.numeric:
+            q25, q50, q75 = self.quantile.quantiles([0.25, 0.50, 0.75])
+            profile.update({
+                "mean"          : self.moments.mean
+                , "std"         : math.sqrt(self.moments.variance) if self.moments.n > 1 else float("nan")
+                , "variance"    : self.moments.variance
+                , "min"         : self.moments.min
+                , "max"         : self.moments.max
+                , "q25"         : q25
+                , "q50"         : q50
+                , "q75"         : q75
+                , "skewness"    : self.moments.skewness
+                , "kurtosis"    : self.moments.kurtosis
+                , "histogram"   : self.histogram(bins)
+            })
+        else:
+            profile["top_values"] = self.top.top(top_values)
+
+        profile["error_bounds"] = self.error_bounds()
+
+        return profile
@@ -1,59 +1,111 @@
 from typing import Dict, List, Optional
-import pandas as pd
+from pathlib import Path
 import numpy as np
+import asyncio
+import hashlib
 from scipy import stats as sp_stats
 
 from langchain_core.tools import tool
 from langchain.tools import ToolRuntime
 
 from app import logger
+from app.core.config import settings
 from app.states.ds_agent_state import DSAgentState
+from app.tools.ds.dataset_cache import DatasetCache
+from app.tools.ds.sketches import ColumnSketch, use_sketches
+from app.tools.ds.profile_index import ProfileIndex
+from app.tools.ds import batch_tests
+from app.tools.ds import correlation
+from app.tools.ds.dataset_store import DatasetStore
+from app.tools.ds.running_stats import RunningStats
+
+
+ANALYSIS_DIR = Path("output/analysis")
+
 
 class StatsTools:
 
     @staticmethod
     @tool("correlation_analysis")
     async def correlation_analysis(
-        file_path   : str
-        , columns   : Optional[List[str]] = None
-        , runtime   : ToolRuntime[None, DSAgentState] = None
+        file_path       : str
+        , columns       : Optional[List[str]] = None
+        , method        : str = "pearson"
+        , top_k         : int = 20
+        , threshold     : Optional[float] = None
+        , save_matrix   : bool = False
+        , runtime       : ToolRuntime[None, DSAgentState] = None
     ) -> Dict:
         """
-        Calculate correlation matrix for numeric columns
+        Find the strongest correlations between numeric columns
 
         Args:
             file_path   : Path to data file
             columns     : Optional list of columns (default: all numeric)
+            method      : 'pearson' or 'spearman'
+            top_k       : Number of strongest pairs to return
+            threshold   : Only return pairs with |r| >= threshold
+            save_matrix : Write the full matrix to a CSV file and return its URL
 
         Returns:
-            Dict with correlation matrix
+            Dict with the strongest column pairs (the full matrix only as a file)
         """
         try:
             if runtime and runtime.stream_writer:
                 runtime.stream_writer("📊 Calculating correlations...")
 
-            if file_path.endswith('.csv'):
-                df = pd.read_csv(file_path)
+            # Pearson correlations of a CSV come from its running sums when they cover the columns
+            stats   = RunningStats.lookup(file_path) if method == "pearson" else None
+            sums    = stats.correlation if stats is not None else None
+
+            if sums is not None and sums.covers(columns):
+                df      = None
+                names   = list(columns or sums.columns)
             else:
-                df = pd.read_excel(file_path)
+                df = DatasetCache.load(file_path, columns=columns)
+
+                if columns:
+                    df = df[columns]
+                else:
+                    df = df.select_dtypes(include=[np.number])
+
+                names = df.columns.tolist()
+
+            matrix_path = None
+            if save_matrix:
+                ANALYSIS_DIR.mkdir(parents=True, exist_ok=True)
+                key         = f"{DatasetStore.fingerprint(file_path)}:{method}:{names}"
+                matrix_path = str(ANALYSIS_DIR / f"correlation_{hashlib.md5(key.encode()).hexdigest()[:16]}.csv")
 
-            if columns:
-                df = df[columns]
+            if df is None:
+                r, n    = sums.pearson(names)
+                result  = await asyncio.to_thread(
+                    correlation.from_matrix, r, n, names, method, max(top_k, 1), threshold, matrix_path
+                )
             else:
-                df = df.select_dtypes(include=[np.number])
+                result  = await asyncio.to_thread(
+                    correlation.correlate, df, method, max(top_k, 1), threshold, matrix_path
+                )
 
-            corr = df.corr()
+            if matrix_path:
+                result["matrix_url"] = f"{settings.FRONT_API_BASE_URL}/api/v2/files/analysis/{Path(matrix_path).name}"
 
             if runtime and runtime.stream_writer:
-                runtime.stream_writer(f"✅ Analyzed {len(corr.columns)} columns")
+                runtime.stream_writer(f"✅ Analyzed {result['columns_analyzed']} columns")
 
             return {
                 "status"    : 200
                 , "message" : "Correlation calculated"
-                , "data"    : {
-                    "correlation_matrix": corr.to_dict()
-                    , "columns": corr.columns.tolist()
-                }
+                , "data"    : result
+            }
+
+        except ValueError as e:
+            if runtime and runtime.stream_writer:
+                runtime.stream_writer(f"❌ {str(e)}")
+            return {
+                "status"    : 400
+                , "message" : str(e)
+                , "data"    : None
             }
 
         except Exception as e:
@@ -91,10 +143,7 @@ class StatsTools:
             if runtime and runtime.stream_writer:
                 runtime.stream_writer(f"🧪 Running {test_type} on '{column}'...")
 
-            if file_path.endswith('.csv'):
-                df = pd.read_csv(file_path)
-            else:
-                df = pd.read_excel(file_path)
+            df = DatasetCache.load(file_path, columns=[column])
 
             data = df[column].dropna()
 
@@ -143,12 +192,83 @@ class StatsTools:
                 , "data"    : None
             }
 
+    @staticmethod
+    @tool("batch_hypothesis_test")
+    async def batch_hypothesis_test(
+        file_path       : str
+        , test_type     : str
+        , columns       : Optional[List[str]] = None
+        , group_column  : Optional[str] = None
+        , value         : Optional[float] = None
+        , correction    : str = "fdr_bh"
+        , alpha         : float = 0.05
+        , runtime       : ToolRuntime[None, DSAgentState] = None
+    ) -> Dict:
+        """
+        Run the same hypothesis test over many columns in one call
+
+        Args:
+            file_path       : Path to data file
+            test_type       : 't-test' (one-sample vs value), 'two-sample' (Welch, 2 groups),
+                              'anova' (one-way, 2+ groups) or 'chi-square' (independence)
+            columns         : Columns to test (default: all numeric, or all categorical for chi-square)
+            group_column    : Column defining the groups (two-sample, anova, chi-square)
+            value           : Test value for t-test
+            correction      : Multiple-comparison correction: 'fdr_bh', 'holm', 'bonferroni' or 'none'
+            alpha           : Significance level
+
+        Returns:
+            Dict with a compact table (one row per column, sorted by p-value)
+        """
+        try:
+            if runtime and runtime.stream_writer:
+                runtime.stream_writer(f"🧪 Running {test_type} over {len(columns) if columns else 'all'} columns...")
+
+            needed  = columns + [group_column] if columns and group_column else columns
+            df      = DatasetCache.load(file_path, columns=needed)
+
+            result = await asyncio.to_thread(
+                batch_tests.run_batch, df, test_type, columns, group_column, value, correction, alpha
+            )
+
+            if runtime and runtime.stream_writer:
+                runtime.stream_writer(
+                    f"✅ {result['significant_count']} of {result['tested']} columns significant "
+                    f"({correction}, alpha={alpha})"
+                )
+
+            return {
+                "status"    : 200
+                , "message" : "Batch test completed"
+                , "data"    : result
+            }
+
+        except ValueError as e:
+            if runtime and runtime.stream_writer:
+                runtime.stream_writer(f"❌ {str(e)}")
+            return {
+                "status"    : 400
+                , "message" : str(e)
+                , "data"    : None
+            }
+
+        except Exception as e:
+            logger.error(f"Error in batch hypothesis test: {str(e)}")
+            if runtime and runtime.stream_writer:
+                runtime.stream_writer(f"❌ Failed: {str(e)}")
+            return {
+                "status"    : 500
+                , "message" : f"Failed batch hypothesis test: {str(e)}"
+                , "data"    : None
+            }
+
     @staticmethod
     @tool("distribution_analysis")
     async def distribution_analysis(
-        file_path   : str
-        , column    : str
-        , runtime   : ToolRuntime[None, DSAgentState] = None
+        file_path       : str
+        , column        : str
+        , approximate   : Optional[bool] = None
+        , runtime       : ToolRuntime[None, DSAgentState] = None
     ) -> Dict:
         """
         Analyze distribution of a column
@@ -156,6 +276,8 @@ class StatsTools:
         Args:
             file_path   : Path to data file
             column      : Column name
+            approximate : Estimate the median with a quantile sketch instead of sorting.
+                          Defaults to the sketch only for very large columns
 
         Returns:
             Dict with distribution statistics
@@ -164,10 +286,32 @@ class StatsTools:
             if runtime and runtime.stream_writer:
                 runtime.stream_writer(f"📊 Analyzing distribution of '{column}'...")
 
-            if file_path.endswith('.csv'):
-                df = pd.read_csv(file_path)
-            else:
-                df = pd.read_excel(file_path)
+            profile     = ProfileIndex.column(file_path, column, approximate)
+            if profile is not None and "mean" in profile:
+                if runtime and runtime.stream_writer:
+                    runtime.stream_writer(f"⚡ Distribution from profile index")
+
+                return {
+                    "status"    : 200
+                    , "message" : "Distribution analyzed"
+                    , "data"    : StatsTools._distribution(column, profile)
+                }
+
+            df = DatasetCache.load(file_path, columns=[column])
+            ProfileIndex.schedule(file_path)
+
+            if use_sketches(len(df), approximate):
+                sketch  = await asyncio.to_thread(ColumnSketch.from_series, df[column])
+                result  = StatsTools._distribution(column, sketch.profile())
+
+                if runtime and runtime.stream_writer:
+                    runtime.stream_writer(f"✅ Distribution analysis complete (approximate)")
+
+                return {
+                    "status"    : 200
+                    , "message" : "Distribution analyzed (approximate)"
+                    , "data"    : result
+                }
 
             data = df[column].dropna()
 
@@ -183,6 +327,7 @@ class StatsTools:
                 , "min"         : float(data.min())
                 , "max"         : float(data.max())
                 , "range"       : float(data.max() - data.min())
+                , "approximate" : False
             }
 
             if runtime and runtime.stream_writer:
@@ -203,3 +348,26 @@ class StatsTools:
                 , "message" : f"Failed distribution analysis: {str(e)}"
                 , "data"    : None
             }
+
+    @staticmethod
+    def _distribution(column: str, profile: Dict) -> Dict:
+        """distribution_analysis output from a profile index entry or sketch profile"""
+        result = {
+            "column"        : column
+            , "count"       : profile["count"]
+            , "mean"        : profile["mean"]
+            , "median"      : profile["q50"]
+            , "std"         : profile["std"]
+            , "variance"    : profile["variance"]
+            , "skewness"    : profile["skewness"]
+            , "kurtosis"    : profile["kurtosis"]
+            , "min"         : profile["min"]
+            , "max"         : profile["max"]
+            , "range"       : profile["max"] - profile["min"]
+            , "approximate" : profile["approximate"]
+        }
+
+        if "error_bounds" in profile:
+            result["error_bounds"] = {"median_rank_error": profile["error_bounds"]["quantile_rank_error"]}
+
+        return result
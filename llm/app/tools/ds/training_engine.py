@@ -0,0 +1,262 @@
+from typing import Dict, Any, Callable, List, Optional, Tuple
+from multiprocessing.connection import Connection
+import multiprocessing as mp
+import time
+import uuid
+import asyncio
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.linear_model import LinearRegression
+from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier
+from sklearn.metrics import mean_squared_error, r2_score, accuracy_score
+import joblib
+
+from app import logger
+from app.core.config import settings
+from app.tools.ds.sandbox_admission import AdmissionController, QueueCallback
+from app.tools.ds.code_execution_pool import _wait_readable
+
+
+ProgressCallback = Callable[[str], None]
+
+# Random forests are grown in this many warm-started stages to report progress
+FOREST_STAGES = 10
+
+
+def _train_linear_regression(
+    X_train, X_test, y_train, y_test
+    , params    : Dict[str, Any]
+    , cores     : int
+    , report    : ProgressCallback
+) -> Tuple[Any, Dict[str, Any]]:
+    report("⚙️ Fitting linear regression...")
+
+    model = LinearRegression(n_jobs=cores)
+    model.fit(X_train, y_train)
+
+    y_pred  = model.predict(X_test)
+    mse     = mean_squared_error(y_test, y_pred)
+
+    return model, {
+        "mse"       : float(mse)
+        , "rmse"    : float(np.sqrt(mse))
+        , "r2_score": float(r2_score(y_test, y_pred))
+    }
+
+
+def _train_random_forest(
+    X_train, X_test, y_train, y_test
+    , params    : Dict[str, Any]
+    , cores     : int
+    , report    : ProgressCallback
+) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Grow the forest in warm-started stages; scikit-learn draws the same tree
+    seeds as a single fit, so the model does not depend on the staging.
+    """
+    n_estimators    = params["n_estimators"]
+    regression      = params["task_type"] == "regression"
+    forest          = RandomForestRegressor if regression else RandomForestClassifier
+    model           = forest(random_state=42, n_jobs=cores, warm_start=True)
+    step            = max(1, -(-n_estimators // FOREST_STAGES))
+
+    for trees in range(step, n_estimators + step, step):
+        model.set_params(n_estimators=min(trees, n_estimators))
+        model.fit(X_train, y_train)
+        report(f"🌲 {model.n_estimators}/{n_estimators} trees")
+
+    y_pred = model.predict(X_test)
+
+    if regression:
+        metrics = {
+            "mse"       : float(mean_squared_error(y_test, y_pred))
+            , "rmse"    : float(np.sqrt(mean_squared_error(y_test, y_pred)))
+            , "r2_score": float(r2_score(y_test, y_pred))
+        }
+    else:
+        metrics = {
+            "accuracy"  : float(accuracy_score(y_test, y_pred))
+        }
+
+    return model, {
+        "metrics"               : metrics
+        , "feature_importance"  : dict(zip(X_train.columns, model.feature_importances_.tolist()))
+    }
+
+
+TRAINERS = {
+    "linear_regression" : _train_linear_regression
+    , "random_forest"   : _train_random_forest
+}
+
+
+def _job_main(
+    conn                : Connection
+    , trainer           : str
+    , df                : pd.DataFrame
+    , feature_columns   : List[str]
+    , target_column     : str
+    , test_size         : float
+    , params            : Dict[str, Any]
+    , model_path        : str
+    , cores             : int
+):
+    """
+    Body of a training process. The dataset arrives through fork, not the
+    pipe; only progress messages and the metrics are sent back.
+    """
+    def report(message: str):
+        conn.send(("progress", message))
+
+    try:
+        from threadpoolctl import threadpool_limits
+
+        # Job processes are daemons, which joblib's process backends refuse to use
+        with threadpool_limits(limits=cores), joblib.parallel_backend("threading", n_jobs=cores):
+            X_train, X_test, y_train, y_test = train_test_split(
+                df[feature_columns], df[target_column], test_size=test_size, random_state=42
+            )
+
+            model, result = TRAINERS[trainer](X_train, X_test, y_train, y_test, params, cores, report)
+
+            report("💾 Saving model...")
+            joblib.dump(model, model_path)
+
+        conn.send(("result", result))
+
+    except Exception as e:
+        conn.send(("error", f"{type(e).__name__}: {str(e)}"))
+
+    finally:
+        conn.close()
+
+
+class TrainingEngine:
+    """
+    Runs MLTools fits outside the server process.
+
+    Every job is a forked process, so a dataset already in DatasetCache is
+    shared copy-on-write instead of being pickled or parsed again, and
+    cancelling or timing out a job simply kills its process. Jobs are
+    admitted through the same round-robin queue as the sandbox: at most
+    ML_MAX_CONCURRENT_JOBS at once and ML_MAX_JOBS_PER_THREAD per
+    conversation, each limited to ML_CORES_PER_JOB cores (estimator n_jobs
+    and BLAS threads).
+    """
+
+    _admission  : Optional[AdmissionController] = None
+    _jobs       : Dict[str, mp.Process] = {}
+
+    @staticmethod
+    def admission() -> AdmissionController:
+        if TrainingEngine._admission is None:
+            TrainingEngine._admission = AdmissionController(
+                max_concurrent  = settings.ML_MAX_CONCURRENT_JOBS
+                , max_per_thread= settings.ML_MAX_JOBS_PER_THREAD
+            )
+        return TrainingEngine._admission
+
+    @staticmethod
+    async def run(
+        trainer             : str
+        , df                : pd.DataFrame
+        , feature_columns   : List[str]
+        , target_column     : str
+        , test_size         : float
+        , params            : Dict[str, Any]
+        , model_path        : str
+        , key               : Optional[str] = None
+        , on_progress       : Optional[ProgressCallback] = None
+        , on_queue          : Optional[QueueCallback] = None
+    ) -> Dict[str, Any]:
+        """
+        Train in a job process and return the trainer's metrics.
+
+        Raises SandboxBusyError when no slot frees up within ML_QUEUE_TIMEOUT,
+        TimeoutError after ML_TRAINING_TIMEOUT and RuntimeError when the fit
+        fails. Cancelling the awaiting task (e.g. a disconnected client)
+        kills the job.
+        """
+        async with TrainingEngine.admission().slot(key or "default", on_queue, settings.ML_QUEUE_TIMEOUT):
+            job_id      = uuid.uuid4().hex[:12]
+            context     = mp.get_context("fork")
+            receiver, sender = context.Pipe(duplex=False)
+
+            process = context.Process(
+                target  = _job_main
+                , args  = (
+                    sender, trainer, df, feature_columns, target_column, test_size
+                    , params, model_path, settings.ML_CORES_PER_JOB
+                )
+                , name  = f"training-{job_id}"
+                , daemon= True
+            )
+            process.start()
+            sender.close()
+
+            TrainingEngine._jobs[job_id] = process
+            logger.info(f"Started training job {job_id} ({trainer}, pid {process.pid})")
+
+            deadline = time.monotonic() + settings.ML_TRAINING_TIMEOUT
+
+            try:
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"Training exceeded {settings.ML_TRAINING_TIMEOUT}s")
+
+                    if not await _wait_readable(receiver, remaining):
+                        continue
+
+                    try:
+                        kind, payload = receiver.recv()
+                    except EOFError:
+                        await asyncio.to_thread(process.join, 1)
+                        raise RuntimeError(f"Training process exited unexpectedly (exit code {process.exitcode})")
+
+                    if kind == "progress":
+                        if on_progress:
+                            on_progress(payload)
+                    elif kind == "result":
+                        logger.info(f"Training job {job_id} finished")
+                        return payload
+                    else:
+                        raise RuntimeError(payload)
+
+            except asyncio.CancelledError:
+                logger.info(f"Training job {job_id} cancelled")
+                raise
+
+            finally:
+                TrainingEngine.cancel(job_id)
+                receiver.close()
+
+    @staticmethod
+    def cancel(job_id: str) -> bool:
+        process = TrainingEngine._jobs.pop(job_id, None)
+        if process is None:
+            return False
+
+        if process.is_alive():
+            process.kill()
+
+        TrainingEngine._reap(process)
+        return True
+
+    @staticmethod
+    def _reap(process: mp.Process):
+        """Join a killed job; on the event loop the join runs in the default executor"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            process.join(timeout=5)
+            return
+
+        loop.run_in_executor(None, process.join, 5)
+
+    @staticmethod
+    def shutdown():
+        for job_id in list(TrainingEngine._jobs):
+            TrainingEngine.cancel(job_id)
@@ -1,10 +1,6 @@
-from typing import Dict, List, Optional
+from typing import Dict, Any, List, Optional, Tuple, Callable, Awaitable
 from pathlib import Path
-import pandas as pd
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-import seaborn as sns
+import asyncio
 
 from langchain_core.tools import tool
 from langchain.tools import ToolRuntime
@@ -12,9 +8,50 @@ from langchain.tools import ToolRuntime
 from app import logger
 from app.core.config import settings
 from app.states.ds_agent_state import DSAgentState
+from app.tools.ds.dataset_cache import DatasetCache
+from app.tools.ds import render_pool
+from app.tools.ds import plot_aggregation
+from app.tools.ds.render_pool import RenderPool
+from app.tools.ds.plot_cache import PlotCache
 
 class VizTools:
 
+    @staticmethod
+    async def _render_cached(
+        file_path       : str
+        , tool_name     : str
+        , params        : Dict[str, Any]
+        , output_path   : Optional[str]
+        , draw          : Callable[[str], Awaitable[Dict[str, Any]]]
+    ) -> Tuple[str, Dict[str, Any], bool]:
+        """
+        Plot through the plot cache: draw(target) loads the data, renders the
+        plot to target and returns the values reported with it. A repeated
+        request returns the cached file without loading anything; an explicit
+        output_path bypasses the cache.
+
+        Returns (plot path, values, whether it was a cache hit).
+        """
+        if output_path is not None:
+            return output_path, await draw(output_path), False
+
+        path, extras = PlotCache.resolve(file_path, tool_name, params)
+        if path is None:
+            raise FileNotFoundError(f"Data file not found: {file_path}")
+
+        if extras is not None:
+            return str(path), extras, True
+
+        rendered = PlotCache.temp_path(path)
+
+        try:
+            extras = await draw(str(rendered))
+            await asyncio.to_thread(PlotCache.store, rendered, path, extras)
+        finally:
+            rendered.unlink(missing_ok=True)
+
+        return str(path), extras, False
+
     @staticmethod
     @tool("create_histogram")
     async def create_histogram(
@@ -31,7 +68,7 @@ class VizTools:
             file_path   : Path to data file
             column      : Column name
             bins        : Number of bins
-            output_path : Path to save plot (auto-generated if None)
+            output_path : Path to save plot (cached under output/plots if None)
 
         Returns:
             Dict with plot path
@@ -40,24 +77,25 @@ class VizTools:
             if runtime and runtime.stream_writer:
                 runtime.stream_writer(f"📊 Creating histogram for '{column}'...")
 
-            if file_path.endswith('.csv'):
-                df = pd.read_csv(file_path)
-            else:
-                df = pd.read_excel(file_path)
-
-            if output_path is None:
-                output_dir = Path("output/plots")
-                output_dir.mkdir(parents=True, exist_ok=True)
-                output_path = str(output_dir / f"histogram_{column}.png")
-
-            plt.figure(figsize=(10, 6))
-            plt.hist(df[column].dropna(), bins=bins, edgecolor='black')
-            plt.xlabel(column)
-            plt.ylabel('Frequency')
-            plt.title(f'Histogram of {column}')
-            plt.grid(True, alpha=0.3)
-            plt.savefig(output_path, dpi=150, bbox_inches='tight')
-            plt.close()
+            async def draw(target: str) -> Dict[str, Any]:
+                df      = await asyncio.to_thread(DatasetCache.load, file_path, columns=[column])
+                values  = df[column].dropna()
+
+                if plot_aggregation.is_aggregatable(values):
+                    counts, edges = await asyncio.to_thread(
+                        plot_aggregation.histogram_counts, values.to_numpy(), bins
+                    )
+                    await RenderPool.render(render_pool.render_histogram, counts, edges, column, target)
+                else:
+                    await RenderPool.render(
+                        render_pool.render_histogram_values, values.to_numpy(), bins, column, target
+                    )
+
+                return {}
+
+            output_path, extras, cached = await VizTools._render_cached(
+                file_path, "histogram", {"column": column, "bins": bins}, output_path, draw
+            )
 
             filename = Path(output_path).name
             file_url = f"{settings.FRONT_API_BASE_URL}/api/v2/files/plots/{filename}"
@@ -73,6 +111,7 @@ class VizTools:
                 , "data"    : {
                     "plot_path": output_path
                     , "file_url": file_url
+                    , "cached"  : cached
                 }
             }
 
@@ -96,7 +135,7 @@ class VizTools:
         , runtime   : ToolRuntime[None, DSAgentState] = None
     ) -> Dict:
         """
-        Create scatter plot
+        Create scatter plot (drawn as a point density for very large datasets)
 
         Args:
             file_path   : Path to data file
@@ -105,30 +144,49 @@ class VizTools:
             output_path : Path to save plot
 
         Returns:
-            Dict with plot path
+            Dict with plot path and whether the points were aggregated
         """
         try:
             if runtime and runtime.stream_writer:
                 runtime.stream_writer(f"📊 Creating scatter plot: {x_column} vs {y_column}...")
 
-            if file_path.endswith('.csv'):
-                df = pd.read_csv(file_path)
-            else:
-                df = pd.read_excel(file_path)
-
-            if output_path is None:
-                output_dir = Path("output/plots")
-                output_dir.mkdir(parents=True, exist_ok=True)
-                output_path = str(output_dir / f"scatter_{x_column}_vs_{y_column}.png")
-
-            plt.figure(figsize=(10, 6))
-            plt.scatter(df[x_column], df[y_column], alpha=0.6)
-            plt.xlabel(x_column)
-            plt.ylabel(y_column)
-            plt.title(f'{y_column} vs {x_column}')
-            plt.grid(True, alpha=0.3)
-            plt.savefig(output_path, dpi=150, bbox_inches='tight')
-            plt.close()
+            async def draw(target: str) -> Dict[str, Any]:
+                df = await asyncio.to_thread(DatasetCache.load, file_path, columns=[x_column, y_column])
+
+                # Above the threshold numeric points are binned first, so drawing time depends on the grid only
+                aggregated = (
+                    len(df) > settings.VIZ_AGGREGATE_ROW_THRESHOLD
+                    and plot_aggregation.is_aggregatable(df[x_column])
+                    and plot_aggregation.is_aggregatable(df[y_column])
+                )
+
+                if aggregated:
+                    if runtime and runtime.stream_writer:
+                        runtime.stream_writer(f"🧮 {len(df):,} points, plotting their density...")
+
+                    density = await asyncio.to_thread(
+                        plot_aggregation.density_grid
+                        , df[x_column].to_numpy(), df[y_column].to_numpy(), settings.VIZ_DENSITY_BINS
+                    )
+                    await RenderPool.render(render_pool.render_density, density, x_column, y_column, target)
+                else:
+                    await RenderPool.render(
+                        render_pool.render_scatter
+                        , df[x_column].to_numpy(), df[y_column].to_numpy(), x_column, y_column, target
+                    )
+
+                return {"aggregated": aggregated}
+
+            params = {
+                "x_column"      : x_column
+                , "y_column"    : y_column
+                , "threshold"   : settings.VIZ_AGGREGATE_ROW_THRESHOLD
+                , "density_bins": settings.VIZ_DENSITY_BINS
+            }
+
+            output_path, extras, cached = await VizTools._render_cached(
+                file_path, "scatter", params, output_path, draw
+            )
 
             filename = Path(output_path).name
             file_url = f"{settings.FRONT_API_BASE_URL}/api/v2/files/plots/{filename}"
@@ -144,6 +202,8 @@ class VizTools:
                 , "data"    : {
                     "plot_path": output_path
                     , "file_url": file_url
+                    , "aggregated": extras["aggregated"]
+                    , "cached"  : cached
                 }
             }
 
@@ -180,27 +240,22 @@ class VizTools:
             if runtime and runtime.stream_writer:
                 runtime.stream_writer("📊 Creating correlation heatmap...")
 
-            if file_path.endswith('.csv'):
-                df = pd.read_csv(file_path)
-            else:
-                df = pd.read_excel(file_path)
+            async def draw(target: str) -> Dict[str, Any]:
+                df = await asyncio.to_thread(DatasetCache.load, file_path, columns=columns)
 
-            if columns:
-                df = df[columns]
-            else:
-                df = df.select_dtypes(include=['number'])
+                if columns:
+                    df = df[columns]
+                else:
+                    df = df.select_dtypes(include=['number'])
 
-            if output_path is None:
-                output_dir = Path("output/plots")
-                output_dir.mkdir(parents=True, exist_ok=True)
-                output_path = str(output_dir / "correlation_heatmap.png")
+                corr = await asyncio.to_thread(df.corr)
+                await RenderPool.render(render_pool.render_heatmap, corr, target)
 
-            plt.figure(figsize=(12, 10))
-            sns.heatmap(df.corr(), annot=True, fmt='.2f', cmap='coolwarm', center=0)
-            plt.title('Correlation Heatmap')
-            plt.tight_layout()
-            plt.savefig(output_path, dpi=150, bbox_inches='tight')
-            plt.close()
+                return {}
+
+            output_path, extras, cached = await VizTools._render_cached(
+                file_path, "heatmap", {"columns": columns}, output_path, draw
+            )
 
             filename = Path(output_path).name
             file_url = f"{settings.FRONT_API_BASE_URL}/api/v2/files/plots/{filename}"
@@ -216,6 +271,7 @@ class VizTools:
                 , "data"    : {
                     "plot_path": output_path
                     , "file_url": file_url
+                    , "cached"  : cached
                 }
             }
 
@@ -252,29 +308,21 @@ class VizTools:
             if runtime and runtime.stream_writer:
                 runtime.stream_writer(f"📊 Creating box plot for '{column}'...")
 
-            if file_path.endswith('.csv'):
-                df = pd.read_csv(file_path)
-            else:
-                df = pd.read_excel(file_path)
-
-            if output_path is None:
-                output_dir = Path("output/plots")
-                output_dir.mkdir(parents=True, exist_ok=True)
-                output_path = str(output_dir / f"boxplot_{column}.png")
-
-            data = df[column].dropna()
-            Q1 = data.quantile(0.25)
-            Q3 = data.quantile(0.75)
-            IQR = Q3 - Q1
-            outliers = data[(data < Q1 - 1.5 * IQR) | (data > Q3 + 1.5 * IQR)]
-
-            plt.figure(figsize=(10, 6))
-            plt.boxplot(data, vert=False)
-            plt.xlabel(column)
-            plt.title(f'Box Plot of {column}')
-            plt.grid(True, alpha=0.3)
-            plt.savefig(output_path, dpi=150, bbox_inches='tight')
-            plt.close()
+            async def draw(target: str) -> Dict[str, Any]:
+                df      = await asyncio.to_thread(DatasetCache.load, file_path, columns=[column])
+                data    = df[column].dropna()
+                summary = await asyncio.to_thread(plot_aggregation.box_summary, data.to_numpy(), column)
+
+                await RenderPool.render(render_pool.render_box_plot, summary, column, target)
+
+                return {
+                    "outlier_count"         : summary["outlier_count"]
+                    , "outlier_percentage"  : round(summary["outlier_count"] / len(data) * 100, 2)
+                }
+
+            output_path, extras, cached = await VizTools._render_cached(
+                file_path, "boxplot", {"column": column}, output_path, draw
+            )
 
             filename = Path(output_path).name
             file_url = f"{settings.FRONT_API_BASE_URL}/api/v2/files/plots/{filename}"
@@ -290,8 +338,9 @@ class VizTools:
                 , "data"    : {
                     "plot_path": output_path
                     , "file_url": file_url
-                    , "outlier_count": len(outliers)
-                    , "outlier_percentage": round(len(outliers) / len(data) * 100, 2)
+                    , "outlier_count": extras["outlier_count"]
+                    , "outlier_percentage": extras["outlier_percentage"]
+                    , "cached"  : cached
                 }
             }
 
@@ -0,0 +1,371 @@
+from typing import Dict, List, Optional, Set, Tuple
+from functools import lru_cache
+import ast
+import marshal
+import hashlib
+
+
+# Builtins that give access to the interpreter or the filesystem
+BLOCKED_CALLS = {
+    'eval'          : 'eval() is not allowed for security'
+    , 'exec'        : 'exec() is not allowed for security'
+    , 'compile'     : 'compile() is not allowed for security'
+    , '__import__'  : 'Dynamic imports are restricted'
+    , 'open'        : 'Direct file operations are restricted. Use pandas.read_csv/read_excel instead'
+    , 'globals'     : 'Access to globals is restricted'
+    , 'locals'      : 'Access to locals is restricted'
+    , 'vars'        : 'Access to vars is restricted'
+    , 'dir'         : 'Access to dir is restricted'
+    , 'breakpoint'  : 'Debugger access is not allowed'
+}
+
+BLOCKED_MODULES = {
+    'subprocess'        : 'Subprocess execution is not allowed'
+    , 'socket'          : 'Network operations are not allowed'
+    , 'urllib'          : 'Network operations are not allowed'
+    , 'urllib3'         : 'Network operations are not allowed'
+    , 'requests'        : 'Network operations are not allowed'
+    , 'http'            : 'Network operations are not allowed'
+    , 'httpx'           : 'Network operations are not allowed'
+    , 'aiohttp'         : 'Network operations are not allowed'
+    , 'ftplib'          : 'Network operations are not allowed'
+    , 'smtplib'         : 'Network operations are not allowed'
+    , 'importlib'       : 'Dynamic imports are restricted'
+    , 'ctypes'          : 'Native code access is not allowed'
+    , 'multiprocessing' : 'Process forking is not allowed'
+    , 'pty'             : 'Process operations are not allowed'
+}
+
+# (module, attribute) pairs that are blocked even though the module itself is allowed
+BLOCKED_ATTRIBUTES = {
+    ('os', 'system')        : 'System command execution is not allowed'
+    , ('os', 'popen')       : 'System command execution is not allowed'
+    , ('os', 'remove')      : 'File deletion is not allowed'
+    , ('os', 'unlink')      : 'File deletion is not allowed'
+    , ('os', 'rmdir')       : 'Directory deletion is not allowed'
+    , ('os', 'removedirs')  : 'Directory deletion is not allowed'
+    , ('os', 'fork')        : 'Process forking is not allowed'
+    , ('os', 'kill')        : 'Process operations are not allowed'
+    , ('os', 'killpg')      : 'Process operations are not allowed'
+    , ('shutil', 'rmtree')  : 'Directory deletion is not allowed'
+    , ('sys', 'modules')    : 'Access to loaded modules is restricted'
+}
+
+# Methods that open files however they are reached (io.open, Path.open, os.fdopen, ...)
+BLOCKED_METHODS = {
+    'open'      : BLOCKED_CALLS['open']
+    , 'fdopen'  : BLOCKED_CALLS['open']
+    , 'popen'   : 'System command execution is not allowed'
+}
+
+BLOCKED_DUNDERS = {'__builtins__', '__globals__', '__subclasses__', '__code__', '__import__'}
+
+NETWORK_PREFIXES = ('http://', 'https://', 'ftp://')
+
+# Calls whose result changes between runs unless a seed is passed explicitly
+NONDETERMINISTIC_CALLS = {
+    "random", "rand", "randn", "randint", "random_sample", "choice", "shuffle"
+    , "permutation", "sample", "rvs", "default_rng", "uniform", "normal"
+    , "now", "today", "time", "perf_counter", "monotonic", "uuid1", "uuid4", "urandom"
+}
+SEED_KEYWORDS = {"random_state", "seed", "random_seed"}
+
+# Methods that mutate their receiver, so calling them changes session state
+MUTATING_METHODS = {
+    "append", "extend", "insert", "update", "pop", "popitem", "remove", "clear"
+    , "setdefault", "sort", "reverse", "add", "discard", "fit", "partial_fit"
+    , "fit_transform", "set_params", "seed", "manual_seed"
+}
+
+# Calls that write files; replaying their cached output would skip the write
+WRITING_CALLS = {
+    "to_csv", "to_parquet", "to_excel", "to_pickle", "to_feather", "to_json", "to_hdf"
+    , "to_sql", "to_stata", "to_orc", "to_xml", "to_html", "to_latex", "to_markdown"
+    , "dump", "tofile", "mkdir", "makedirs", "touch", "copyfile", "copy2", "copytree", "move"
+}
+WRITING_PREFIXES = ("save", "write", "sink_")
+
+SHINGLE_SIZE = 3
+
+
+def _call_name(node: ast.Call) -> Optional[str]:
+    if isinstance(node.func, ast.Name):
+        return node.func.id
+    if isinstance(node.func, ast.Attribute):
+        return node.func.attr
+    return None
+
+
+class _AnalysisVisitor(ast.NodeVisitor):
+    """One walk over the tree collecting everything CodeAnalysis exposes"""
+
+    def __init__(self):
+        self.violation      : Optional[str] = None
+        self.assigned       : List[str] = []
+        self.loaded         : Set[str] = set()
+        self.imports        : Set[str] = set()
+        self.aliases        : Dict[str, str] = {}
+        self.strings        : Set[str] = set()
+        self.tokens         : List[str] = []
+        self.randomness     = False
+        self.writes         = False
+        self.mutates_state  = False
+
+    def _block(self, message: str):
+        if self.violation is None:
+            self.violation = message
+
+    def _check_module(self, module_name: str):
+        root = module_name.split('.')[0]
+        self.imports.add(module_name)
+
+        if root in BLOCKED_MODULES:
+            self._block(BLOCKED_MODULES[root])
+
+    def visit(self, node: ast.AST):
+        self.tokens.append(type(node).__name__)
+        return super().visit(node)
+
+    def _mark_mutation(self, node: ast.AST):
+        self.mutates_state = True
+        self.generic_visit(node)
+
+    visit_FunctionDef       = _mark_mutation
+    visit_AsyncFunctionDef  = _mark_mutation
+    visit_ClassDef          = _mark_mutation
+    visit_Delete            = _mark_mutation
+    visit_Global            = _mark_mutation
+
+    def visit_Import(self, node: ast.Import):
+        for alias in node.names:
+            self._check_module(alias.name)
+            self.assigned.append((alias.asname or alias.name).split('.')[0])
+
+            # `import os as o` makes o.system an os.system call
+            if alias.asname:
+                self.aliases[alias.asname] = alias.name
+
+        self._mark_mutation(node)
+
+    def visit_ImportFrom(self, node: ast.ImportFrom):
+        if node.module:
+            self._check_module(node.module)
+
+        for alias in node.names:
+            if alias.name == '*' and any(node.module == module for module, _ in BLOCKED_ATTRIBUTES):
+                self._block(f'Wildcard imports from {node.module} are restricted')
+
+            if node.module:
+                self._check_module(f"{node.module}.{alias.name}")
+
+                # `from os import system` is os.system under another name
+                if (node.module, alias.name) in BLOCKED_ATTRIBUTES:
+                    self._block(BLOCKED_ATTRIBUTES[(node.module, alias.name)])
+
+            if alias.name in BLOCKED_CALLS:
+                self._block(BLOCKED_CALLS[alias.name])
+            elif alias.name in BLOCKED_METHODS:
+                self._block(BLOCKED_METHODS[alias.name])
+
+            self.assigned.append(alias.asname or alias.name)
+
+        self._mark_mutation(node)
+
+    def visit_comprehension(self, node: ast.comprehension):
+        # Comprehension targets are local to the comprehension
+        self.visit(node.iter)
+        for condition in node.ifs:
+            self.visit(condition)
+
+    def visit_Name(self, node: ast.Name):
+        self.tokens.append(node.id)
+
+        if isinstance(node.ctx, ast.Load):
+            self.loaded.add(node.id)
+
+            if node.id in BLOCKED_MODULES:
+                self._block(BLOCKED_MODULES[node.id])
+        else:
+            self.mutates_state = True
+            if isinstance(node.ctx, ast.Store):
+                self.assigned.append(node.id)
+
+    def visit_Attribute(self, node: ast.Attribute):
+        self.tokens.append(node.attr)
+
+        # Modules are reachable through other modules (pd.io.common.os,
+        # os.path.os), so the receiver is matched by its last name
+        if isinstance(node.value, ast.Name):
+            module = self.aliases.get(node.value.id, node.value.id)
+        elif isinstance(node.value, ast.Attribute):
+            module = node.value.attr
+        else:
+            module = None
+
+        if (module, node.attr) in BLOCKED_ATTRIBUTES:
+            self._block(BLOCKED_ATTRIBUTES[(module, node.attr)])
+
+        if node.attr in BLOCKED_DUNDERS:
+            self._block('Access to interpreter internals is restricted')
+
+        if isinstance(node.ctx, (ast.Store, ast.Del)):
+            self.mutates_state = True
+
+        self.generic_visit(node)
+
+    def visit_Subscript(self, node: ast.Subscript):
+        if isinstance(node.ctx, (ast.Store, ast.Del)):
+            self.mutates_state = True
+        self.generic_visit(node)
+
+    def visit_Constant(self, node: ast.Constant):
+        if isinstance(node.value, str):
+            self.strings.add(node.value)
+
+            if node.value.lower().startswith(NETWORK_PREFIXES):
+                self._block('Network operations are not allowed')
+
+            # Module names as strings reach them through getattr, sys.modules, ...
+            if node.value in BLOCKED_MODULES:
+                self._block(BLOCKED_MODULES[node.value])
+
+    def visit_Call(self, node: ast.Call):
+        name        = _call_name(node)
+        keywords    = {kw.arg: kw.value for kw in node.keywords if kw.arg}
+
+        if isinstance(node.func, ast.Name) and node.func.id in BLOCKED_CALLS:
+            self._block(BLOCKED_CALLS[node.func.id])
+
+        if isinstance(node.func, ast.Attribute) and node.func.attr in BLOCKED_METHODS:
+            self._block(BLOCKED_METHODS[node.func.attr])
+
+        seeded = any(
+            keyword in keywords
+            and not (isinstance(keywords[keyword], ast.Constant) and keywords[keyword].value is None)
+            for keyword in SEED_KEYWORDS
+        )
+
+        if name and not seeded:
+            if name in NONDETERMINISTIC_CALLS or "Random" in name:
+                self.randomness = True
+
+        if isinstance(node.func, ast.Attribute) and name in MUTATING_METHODS:
+            self.mutates_state = True
+
+        if name and (name in WRITING_CALLS or name.startswith(WRITING_PREFIXES)):
+            self.writes = True
+
+        inplace = keywords.get("inplace")
+        if isinstance(inplace, ast.Constant) and inplace.value is True:
+            self.mutates_state = True
+
+        if name in ("setattr", "delattr"):
+            self.mutates_state = True
+
+        self.generic_visit(node)
+
+
+class CodeAnalysis:
+    """
+    Everything the code execution path needs to know about a code string.
+
+    The code is parsed and walked once; validation, session memory, the
+    result cache, similarity detection and the sandbox worker all read
+    from this object instead of re-scanning the source.
+    """
+
+    def __init__(self, code: str):
+        self.code               = code
+        self.syntax_error       : Optional[str] = None
+        self.violation          : Optional[str] = None
+        self.assigned_names     : List[str] = []
+        self.loaded_names       : Set[str] = set()
+        self.imported_modules   : Set[str] = set()
+        self.string_constants   : Set[str] = set()
+        self.fingerprint        : Optional[str] = None
+        self.shingles           : Set[Tuple[str, ...]] = set()
+        self.preserves_state    = False
+        self.uses_randomness    = False
+        self.writes_files       = False
+        self.compiled           : Optional[Tuple[bytes, Optional[bytes]]] = None
+
+        try:
+            tree = ast.parse(code)
+        except SyntaxError as e:
+            self.syntax_error = str(e)
+            return
+
+        visitor = _AnalysisVisitor()
+        visitor.visit(tree)
+
+        self.violation          = visitor.violation
+        self.assigned_names     = list(dict.fromkeys(visitor.assigned))
+        self.loaded_names       = visitor.loaded
+        self.imported_modules   = visitor.imports
+        self.string_constants   = visitor.strings
+        self.preserves_state    = not visitor.mutates_state
+        self.uses_randomness    = visitor.randomness
+        self.writes_files       = visitor.writes
+        self.fingerprint        = hashlib.sha256(ast.dump(tree).encode()).hexdigest()
+        self.shingles           = {
+            tuple(visitor.tokens[i:i + SHINGLE_SIZE])
+            for i in range(max(len(visitor.tokens) - SHINGLE_SIZE + 1, 1))
+        }
+
+        if self.violation is None:
+            self.compiled = self._compile(tree)
+
+    @property
+    def is_valid(self) -> bool:
+        return self.syntax_error is None and self.violation is None
+
+    @property
+    def error(self) -> Optional[str]:
+        if self.violation:
+            return f"Security violation: {self.violation}"
+        if self.syntax_error:
+            return f"Syntax error: {self.syntax_error}"
+        return None
+
+    @property
+    def cacheable(self) -> bool:
+        return (
+            self.is_valid and self.preserves_state
+            and not self.uses_randomness and not self.writes_files
+        )
+
+    @staticmethod
+    def _compile(tree: ast.Module) -> Tuple[bytes, Optional[bytes]]:
+        """
+        Compile the cell, splitting off a trailing expression so it can be
+        evaluated and displayed like in a notebook. Code objects are marshalled
+        so they can be sent to the sandbox worker as they are.
+        """
+        last = None
+
+        if tree.body and isinstance(tree.body[-1], ast.Expr):
+            last = ast.Expression(tree.body[-1].value)
+            tree = ast.Module(body=tree.body[:-1], type_ignores=tree.type_ignores)
+
+        body = compile(tree, "<sandbox>", "exec")
+
+        return (
+            marshal.dumps(body)
+            , marshal.dumps(compile(last, "<sandbox>", "eval")) if last is not None else None
+        )
+
+    def similarity(self, other: "CodeAnalysis") -> float:
+        """Jaccard similarity of AST token shingles, linear in the size of both cells"""
+        if self.fingerprint is None or other.fingerprint is None:
+            return 0.0
+
+        if self.fingerprint == other.fingerprint:
+            return 1.0
+
+        union = len(self.shingles | other.shingles)
+        return len(self.shingles & other.shingles) / union if union else 0.0
+
+
+@lru_cache(maxsize=256)
+def analyze_code(code: str) -> CodeAnalysis:
+    return CodeAnalysis(code)
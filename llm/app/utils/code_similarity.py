@@ -1,26 +1,14 @@
 from typing import Dict, Any, Optional
 import re
-from difflib import SequenceMatcher
 
+from app.utils.code_analysis import analyze_code
 
-class CodeSimilarityDetector:
 
-    @staticmethod
-    def normalize_code(code: str) -> str:
-        code = re.sub(r'#.*', '', code)
-        code = re.sub(r'\s+', ' ', code)
-        code = code.strip().lower()
-        return code
+class CodeSimilarityDetector:
 
     @staticmethod
     def calculate_similarity(code1: str, code2: str) -> float:
-        norm1 = CodeSimilarityDetector.normalize_code(code1)
-        norm2 = CodeSimilarityDetector.normalize_code(code2)
-
-        if not norm1 or not norm2:
-            return 0.0
-
-        return SequenceMatcher(None, norm1, norm2).ratio()
+        return analyze_code(code1).similarity(analyze_code(code2))
 
     @staticmethod
     def extract_keywords(text: str) -> set:
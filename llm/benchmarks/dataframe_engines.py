@@ -0,0 +1,109 @@
+"""
+Benchmark the DS tools' dataframe engines on synthetic CSVs.
+
+Times a full read and a two-column projected read per engine and file size
+and prints a markdown table with speedups relative to pandas.
+
+Run from llm/ (the app settings are loaded from .env):
+
+    python -m benchmarks.dataframe_engines --rows 100000 1000000 5000000
+"""
+from typing import Dict, List
+from pathlib import Path
+import argparse
+import statistics
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.tools.ds.dataframe_engine import ENGINES
+
+
+PROJECTED_COLUMNS = ["amount", "region"]
+
+
+def make_csv(path: Path, rows: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+
+    pd.DataFrame({
+        "id"            : np.arange(rows)
+        , "amount"      : rng.lognormal(3, 1, rows).round(2)
+        , "quantity"    : rng.integers(1, 100, rows)
+        , "score"       : rng.normal(0, 1, rows)
+        , "region"      : rng.choice(["north", "south", "east", "west"], rows)
+        , "customer"    : [f"customer_{i}" for i in rng.integers(0, 50000, rows)]
+        , "flag"        : rng.random(rows) < 0.1
+    }).to_csv(path, index=False)
+
+
+def time_call(func, repeat: int) -> float:
+    timings = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return statistics.median(timings)
+
+
+def run(row_counts: List[int], engines: List[str], repeat: int) -> List[Dict]:
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for rows in row_counts:
+            path = Path(tmp_dir) / f"bench_{rows}.csv"
+            make_csv(path, rows)
+            size_mb = path.stat().st_size / 1024 / 1024
+
+            for name in engines:
+                engine = ENGINES[name]
+
+                results.append({
+                    "rows"          : rows
+                    , "size_mb"     : size_mb
+                    , "engine"      : name
+                    , "read"        : time_call(lambda: engine.read(str(path)), repeat)
+                    , "projected"   : time_call(lambda: engine.read_columns(str(path), PROJECTED_COLUMNS), repeat)
+                })
+
+    return results
+
+
+def print_table(results: List[Dict]):
+    baseline = {
+        (r["rows"], "read"): r["read"] for r in results if r["engine"] == "pandas"
+    }
+    baseline.update({
+        (r["rows"], "projected"): r["projected"] for r in results if r["engine"] == "pandas"
+    })
+
+    print("| rows | size (MB) | engine | full read (s) | speedup | projected read (s) | speedup |")
+    print("|---:|---:|---|---:|---:|---:|---:|")
+
+    for r in results:
+        read_speedup        = baseline.get((r["rows"], "read"), r["read"]) / r["read"]
+        projected_speedup   = baseline.get((r["rows"], "projected"), r["projected"]) / r["projected"]
+
+        print(
+            f"| {r['rows']:,} | {r['size_mb']:.1f} | {r['engine']} "
+            f"| {r['read']:.3f} | {read_speedup:.2f}x "
+            f"| {r['projected']:.3f} | {projected_speedup:.2f}x |"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    engines = ["pandas"] + [e for e in args.engines if e != "pandas"]
+    print_table(run(args.rows, engines, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -11,15 +11,22 @@ from app.api.v2.router import router as router_v2
 from app.core.config import settings
 
 from app import logger, init_langgraph_db, cleanup_langgraph_db
+from app.tools.ds.code_execution_pool import CodeExecutionPool
+from app.tools.ds.render_pool import RenderPool
+from app.tools.ds.training_engine import TrainingEngine
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Starting up application...")
     await init_langgraph_db()
+    CodeExecutionPool.get_instance()
     yield
     logger.info("Shutting down application...")
     await cleanup_langgraph_db()
+    CodeExecutionPool.get_instance().shutdown()
+    RenderPool.shutdown()
+    TrainingEngine.shutdown()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -0,0 +1,80 @@
+import pytest
+
+from app.utils.code_analysis import CodeAnalysis
+
+
+BLOCKED_CODE = [
+    "import io\nio.open('/etc/passwd').read()"
+    , "from pathlib import Path\nPath('/etc/passwd').open()"
+    , "import os\nos.open('/etc/passwd', os.O_RDONLY)"
+    , "import codecs\ncodecs.open('/etc/passwd')"
+    , "import os\nos.fdopen(0)"
+    , "from io import open as o\no('/etc/passwd')"
+    , "import os as o\no.system('id')"
+    , "import shutil as sh\nsh.rmtree('/tmp')"
+    , "from os import system\nsystem('id')"
+    , "from os import system as run\nrun('id')"
+    , "from os import *\nsystem('id')"
+    , "import os\nos.popen('id')"
+    , "open('/etc/passwd')"
+    , "import sys\nsys.modules['subprocess'].run(['id'])"
+    , "import sys\nsys.modules['os'].system('id')"
+    , "import pandas as pd\npd.io.common.os.system('id')"
+    , "import os.path\nos.path.os.system('id')"
+    , "from sys import modules\nmodules['os'].system('id')"
+    , "import importlib as il\ngetattr(il, 'import_module')('subprocess')"
+]
+
+ALLOWED_CODE = [
+    "import pandas as pd\ndf = pd.read_csv('data.csv')"
+    , "import os\nos.path.join('a', 'b')"
+    , "from os import path\npath.exists('a')"
+    , "import numpy as np\nnp.random.default_rng(0).normal(size=3)"
+]
+
+
+@pytest.mark.parametrize("code", BLOCKED_CODE)
+def test_blocked_code_is_rejected(code):
+    analysis = CodeAnalysis(code)
+
+    assert not analysis.is_valid
+    assert analysis.error.startswith("Security violation")
+
+
+@pytest.mark.parametrize("code", ALLOWED_CODE)
+def test_allowed_code_passes(code):
+    assert CodeAnalysis(code).is_valid
+
+
+WRITING_CODE = [
+    "df.to_csv('x.csv')"
+    , "df.to_parquet('x.parquet')"
+    , "df.to_excel('x.xlsx')"
+    , "df.to_pickle('x.pkl')"
+    , "plt.savefig('x.png')"
+    , "from pathlib import Path\nPath('x.txt').write_text('a')"
+    , "from pathlib import Path\nPath('x.bin').write_bytes(b'a')"
+    , "import joblib\njoblib.dump(model, 'model.joblib')"
+    , "np.save('x.npy', arr)"
+]
+
+CACHEABLE_CODE = [
+    "df.describe()"
+    , "df.groupby('a')['b'].mean()"
+    , "df.to_numpy().sum()"
+    , "print(df.to_dict())"
+]
+
+
+@pytest.mark.parametrize("code", WRITING_CODE)
+def test_code_writing_files_is_not_cacheable(code):
+    analysis = CodeAnalysis(code)
+
+    assert analysis.is_valid
+    assert analysis.writes_files
+    assert not analysis.cacheable
+
+
+@pytest.mark.parametrize("code", CACHEABLE_CODE)
+def test_read_only_code_is_cacheable(code):
+    assert CodeAnalysis(code).cacheable
@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+
+from app.tools.ds.sketches import HyperLogLog
+
+
+def test_hyperloglog_counts_int_and_float_chunks_once():
+    values  = np.arange(50000)
+    sketch  = HyperLogLog()
+
+    sketch.update(pd.Series(values[:25000], dtype=np.int64))
+    sketch.update(pd.Series(values, dtype=np.float64))
+
+    assert abs(sketch.estimate() - len(values)) <= 3 * sketch.standard_error * len(values)
+
+
+def test_hyperloglog_merge_of_int_and_float_sketches():
+    values  = np.arange(50000)
+    ints    = HyperLogLog()
+    floats  = HyperLogLog()
+
+    ints.update(pd.Series(values, dtype=np.int64))
+    floats.update(pd.Series(values, dtype=np.float64))
+    ints.merge(floats)
+
+    assert abs(ints.estimate() - len(values)) <= 3 * ints.standard_error * len(values)